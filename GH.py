@@ -1,9 +1,17 @@
 import os
 import argparse
-import json
 import requests
-import re
-import time
+
+from batch import add_batch_arguments, is_batch, load_batch, print_summary, run_batch
+from config import load_config
+from github_api import repo_path
+from http_client import get_client
+from jira_cache import get_jira_cache
+from jira_ids import configure_project_keys, extract_jira_id
+from jira_outbox import get_jira_outbox
+from merge_executor import FAILED, MERGED, STALE, UNMERGEABLE
+from mergeability import poll_mergeable
+from org_members import get_org_membership
 
 GREEN = '\033[92m'
 RED = '\033[91m'
@@ -13,101 +21,73 @@ RESET = '\033[0m'
 JIRA_API_TOKEN = os.getenv('JIRA_API_TOKEN')
 GITHUB_TOKEN = os.getenv('GITHUB_TOKEN')
 
-def parse_arguments():
-    parser = argparse.ArgumentParser(description="Process a specific PR based on PR ID.")
-    parser.add_argument('--pr-id', required=True, type=int, help="The ID of the PR to process.")
-    parser.add_argument('--repo', required=True, help="The name of the repository.")
-    return parser.parse_args()
+# Pooled keep-alive client shared by every GitHub and JIRA call
+client = get_client()
 
-def load_config():
-    try:
-        with open('repos.json', 'r') as file:
-            config = json.load(file)
-        
-        # Check if required keys are present
-        required_keys = ["org", "components", "jira_server", "jira_project", "jira_priority"]
-        for key in required_keys:
-            if key not in config:
-                raise KeyError(f"The '{key}' key is missing in 'repos.json'.")
-        
-        return config
-    except FileNotFoundError:
-        print(f"{RED}Error: 'repos.json' file not found in the GitHub Actions repository.{RESET}")
-        raise
-    except json.JSONDecodeError:
-        print(f"{RED}Error: 'repos.json' file is not valid JSON.{RESET}")
-        raise
+# On-disk JIRA issue cache shared across runs
+jira_cache = get_jira_cache()
 
-def get_jira_id_from_pr(pr):
-    title = pr.get('title', '')
-    body = pr.get('body', '')
+# Durable queue for the comments posted to JIRA after a merge
+jira_outbox = get_jira_outbox()
 
-    # Ensure title and body are strings
-    title = str(title)
-    body = str(body)
+# GitHub API base URL (GITHUB_API_URL in the environment overrides it)
+GITHUB_API_URL = client.github_api_url
 
-    jira_id_pattern = r'[A-Z]+-\d+'
-    
-   # Check the title for a JIRA ID
-    jira_id_match = re.search(jira_id_pattern, title)
-    if jira_id_match:
-        return jira_id_match.group(0)  # Return the found JIRA ID
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Process a specific PR based on PR ID, or a batch of PRs.")
+    parser.add_argument('--pr-id', type=int, help="The ID of the PR to process.")
+    parser.add_argument('--repo', help="The name of the repository.")
+    add_batch_arguments(parser)
+    args = parser.parse_args()
+    if not is_batch(args) and (args.pr_id is None or args.repo is None):
+        parser.error("--pr-id and --repo are required unless --pr or --batch-file is given")
+    return args
 
-    # Check the body for a JIRA ID
-    jira_id_match = re.search(jira_id_pattern, body)
-    if jira_id_match:
-        return jira_id_match.group(0)  # Return the found JIRA ID
+def get_jira_id_from_pr(pr):
+    # First key in the title, else in the (capped) body; only the configured JIRA project matches
+    return extract_jira_id(pr)
 
-    return None
+def get_jira_issue_details(jira_id):
+    cached = jira_cache.get(jira_id)
+    if cached is not None:
+        return cached
 
-def get_jira_issue_details(jira_id, max_retries=3):
-    headers = {
-        'Authorization': f'Bearer {JIRA_API_TOKEN}'
-    }
     url = f'{JIRA_SERVER}/rest/api/2/issue/{jira_id}'
 
-    for attempt in range(max_retries):
-        try:
-            response = requests.get(url, headers=headers)
-            response.raise_for_status()
-            jira_details = response.json()
-            return jira_details
-        except requests.exceptions.HTTPError as err:
-            if response.status_code == 403:
-                print(f"{RED}HTTP error 403: Forbidden for JIRA ID {jira_id}. Skipping.{RESET}")
-                return None
-            elif response.status_code == 404:
-                print(f"{RED}JIRA issue {jira_id} not found. Skipping.{RESET}")
-                return None
-            else:
-                print(f"{RED}HTTP error occurred: {err} for JIRA ID {jira_id}. Retrying ({attempt + 1}/{max_retries})...{RESET}")
-                time.sleep(2 ** attempt)  # Exponential backoff
-        except Exception as err:
-            print(f"{RED}Unexpected error: {err} for JIRA ID {jira_id}. Retrying ({attempt + 1}/{max_retries})...{RESET}")
-            time.sleep(2 ** attempt)  # Exponential backoff
-
-    print(f"{RED}Failed to retrieve JIRA details for ID {jira_id} after {max_retries} attempts.{RESET}")
+    # Transient failures are retried by the client's retry engine, which also
+    # stops calling JIRA altogether once it is clearly down
+    try:
+        response = client.get(url)
+        response.raise_for_status()
+        return jira_cache.put(jira_id, response.json())
+    except requests.exceptions.HTTPError as err:
+        if response.status_code == 403:
+            print(f"{RED}HTTP error 403: Forbidden for JIRA ID {jira_id}. Skipping.{RESET}")
+        elif response.status_code == 404:
+            print(f"{RED}JIRA issue {jira_id} not found. Skipping.{RESET}")
+        else:
+            print(f"{RED}Failed to retrieve JIRA details for ID {jira_id}: {err}{RESET}")
+    except (requests.exceptions.RequestException, ValueError) as err:
+        print(f"{RED}Failed to retrieve JIRA details for ID {jira_id}: {err}{RESET}")
     return None
 
 def check_pr_mergeable(org, repo, pr_number):
-    url = f'https://api.github.com/repos/{org}/{repo}/pulls/{pr_number}'
-    headers = {'Authorization': f'token {GITHUB_TOKEN}'}
-    response = requests.get(url, headers=headers)
-    response.raise_for_status()
-    return response.json().get('mergeable', False)
+    # GitHub reports null while it is still computing mergeability; poll until it decides
+    return poll_mergeable(org, repo, [pr_number], client=client)[pr_number]
 
 def merge_pr(org, repo, pr, pr_number):
-    url = f'https://api.github.com/repos/{org}/{repo}/pulls/{pr_number}/merge'
-    headers = {
-        'Authorization': f'token {GITHUB_TOKEN}',
-        'Accept': 'application/vnd.github.v3+json'
-    }
+    """Merge ``pr`` at the head it was evaluated at; return one of the merge_executor outcomes."""
+    url = f'{GITHUB_API_URL}/repos/{repo_path(org, repo)}/pulls/{pr_number}/merge'
     data = {
         'commit_title': f'Merge PR #{pr_number}',
         'commit_message': 'Merged automatically because the linked JIRA issue has Blocker priority.'
     }
+    # Pinning the evaluated head makes GitHub refuse the merge if new commits were pushed since
+    head_sha = (pr.get('head') or {}).get('sha')
+    if head_sha:
+        data['sha'] = head_sha
 
-    response = requests.put(url, headers=headers, json=data)
+    response = client.put(url, json=data)
 
     if response.status_code == 200:
         print(f"{GREEN}PR #{pr_number} in repo {repo} was successfully merged.{RESET}")
@@ -115,44 +95,25 @@ def merge_pr(org, repo, pr, pr_number):
         # After merging, add a comment to the JIRA issue
         jira_id = get_jira_id_from_pr(pr)  # Obtain the JIRA ID from the PR details
         if jira_id:
-            pr_link = f"https://github.com/{org}/{repo}/pull/{pr_number}"  # Construct the PR link
+            pr_link = f"https://github.com/{repo_path(org, repo)}/pull/{pr_number}"  # Construct the PR link
             comment_on_jira_issue(jira_id, "The associated pull request has been merged.", pr_link)
-    else:
-        print(f"{RED}Failed to merge PR #{pr_number} in repo {repo}. Response: {response.status_code} - {response.json()}{RESET}")
-
-def comment_on_jira_issue(jira_id, comment, pr_link, max_retries=3):
-    headers = {
-        'Authorization': f'Bearer {JIRA_API_TOKEN}',
-        'Content-Type': 'application/json'
-    }
-    url = f'{JIRA_SERVER}/rest/api/2/issue/{jira_id}/comment'
+        return MERGED
+    if response.status_code == 409:
+        print(f"{RED}PR #{pr_number} in repo {repo} changed since it was evaluated. Leaving it for the next run.{RESET}")
+        return STALE
+    print(f"{RED}Failed to merge PR #{pr_number} in repo {repo}. Response: {response.status_code} - {response.json()}{RESET}")
+    return UNMERGEABLE if response.status_code == 405 else FAILED
+
+def comment_on_jira_issue(jira_id, comment, pr_link):
     full_comment = f"{comment}\n\n{pr_link}"
-    data = {
-        'body': full_comment
-    }
-
-    for attempt in range(max_retries):
-        try:
-            response = requests.post(url, headers=headers, json=data)
-            response.raise_for_status()
-            print(f"{GREEN}Comment added to JIRA issue {jira_id}.{RESET}")
-            return
-        except requests.exceptions.HTTPError as err:
-            print(f"{RED}Failed to add comment to JIRA issue {jira_id}: {err}{RESET}")
-            time.sleep(2 ** attempt)  
-        except Exception as err:
-            print(f"{RED}Unexpected error while commenting on JIRA issue {jira_id}: {err}{RESET}")
-            time.sleep(2 ** attempt)  
-
-    print(f"{RED}Failed to add comment to JIRA issue {jira_id} after {max_retries} attempts.{RESET}")
+    # Journaled and posted in the background, so merges never wait on JIRA
+    jira_outbox.enqueue(jira_id, full_comment)
 
 
 def is_user_in_org(org, username):
     """Check if a user is a member of the given GitHub organization."""
-    url = f'https://api.github.com/orgs/{org}/members/{username}'
-    headers = {'Authorization': f'token {GITHUB_TOKEN}'}
-    response = requests.get(url, headers=headers)
-    return response.status_code == 204
+    # Uses a fresh on-disk member snapshot when there is one, else the per-user endpoint
+    return get_org_membership(org, load_members=False).is_member(username)
 
 def check_authors(org, pr):
     pr_author = pr['user']['login']
@@ -170,15 +131,48 @@ def check_authors(org, pr):
 
 
 def fetch_pr_details_by_id(org, repo, pr_id):
-    headers = {'Authorization': f'token {GITHUB_TOKEN}'}
-    url = f'https://api.github.com/repos/{org}/{repo}/pulls/{pr_id}'
-    response = requests.get(url, headers=headers)
+    url = f'{GITHUB_API_URL}/repos/{repo_path(org, repo)}/pulls/{pr_id}'
+    response = client.get(url)
     if response.status_code == 404:
-        print(f"Error: PR #{pr_id} not found in the repository {org}/{repo}.")
+        print(f"Error: PR #{pr_id} not found in the repository {repo_path(org, repo)}.")
         return None
     response.raise_for_status()
     return response.json()
 
+def process_pr(org, repo, pr_id):
+    """Check one PR and merge it if its JIRA issue qualifies and it is mergeable; return its result record."""
+    pr_details = fetch_pr_details_by_id(org, repo, pr_id)
+    if not pr_details:
+        return {'status': 'not_found'}
+    if not check_authors(org, pr_details):
+        return {'status': 'author_not_in_org'}
+    problem = load_config().pr_problem(pr_details)
+    if problem:
+        print(f"{RED}Skipping PR #{pr_id} as it {problem}.{RESET}")
+        return {'status': 'missing_labels'}
+    jira_id = get_jira_id_from_pr(pr_details)
+    if not jira_id:
+        print(f"{RED}JIRA ID not found in PR #{pr_id}. Skipping merge.{RESET}")
+        return {'status': 'no_jira_id'}
+    jira_details = get_jira_issue_details(jira_id)
+    if not jira_details:
+        return {'status': 'jira_unavailable', 'jira_id': jira_id}
+    problem = load_config().issue_problem(jira_details)
+    if problem:
+        print(f"{RED}Skipping PR #{pr_id} as the JIRA issue {jira_id} {problem}.{RESET}")
+        return {'status': 'not_blocker', 'jira_id': jira_id}
+    priority = jira_details['fields']['priority']['name']
+    print(f"{GREEN}Merging PR #{pr_details['number']} in repo {repo} because JIRA {jira_id} is a {priority} issue.{RESET}")
+    # The PR fetched above usually knows already; only poll while GitHub is still computing it
+    mergeable = pr_details.get('mergeable')
+    if mergeable is None:
+        mergeable = check_pr_mergeable(org, repo, pr_details['number'])
+    if not mergeable:
+        print(f"{RED}PR #{pr_id} in repo {repo} is not mergeable.{RESET}")
+        return {'status': 'not_mergeable', 'jira_id': jira_id}
+    outcome = merge_pr(org, repo, pr_details, pr_details['number'])
+    return {'status': 'merge_failed' if outcome == FAILED else outcome, 'jira_id': jira_id}
+
 if __name__ == "__main__":
     args = parse_arguments()
     pr_id = args.pr_id
@@ -186,33 +180,25 @@ if __name__ == "__main__":
 
     # Load configuration from repos.json
     config = load_config()
-    org = config['org']
-    JIRA_SERVER = config.get('jira_server', 'https://issues.redhat.com')
+    configure_project_keys(config.jira_project)
+    org = config.org
+    JIRA_SERVER = config.jira_server
+    client.set_jira_server(JIRA_SERVER)
+
+    # Resolves --repo / batch repos ('name' or 'owner/name') to their repos.json entry
+    repo_index = config.repo_index
+
+    if is_batch(args):
+        # One process for the whole burst: connections, caches and the outbox are shared
+        print_summary(run_batch(lambda repo, pr_id: process_pr(org, repo_index.lookup(repo).repo, pr_id),
+                                load_batch(args), args.results, args.workers, repo_index))
+    elif repo not in repo_index:
+        print(f"{RED}Repo {repo} is not configured in repos.json. Skipping PR #{pr_id}.{RESET}")
+    else:
+        # Exactly one PR fetch, from the repository the entry points at
+        process_pr(org, repo_index.lookup(repo).repo, pr_id)
 
-    pr_merged = False
-    
-    # Loop through the components and repositories in the configuration
-    for component in config.get('components', []):
-        for repo_config in component.get('rhds_repos', []):
-            # Skip further checks if a PR has been merged
-            if pr_merged:
-                break
-    
-            # Process the specific PR based on the passed PR ID and repository
-            if repo_config == repo:
-                pr_details = fetch_pr_details_by_id(org, repo, pr_id)
-                if pr_details and check_authors(org, pr_details):
-                    jira_id = get_jira_id_from_pr(pr_details)
-                    if jira_id:
-                        jira_details = get_jira_issue_details(jira_id)
-                        if jira_details and jira_details.get('fields', {}).get('priority', {}).get('name') == 'Blocker':
-                            print(f"{GREEN}Merging PR #{pr_details['number']} in repo {repo} because JIRA {jira_id} is a Blocker issue.{RESET}")
-                            if check_pr_mergeable(org, repo, pr_id):
-                                merge_pr(org, repo, pr_details, pr_id)
-                                pr_merged = True  # Mark the PR as merged
-                            else:
-                                print(f"{RED}PR #{pr_id} in repo {repo} is not mergeable.{RESET}")
-                    else:
-                        print(f"{RED}JIRA ID not found in PR #{pr_id}. Skipping merge.{RESET}")
-                else:
-                    print(f"{RED}Skipping PR #{pr_id} as it is not Blocker priority.{RESET}")
+    jira_outbox.flush()
+    jira_cache.print_stats()
+    jira_outbox.print_stats()
+    client.print_stats()
@@ -0,0 +1,111 @@
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+import jwt
+
+from http_client import get_client
+
+# GitHub rejects app JWTs valid for more than 10 minutes
+APP_JWT_LIFETIME_SECONDS = 600
+
+# Refresh tokens this long before they expire so a sweep never sends a dead one
+REFRESH_MARGIN_SECONDS = 5 * 60
+
+
+def _parse_github_time(value):
+    return datetime.strptime(value, '%Y-%m-%dT%H:%M:%SZ').replace(tzinfo=timezone.utc).timestamp()
+
+
+class InstallationTokenManager:
+    """Hands out a GitHub App installation access token, refreshing it ahead of expiry.
+
+    The app JWT is signed (RS256) only when the previous one is close to
+    expiring, and is exchanged for an installation token that is valid for an
+    hour. The token is cached in memory and, if ``cache_path`` is set, on disk
+    so the next process can reuse it. All methods are thread-safe.
+    """
+
+    def __init__(self, app_id, private_key, installation_id=None, org=None, client=None,
+                 cache_path=None, refresh_margin=REFRESH_MARGIN_SECONDS):
+        self.app_id = str(app_id)
+        self.private_key = private_key
+        self.installation_id = installation_id
+        self.org = org
+        self.client = client or get_client()
+        self.cache_path = cache_path
+        self.refresh_margin = refresh_margin
+        self._jwt = None
+        self._jwt_expires_at = 0
+        self._token = None
+        self._token_expires_at = 0
+        self._lock = threading.Lock()
+        self._load_cached_token()
+
+    def _app_jwt(self):
+        now = time.time()
+        if self._jwt is None or self._jwt_expires_at - now < 60:
+            issued_at = int(now) - 30  # Allow for clock drift, as GitHub recommends
+            self._jwt_expires_at = issued_at + APP_JWT_LIFETIME_SECONDS
+            payload = {'iat': issued_at, 'exp': self._jwt_expires_at, 'iss': self.app_id}
+            self._jwt = jwt.encode(payload, self.private_key, algorithm='RS256')
+        return self._jwt
+
+    def _app_headers(self):
+        return {'Authorization': f'Bearer {self._app_jwt()}'}
+
+    def _lookup_installation_id(self):
+        url = f'{self.client.github_api_url}/orgs/{self.org}/installation'
+        response = self.client.get(url, headers=self._app_headers())
+        response.raise_for_status()
+        return response.json()['id']
+
+    def _load_cached_token(self):
+        if not self.cache_path:
+            return
+        try:
+            with open(self.cache_path, 'r') as file:
+                cached = json.load(file)
+        except (OSError, ValueError):
+            return
+        if cached.get('app_id') != self.app_id:
+            return
+        if self.installation_id and cached.get('installation_id') != self.installation_id:
+            return
+        self.installation_id = cached.get('installation_id')
+        self._token = cached.get('token')
+        self._token_expires_at = cached.get('expires_at', 0)
+
+    def _save_cached_token(self):
+        if not self.cache_path:
+            return
+        os.makedirs(os.path.dirname(self.cache_path) or '.', exist_ok=True)
+        # The token grants write access to the installation; keep it owner-readable only
+        fd = os.open(self.cache_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w') as file:
+            json.dump({
+                'app_id': self.app_id,
+                'installation_id': self.installation_id,
+                'token': self._token,
+                'expires_at': self._token_expires_at,
+            }, file)
+
+    def _refresh(self):
+        if not self.installation_id:
+            self.installation_id = self._lookup_installation_id()
+        url = f'{self.client.github_api_url}/app/installations/{self.installation_id}/access_tokens'
+        response = self.client.post(url, headers=self._app_headers())
+        response.raise_for_status()
+        payload = response.json()
+        self._token = payload['token']
+        self._token_expires_at = _parse_github_time(payload['expires_at'])
+        self._save_cached_token()
+
+    def get_token(self):
+        """Return a valid installation token, fetching a new one if it is close to expiry."""
+        with self._lock:
+            if self._token is None or self._token_expires_at - time.time() < self.refresh_margin:
+                self._refresh()
+            return self._token
@@ -0,0 +1,104 @@
+import argparse
+import json
+import sys
+import time
+
+from sweep import iter_ordered
+
+RED = '\033[91m'
+RESET = '\033[0m'
+
+
+def parse_pair(text):
+    repo, sep, pr_id = text.rpartition('#')
+    if not sep or not repo or not pr_id.isdigit():
+        raise argparse.ArgumentTypeError(f"expected REPO#PR_ID, got '{text}'")
+    return repo, int(pr_id)
+
+
+def add_batch_arguments(parser):
+    """Add the options that feed many (repo, pr_id) pairs to one run of a single-PR script."""
+    group = parser.add_argument_group('batch mode')
+    group.add_argument('--pr', dest='batch_prs', action='append', default=[], type=parse_pair, metavar='REPO#PR_ID',
+                       help='A PR to process; repeat for more (e.g. --pr odh-dashboard#123)')
+    group.add_argument('--batch-file', metavar='PATH',
+                       help='JSON lines of {"repo": ..., "pr_id": ...} to process; "-" reads stdin')
+    group.add_argument('--results', metavar='PATH',
+                       help='Append one JSON result record per PR to this file instead of printing them')
+    group.add_argument('--workers', type=int, default=1, help='Number of PRs to process in parallel')
+
+
+def is_batch(args):
+    return bool(args.batch_prs or args.batch_file)
+
+
+def _read_jsonl(file):
+    for line_number, line in enumerate(file, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+            yield record['repo'], int(record['pr_id'])
+        except (ValueError, KeyError, TypeError) as err:
+            raise ValueError(f"Invalid batch record on line {line_number}: {line!r} ({err})")
+
+
+def load_batch(args):
+    """Return the (repo, pr_id) pairs from --pr and --batch-file, without duplicates."""
+    pairs = list(args.batch_prs)
+    if args.batch_file == '-':
+        pairs.extend(_read_jsonl(sys.stdin))
+    elif args.batch_file:
+        with open(args.batch_file, 'r') as file:
+            pairs.extend(_read_jsonl(file))
+    return list(dict.fromkeys(pairs))
+
+
+def _process(process, pair, repos):
+    repo, pr_id = pair
+    start = time.monotonic()
+    try:
+        if repos is not None and repo not in repos:
+            print(f"{RED}Repo {repo} is not configured in repos.json. Skipping PR #{pr_id}.{RESET}")
+            record = {'status': 'not_configured'}
+        else:
+            record = process(repo, pr_id)
+    except Exception as err:
+        print(f"{RED}Error while processing PR #{pr_id} in repo {repo}: {err}{RESET}")
+        record = {'status': 'error', 'error': str(err)}
+    return {'repo': repo, 'pr_id': pr_id, **record, 'seconds': round(time.monotonic() - start, 3)}
+
+
+def run_batch(process, pairs, results_path=None, workers=1, repos=None):
+    """Run ``process(repo, pr_id)`` for every pair and emit one JSON record per PR.
+
+    ``process`` returns a dict with at least a ``status``; the record adds the
+    repo, PR id and elapsed seconds. Pairs whose repo is not in ``repos``
+    (when given) are reported as ``not_configured``. PRs are processed on up
+    to ``workers`` threads sharing the process's client and caches; output
+    and records follow input order. Returns the records.
+    """
+    records = []
+    out = open(results_path, 'a') if results_path else None
+    try:
+        for _, record in iter_ordered(lambda pair: _process(process, pair, repos), pairs, workers):
+            line = json.dumps(record, sort_keys=True)
+            if out:
+                out.write(line + '\n')
+                out.flush()
+            else:
+                print(line)
+            records.append(record)
+    finally:
+        if out:
+            out.close()
+    return records
+
+
+def print_summary(records):
+    counts = {}
+    for record in records:
+        counts[record['status']] = counts.get(record['status'], 0) + 1
+    summary = ', '.join(f'{count} {status}' for status, count in sorted(counts.items()))
+    print(f"Batch: {len(records)} PR(s) processed ({summary or 'none'}).")
@@ -0,0 +1,220 @@
+import argparse
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from metrics import endpoint_class  # noqa: E402
+from stand_in import StandInServer, StandInState  # noqa: E402
+
+ORG = 'bench'
+PROJECT = 'RHOAIENG'
+RELEASE = 'rhoai-2.13'
+REPOS_PER_COMPONENT = 3
+
+# Scenario -> (script, extra arguments, how it is run)
+#   sweep:   one process for every configured repo
+#   per-pr:  one process per sampled PR, the way the PR workflows call it
+#   batch:   one process for all sampled PRs
+SCENARIOS = {
+    'test': ('test.py', ['--branch', RELEASE], 'sweep'),
+    'test-workers': ('test.py', ['--branch', RELEASE, '--workers', '8'], 'sweep'),
+    'test-graphql': ('test.py', ['--branch', RELEASE, '--graphql', '--workers', '8'], 'sweep'),
+    'test-jira-first': ('test.py', ['--branch', RELEASE, '--jira-first', '--workers', '8'], 'sweep'),
+    'rhtap': ('rhtap.py', [], 'per-pr'),
+    'pr': ('pr.py', [], 'per-pr'),
+    'pr-batch': ('pr.py', ['--workers', '8'], 'batch'),
+}
+
+
+def populate(state, repos, prs_per_repo, blocker_share, seed=0):
+    """Fill ``state`` with repos, PRs and JIRA issues; return [(repo, number, is_blocker)]."""
+    rng = random.Random(seed)
+    state.add_member(ORG, 'dev')
+    state.add_member(ORG, 'contributor')
+    prs = []
+    for repo_index in range(repos):
+        repo = f'repo-{repo_index:02d}'
+        state.add_repo(ORG, repo, [RELEASE])
+        for number in range(1, prs_per_repo + 1):
+            key = f'{PROJECT}-{repo_index * prs_per_repo + number}'
+            blocker = rng.random() < blocker_share
+            state.add_issue(key, priority='Blocker' if blocker else rng.choice(['Major', 'Critical', 'Minor']),
+                            labels=('eng', 'groomed'), components=(f'component-{repo_index // REPOS_PER_COMPONENT}',))
+            # Keys sit in the title or the body, and some authors are not reported as members
+            title, body = (f'{key}: fix', 'Details.') if rng.random() < 0.7 else ('Fix', f'Fixes {key}')
+            member = rng.random() < 0.8
+            state.add_pr(ORG, repo, number, title, body=body, author='dev' if member else 'contributor',
+                         author_association='MEMBER' if member else 'CONTRIBUTOR',
+                         mergeable=rng.random() > 0.05, labels=(RELEASE,))
+            if blocker:
+                state.add_remote_link(key, f'https://github.com/{ORG}/{repo}/pull/{number}')
+            prs.append((repo, number, blocker))
+    return prs
+
+
+def write_config(directory, jira_url, repos):
+    names = [f'repo-{index:02d}' for index in range(repos)]
+    components = [
+        {'component_name': f'Component {start // REPOS_PER_COMPONENT}',
+         'jira_component': f'component-{start // REPOS_PER_COMPONENT}',
+         'rhds_repos': names[start:start + REPOS_PER_COMPONENT]}
+        for start in range(0, len(names), REPOS_PER_COMPONENT)
+    ]
+    config = {'org': ORG, 'filter_labels': '{release_version}', 'jira_server': jira_url, 'jira_project': PROJECT,
+              'jira_labels': 'eng,groomed', 'jira_priority': 'Blocker', 'components': components}
+    with open(os.path.join(directory, 'repos.json'), 'w') as file:
+        json.dump(config, file)
+    with open(os.path.join(directory, 'releases.yaml'), 'w') as file:
+        file.write(f'releases:\n  - {RELEASE}\n')
+
+
+def run_script(args, env, cwd, log):
+    """Run one script to completion; return (seconds, peak RSS in KiB, exit code)."""
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, *args], cwd=cwd, env=env, stdout=log, stderr=subprocess.STDOUT)
+    # wait4 reports the peak RSS of this child alone
+    _, status, usage = os.wait4(process.pid, 0)
+    process.returncode = os.waitstatus_to_exitcode(status)
+    return time.perf_counter() - start, usage.ru_maxrss, process.returncode
+
+
+def endpoint_counts(requests):
+    return Counter(endpoint_class(path) for _, path in requests)
+
+
+def _client_retries(metrics_path):
+    # The scripts' own metrics count what the client re-sent
+    try:
+        with open(metrics_path, 'r') as file:
+            summary = json.load(file)
+    except (OSError, ValueError):
+        return 0
+    return sum(endpoint['retries'] for endpoint in summary['endpoints'].values())
+
+
+def run_scenario(name, args):
+    script, extra, mode = SCENARIOS[name]
+    state = StandInState(seed=args.seed)
+    state.latency = args.latency_ms / 1000
+    state.jitter = args.jitter_ms / 1000
+    state.error_rate = args.error_rate
+    state.rate_limit = args.rate_limit
+    state.rate_limit_window = args.rate_limit_window
+    state.max_per_page = args.per_page
+    prs = populate(state, args.repos, args.prs, args.blockers / 100, args.seed)
+    # Separate hosts, as in production, so GitHub and JIRA are paced independently
+    github, jira = StandInServer(state=state).start(), StandInServer(state=state).start()
+
+    workdir = tempfile.mkdtemp(prefix=f'bench-{name}-')
+    write_config(workdir, jira.url, args.repos)
+    env = {
+        **os.environ,
+        'GITHUB_API_URL': github.url,
+        'GITHUB_TOKEN': 'bench',
+        'JIRA_API_TOKEN': 'bench',
+        'REPOS_CONFIG_PATH': os.path.join(workdir, 'repos.json'),
+        'RELEASES_CONFIG_PATH': os.path.join(workdir, 'releases.yaml'),
+        'HTTP_CACHE_PATH': '',
+        'JIRA_CACHE_PATH': ':memory:',
+        'ORG_MEMBERS_CACHE_DIR': os.path.join(workdir, 'org_members'),
+        'JIRA_OUTBOX_PATH': os.path.join(workdir, 'jira_outbox.jsonl'),
+        'SWEEP_STATE_PATH': os.path.join(workdir, 'sweep_state.json'),
+    }
+    if args.unpaced:
+        env.update(HTTP_READ_RATE='1000', HTTP_WRITE_RATE='1000')
+
+    sample = random.Random(args.seed).sample(prs, min(args.sample, len(prs))) if mode != 'sweep' else []
+    seconds, peak, failures, runs, retries = 0.0, 0, 0, 0, 0
+    with open(os.path.join(workdir, 'output.log'), 'w') as log:
+        if mode == 'sweep':
+            invocations = [[script, *extra]]
+        elif mode == 'batch':
+            invocations = [[script, *extra, *(f'--pr={repo}#{number}' for repo, number, _ in sample)]]
+        else:
+            invocations = [[script, *extra, '--repo', repo, '--pr-id', str(number)] for repo, number, _ in sample]
+        for invocation in invocations:
+            metrics_path = os.path.join(workdir, f'api_metrics-{runs}.json')
+            elapsed, rss, code = run_script([os.path.join(ROOT, invocation[0]), *invocation[1:]],
+                                            {**env, 'API_METRICS_PATH': metrics_path}, workdir, log)
+            seconds += elapsed
+            peak = max(peak, rss)
+            failures += code != 0
+            runs += 1
+            retries += _client_retries(metrics_path)
+    github.stop()
+    jira.stop()
+    if not args.keep:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    counts = endpoint_counts(state.requests)
+    return {
+        'scenario': name,
+        'processes': runs,
+        'prs': len(sample) if sample else len(prs),
+        'blockers': sum(1 for _, _, blocker in (sample or prs) if blocker),
+        'seconds': round(seconds, 3),
+        'requests': sum(counts.values()),
+        'retries': retries,
+        'by_endpoint': dict(sorted(counts.items())),
+        'merges': len(state.merges),
+        'comments': len(state.comments),
+        'peak_rss_mib': round(peak / 1024, 1),
+        'failed_runs': failures,
+        'workdir': workdir if args.keep else None,
+    }
+
+
+def print_record(record):
+    print(f"{record['scenario']:16} {record['seconds']:8.2f} s  {record['processes']:3} proc  "
+          f"{record['prs']:5} PRs  {record['requests']:6} req  {record['retries']:4} retried  {record['merges']:4} merged  "
+          f"{record['peak_rss_mib']:6.1f} MiB peak" + (f"  {record['failed_runs']} FAILED" if record['failed_runs'] else ''))
+    print('    ' + ', '.join(f'{name} {count}' for name, count in record['by_endpoint'].items()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the auto-merge scripts end to end against a local GitHub/JIRA stand-in.')
+    parser.add_argument('scenarios', nargs='*', default=['test', 'rhtap', 'pr'], metavar='SCENARIO', help=f"Scenarios to run ({', '.join(SCENARIOS)}); default: test rhtap pr")
+    parser.add_argument('--repos', type=int, default=17, help='Configured repositories')
+    parser.add_argument('--prs', type=int, default=20, help='Open PRs per repository')
+    parser.add_argument('--blockers', type=float, default=10, help='Percentage of PRs whose JIRA issue qualifies')
+    parser.add_argument('--sample', type=int, default=10, help='PRs processed by the per-PR and batch scenarios')
+    parser.add_argument('--latency-ms', type=float, default=50, help='Stand-in latency per request')
+    parser.add_argument('--jitter-ms', type=float, default=20, help='Extra random latency per request, up to this much')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Share of requests answered with a 503')
+    parser.add_argument('--rate-limit', type=int, default=5000, help='GitHub quota per hour reported in X-RateLimit-*')
+    parser.add_argument('--rate-limit-window', type=float, default=3600, help='Seconds until the GitHub quota resets')
+    parser.add_argument('--per-page', type=int, default=100, help='Largest page the stand-in returns')
+    parser.add_argument('--unpaced', action='store_true',
+                        help="Lift the client's per-host pacing to see the code's own cost")
+    parser.add_argument('--seed', type=int, default=0, help='Seed for the generated data and the error injection')
+    parser.add_argument('--json', metavar='PATH', help='Also write the records to this file as JSON')
+    parser.add_argument('--keep', action='store_true', help='Keep each scenario\'s working directory and script output')
+    args = parser.parse_args()
+    unknown = [name for name in args.scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(unknown)}")
+
+    print(f"{args.repos} repos x {args.prs} PRs, {args.blockers:g}% blockers, "
+          f"{args.latency_ms:g}+{args.jitter_ms:g} ms latency, {args.error_rate:.0%} errors, "
+          f"{'unpaced' if args.unpaced else 'production pacing'}")
+    records = []
+    for name in args.scenarios:
+        record = run_scenario(name, args)
+        print_record(record)
+        records.append(record)
+    if args.json:
+        with open(args.json, 'w') as file:
+            json.dump(records, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
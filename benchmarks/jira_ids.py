@@ -0,0 +1,99 @@
+import argparse
+import os
+import random
+import re
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from jira_ids import JiraIdExtractor  # noqa: E402
+
+# Tokens that look like JIRA keys to a naive [A-Z]+-\d+ pattern
+DECOYS = ['UTF-8', 'SHA-256', 'ISO-8859', 'CVE-2024', 'PEP-8', 'X-509', 'HTTP-2']
+
+
+def legacy_get_jira_id_from_pr(pr):
+    """The per-script implementation this benchmark compares against."""
+    title = str(pr.get('title', ''))
+    body = str(pr.get('body', ''))
+    jira_id_pattern = r'[A-Z]+-\d+'
+    jira_id_match = re.search(jira_id_pattern, title)
+    if jira_id_match:
+        return jira_id_match.group(0)
+    jira_id_match = re.search(jira_id_pattern, body)
+    if jira_id_match:
+        return jira_id_match.group(0)
+    return None
+
+
+def _log_lines(rng, size):
+    chars = string.ascii_lowercase + string.digits + '    :/._'
+    lines, total = [], 0
+    while total < size:
+        line = ''.join(rng.choice(chars) for _ in range(rng.randint(40, 120)))
+        if rng.random() < 0.001:
+            line += f' {rng.choice(DECOYS)}'
+        lines.append(line)
+        total += len(line) + 1
+    return '\n'.join(lines)
+
+
+def make_corpus(count, log_bytes, seed=0):
+    """Synthetic PRs: (pr, expected key). Keys sit in the title, near the top of the body or nowhere."""
+    rng = random.Random(seed)
+    log = _log_lines(rng, log_bytes)
+    corpus = []
+    for number in range(1, count + 1):
+        key = f'RHOAIENG-{rng.randint(1, 99999)}'
+        placement = rng.random()
+        decoy = rng.choice(DECOYS) if rng.random() < 0.3 else 'encoding'
+        if placement < 0.5:
+            pr = {'title': f'{key}: fix {decoy} handling', 'body': f'Details below.\n```\n{log}\n```'}
+        elif placement < 0.8:
+            pr = {'title': f'Fix {decoy} handling', 'body': f'Fixes {key}\n```\n{log}\n```'}
+        else:
+            pr = {'title': 'Bump dependencies', 'body': f'```\n{log}\n```'}
+            key = None
+        pr['number'] = number
+        corpus.append((pr, key))
+    return corpus
+
+
+def _time(func, prs, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(prs)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Micro-benchmark JIRA key extraction over synthetic PR bodies.')
+    parser.add_argument('--prs', type=int, default=2000, help='Number of synthetic PRs')
+    parser.add_argument('--log-kb', type=int, default=64, help='Size of the log pasted into each body, in KiB')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per implementation; the best is reported')
+    args = parser.parse_args()
+
+    corpus = make_corpus(args.prs, args.log_kb * 1024)
+    prs = [pr for pr, _ in corpus]
+    extractor = JiraIdExtractor(['RHOAIENG'])
+
+    implementations = {
+        'legacy (per call)': lambda prs: [legacy_get_jira_id_from_pr(pr) for pr in prs],
+        'extractor (first)': lambda prs: [extractor.extract(pr) for pr in prs],
+        'extractor (batch)': lambda prs: [keys[0] if keys else None for keys in extractor.extract_many(prs)],
+    }
+    print(f"{args.prs} PRs, {args.log_kb} KiB body log each, best of {args.repeat}")
+    for name, func in implementations.items():
+        seconds = _time(func, prs, args.repeat)
+        found = func(prs)
+        correct = sum(1 for got, (_, expected) in zip(found, corpus) if got == expected)
+        print(f"{name:20} {seconds * 1000:9.1f} ms  {seconds / len(prs) * 1e6:8.1f} us/PR  "
+              f"{correct / len(prs):6.1%} correct")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+import requests
+
+from github_api import parse_pr_url, search_open_prs
+from http_client import get_client
+from jira_api import get_remote_link_urls, iter_search
+
+RED = '\033[91m'
+RESET = '\033[0m'
+
+
+def _jql_string(value):
+    return '"' + str(value).replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+def component_jql(config, component):
+    """JQL for a component's open issues with the configured priority and labels."""
+    clauses = [f"project = {_jql_string(config.jira_project)}", 'resolution = Unresolved']
+    if len(config.priority_names) == 1:
+        clauses.append(f"priority = {_jql_string(config.priority_names[0])}")
+    else:
+        clauses.append(f"priority in ({', '.join(map(_jql_string, config.priority_names))})")
+    if component.jira_component:
+        clauses.append(f"component = {_jql_string(component.jira_component)}")
+    # Empty unless repos.json sets enforce_labels; then every label is required, so 'eng,groomed' means both
+    for label in config.jira_labels:
+        clauses.append(f'labels = {_jql_string(label)}')
+    return ' AND '.join(clauses)
+
+
+class BlockerIndex:
+    """Reverse index from qualifying JIRA issues to the PRs that reference them.
+
+    Runs one JQL query per component in repos.json and maps each issue to
+    candidate PRs. It uses the GitHub PR links JIRA keeps as remote links,
+    and falls back to a GitHub search for the issue key in the component's
+    repos. Only PRs in configured repos are kept.
+    """
+
+    def __init__(self, org, config, branch, client=None):
+        self.org = org
+        self.config = config
+        self.branch = branch
+        self.client = client or get_client()
+        self.issues = {}
+        self.prs_by_repo = {}   # repos.json entry -> {pr_number: {jira_id, ...}}
+
+    def _linked_prs(self, jira_id):
+        try:
+            urls = get_remote_link_urls(jira_id, client=self.client)
+        except requests.exceptions.RequestException as err:
+            print(f"{RED}Could not read remote links of {jira_id}: {err}{RESET}")
+            return set()
+        return {ref for ref in map(parse_pr_url, urls) if ref}
+
+    def _searched_prs(self, jira_id, repos):
+        try:
+            return search_open_prs(jira_id, self.org, repos, self.branch, client=self.client)
+        except requests.exceptions.RequestException as err:
+            print(f"{RED}Could not search GitHub for PRs referencing {jira_id}: {err}{RESET}")
+            return set()
+
+    def _add(self, jira_id, owner, name, number):
+        entry = self.config.repo_index.lookup(f'{owner}/{name}')
+        if entry is not None:
+            self.prs_by_repo.setdefault(entry.repo, {}).setdefault(number, set()).add(jira_id)
+
+    def build(self):
+        for component in self.config.components:
+            for issue in iter_search(component_jql(self.config, component), client=self.client):
+                jira_id = issue['key']
+                self.issues[jira_id] = issue
+                refs = self._linked_prs(jira_id)
+                if not refs:
+                    refs = self._searched_prs(jira_id, component.repos)
+                for owner, name, number in refs:
+                    self._add(jira_id, owner, name, number)
+        return self
+
+    def candidate_count(self):
+        return sum(len(numbers) for numbers in self.prs_by_repo.values())
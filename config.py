@@ -0,0 +1,265 @@
+import json
+import os
+import threading
+from functools import lru_cache
+
+import yaml
+
+from repo_index import RepoIndex
+
+RED = '\033[91m'
+RESET = '\033[0m'
+
+# Where the repositories and the allowed releases are configured
+DEFAULT_CONFIG_PATH = 'repos.json'
+DEFAULT_RELEASES_PATH = 'releases.yaml'
+
+# repos.json keys: name -> (type, required)
+CONFIG_SCHEMA = {
+    'org': (str, True),
+    'jira_server': (str, True),
+    'jira_project': (str, True),
+    'jira_priority': (str, True),      # Comma-separated; any of them qualifies
+    'jira_labels': (str, False),       # Comma-separated; with enforce_labels all of them are required on the issue
+    'filter_labels': (str, False),     # Comma-separated PR labels; '{release_version}' is the base branch
+    'enforce_labels': (bool, False),   # Opt in to the jira_labels and filter_labels gates (off by default)
+    'components': (list, True),
+}
+
+COMPONENT_SCHEMA = {
+    'component_name': (str, True),
+    'jira_component': (str, False),
+    'rhds_repos': (list, True),
+}
+
+
+class ConfigError(ValueError):
+    """repos.json or releases.yaml does not match its schema."""
+
+
+def _split(text):
+    return tuple(dict.fromkeys(part.strip() for part in (text or '').split(',') if part.strip()))
+
+
+def _check(data, schema, where, problems):
+    if not isinstance(data, dict):
+        problems.append(f'{where} must be an object')
+        return False
+    for key, (kind, required) in schema.items():
+        if key not in data:
+            if required:
+                problems.append(f"{where} is missing the '{key}' key")
+        elif not isinstance(data[key], kind):
+            problems.append(f"{where}: '{key}' must be a {kind.__name__}")
+    return True
+
+
+def validate_config(data):
+    """Return the list of schema problems in parsed repos.json ``data``."""
+    problems = []
+    if not _check(data, CONFIG_SCHEMA, 'repos.json', problems):
+        return problems
+    if isinstance(data.get('jira_priority'), str) and not _split(data['jira_priority']):
+        problems.append("repos.json: 'jira_priority' names no priority")
+    if isinstance(data.get('filter_labels'), str):
+        try:
+            _labels_for(_split(data['filter_labels']), 'release')
+        except (KeyError, IndexError, ValueError):
+            problems.append("repos.json: 'filter_labels' may only use the {release_version} placeholder")
+    seen = {}
+    for position, component in enumerate(data.get('components') or []):
+        where = f'component #{position + 1}'
+        if not _check(component, COMPONENT_SCHEMA, where, problems):
+            continue
+        for repo in component.get('rhds_repos') or []:
+            if not isinstance(repo, str) or not repo.strip('/'):
+                problems.append(f"{where}: 'rhds_repos' entries must be repository names")
+            elif repo.lower() in seen:
+                problems.append(f"{where}: repo '{repo}' is already listed under {seen[repo.lower()]}")
+            else:
+                seen[repo.lower()] = where
+    return problems
+
+
+def validate_releases(data):
+    """Return the list of schema problems in parsed releases.yaml ``data``."""
+    if not isinstance(data, dict) or not isinstance(data.get('releases'), list):
+        return ["releases.yaml must have a 'releases' list"]
+    return [f'releases.yaml: release {release!r} must be a non-empty string'
+            for release in data['releases'] if not isinstance(release, str) or not release]
+
+
+class _Frozen:
+    """Slotted and read-only once built, so one snapshot can be shared by every thread."""
+
+    __slots__ = ()
+
+    def __init__(self, **fields):
+        for name, value in fields.items():
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f'{type(self).__name__} is read-only')
+
+    def __delattr__(self, name):
+        raise AttributeError(f'{type(self).__name__} is read-only')
+
+
+class Component(_Frozen):
+    __slots__ = ('name', 'jira_component', 'repos')
+
+
+@lru_cache(maxsize=None)
+def _labels_for(templates, release_version):
+    return frozenset(template.format(release_version=release_version) for template in templates)
+
+
+class LabelFilter(_Frozen):
+    """PR labels every candidate needs; templates are filled in per base branch."""
+
+    __slots__ = ('templates',)
+
+    def required(self, branch):
+        return _labels_for(self.templates, branch)
+
+    def missing(self, pr, branch):
+        """Return the required labels ``pr`` lacks, sorted."""
+        if not self.templates:
+            return []
+        labels = {label['name'] for label in pr.get('labels') or ()}
+        return sorted(self.required(branch) - labels)
+
+
+class Config(_Frozen):
+    """Compiled, validated repos.json shared by every entry point.
+
+    ``jira_labels`` and ``label_filter`` are the labels actually required:
+    empty unless repos.json sets ``enforce_labels``, in which case issues
+    need every jira_labels label and PRs every filter_labels label.
+    """
+
+    __slots__ = ('org', 'jira_server', 'jira_project', 'priority_names', 'priorities', 'enforce_labels',
+                 'jira_labels', 'label_filter', 'components', 'repos', 'repo_index')
+
+    def issue_problem(self, issue):
+        """Return why a JIRA issue does not qualify for an auto-merge, or None if it does."""
+        fields = issue.get('fields') or {}
+        priority = (fields.get('priority') or {}).get('name')
+        if priority not in self.priorities:
+            return f"is not a {' or '.join(self.priority_names)}"
+        missing = [label for label in self.jira_labels if label not in (fields.get('labels') or ())]
+        if missing:
+            return f"is missing the label(s) {', '.join(missing)}"
+        return None
+
+    def pr_problem(self, pr):
+        """Return why a PR's own labels rule it out, or None if they do not."""
+        missing = self.label_filter.missing(pr, pr['base']['ref'])
+        if missing:
+            return f"is missing the label(s) {', '.join(missing)}"
+        return None
+
+
+class ReleaseSet(_Frozen):
+    """The releases.yaml branches, in file order with constant-time membership."""
+
+    __slots__ = ('names', '_names')
+
+    def __contains__(self, branch):
+        return branch in self._names
+
+    def __iter__(self):
+        return iter(self.names)
+
+    def __len__(self):
+        return len(self.names)
+
+
+def compile_config(data):
+    """Validate parsed repos.json ``data`` and compile it; raise ConfigError listing every problem."""
+    problems = validate_config(data)
+    if problems:
+        raise ConfigError('; '.join(problems))
+    components = tuple(
+        Component(name=component['component_name'], jira_component=component.get('jira_component') or None,
+                  repos=tuple(component['rhds_repos']))
+        for component in data['components']
+    )
+    priorities = _split(data['jira_priority'])
+    enforce_labels = data.get('enforce_labels', False)
+    config = Config(
+        org=data['org'],
+        jira_server=data['jira_server'].rstrip('/'),
+        jira_project=data['jira_project'],
+        priority_names=priorities,
+        priorities=frozenset(priorities),
+        enforce_labels=enforce_labels,
+        jira_labels=_split(data.get('jira_labels')) if enforce_labels else (),
+        label_filter=LabelFilter(templates=_split(data.get('filter_labels')) if enforce_labels else ()),
+        components=components,
+        repos=tuple(repo for component in components for repo in component.repos),
+        repo_index=None,
+    )
+    object.__setattr__(config, 'repo_index', RepoIndex(config))
+    return config
+
+
+def compile_releases(data):
+    """Validate parsed releases.yaml ``data`` and compile it; raise ConfigError listing every problem."""
+    problems = validate_releases(data)
+    if problems:
+        raise ConfigError('; '.join(problems))
+    names = tuple(dict.fromkeys(data['releases']))
+    return ReleaseSet(names=names, _names=frozenset(names))
+
+
+# path -> ((mtime_ns, size), compiled)
+_compiled = {}
+_compiled_lock = threading.Lock()
+
+
+def _load(path, parse, compile_data):
+    """Return the compiled form of ``path``, parsing it again only when its mtime or size changed."""
+    stat = os.stat(path)
+    key = (stat.st_mtime_ns, stat.st_size)
+    with _compiled_lock:
+        cached = _compiled.get(path)
+        if cached and cached[0] == key:
+            return cached[1]
+    with open(path, 'r') as file:
+        compiled = compile_data(parse(file))
+    with _compiled_lock:
+        _compiled[path] = (key, compiled)
+    return compiled
+
+
+def load_config(path=None):
+    """Return the compiled repos.json (REPOS_CONFIG_PATH), cached until the file changes."""
+    path = path or os.getenv('REPOS_CONFIG_PATH', DEFAULT_CONFIG_PATH)
+    try:
+        return _load(path, json.load, compile_config)
+    except FileNotFoundError:
+        print(f"{RED}Error: '{path}' file not found.{RESET}")
+        raise
+    except json.JSONDecodeError:
+        print(f"{RED}Error: '{path}' file is not valid JSON.{RESET}")
+        raise
+    except ConfigError as err:
+        print(f"{RED}Error: '{path}' is not a valid configuration: {err}{RESET}")
+        raise
+
+
+def load_releases(path=None):
+    """Return the compiled releases.yaml (RELEASES_CONFIG_PATH), cached until the file changes."""
+    path = path or os.getenv('RELEASES_CONFIG_PATH', DEFAULT_RELEASES_PATH)
+    try:
+        return _load(path, yaml.safe_load, compile_releases)
+    except FileNotFoundError:
+        print(f"{RED}Error: '{path}' file not found.{RESET}")
+        raise
+    except yaml.YAMLError:
+        print(f"{RED}Error: '{path}' file is not a valid YAML.{RESET}")
+        raise
+    except ConfigError as err:
+        print(f"{RED}Error: '{path}' is not a valid configuration: {err}{RESET}")
+        raise
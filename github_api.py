@@ -0,0 +1,198 @@
+import re
+
+from http_client import get_client
+
+# GitHub's maximum page size for list endpoints (the default is 30)
+PER_PAGE = 100
+
+# Repositories checked per branch-existence GraphQL query
+BRANCH_CHECK_BATCH_SIZE = 50
+
+
+def split_repo(org, repo):
+    """Return (owner, name) for a repos.json entry, which may be 'name' or 'owner/name'."""
+    if '/' in repo:
+        owner, name = repo.split('/', 1)
+        return owner, name
+    return org, repo
+
+
+def repo_path(org, repo):
+    """Return the 'owner/name' path GitHub URLs use for a repos.json entry."""
+    return '/'.join(split_repo(org, repo))
+
+
+def iter_pages(url, params=None, client=None):
+    """Yield each page of a GitHub list endpoint, following ``Link: rel=next`` lazily."""
+    client = client or get_client()
+    while url:
+        response = client.get(url, params=params)
+        response.raise_for_status()
+        yield response.json()
+        url = response.links.get('next', {}).get('url')
+        params = None  # The next link already carries the full query string
+
+
+def iter_open_prs(org, repo, branch, until=None, client=None, sort=None, direction=None):
+    """Yield the open PRs against ``branch`` as each page arrives.
+
+    If ``until`` is given, it is called with every PR after it is yielded and
+    listing stops (no further pages are requested) once it returns True.
+    ``sort``/``direction`` are passed to GitHub (e.g. ``'updated'``/``'desc'``
+    to see recently changed PRs first).
+    """
+    client = client or get_client()
+    url = f'{client.github_api_url}/repos/{repo_path(org, repo)}/pulls'
+    params = {'state': 'open', 'base': branch, 'per_page': PER_PAGE}
+    if sort:
+        params['sort'] = sort
+    if direction:
+        params['direction'] = direction
+    for page in iter_pages(url, params, client):
+        for pr in page:
+            yield pr
+            if until is not None and until(pr):
+                return
+
+
+# One query returns everything the merge decision needs for a page of open PRs
+OPEN_PRS_QUERY = '''
+query($owner: String!, $name: String!, $base: String!, $cursor: String) {
+  repository(owner: $owner, name: $name) {
+    pullRequests(states: OPEN, baseRefName: $base, first: 100, after: $cursor) {
+      pageInfo { hasNextPage endCursor }
+      nodes {
+        number
+        title
+        body
+        mergeable
+        headRefOid
+        baseRefName
+        authorAssociation
+        updatedAt
+        author { login }
+        labels(first: 20) { nodes { name } }
+      }
+    }
+  }
+}
+'''
+
+# GraphQL MergeableState -> the REST 'mergeable' value
+MERGEABLE_STATES = {'MERGEABLE': True, 'CONFLICTING': False, 'UNKNOWN': None}
+
+
+def graphql(query, variables, client=None, ignore_not_found=False):
+    """Run a GraphQL query and return its 'data', raising on HTTP or GraphQL errors.
+
+    With ``ignore_not_found`` NOT_FOUND errors (e.g. a missing repository) are
+    tolerated; the corresponding field is simply null in the returned data.
+    """
+    client = client or get_client()
+    response = client.post(f'{client.github_api_url}/graphql', json={'query': query, 'variables': variables})
+    response.raise_for_status()
+    payload = response.json()
+    errors = [
+        error for error in payload.get('errors') or []
+        if not (ignore_not_found and error.get('type') == 'NOT_FOUND')
+    ]
+    if errors:
+        messages = '; '.join(error.get('message', str(error)) for error in errors)
+        raise RuntimeError(f'GitHub GraphQL query failed: {messages}')
+    return payload.get('data') or {}
+
+
+def _rest_shaped_pr(node):
+    """Map a GraphQL pullRequest node onto the REST fields the scripts read."""
+    author = node.get('author') or {}
+    return {
+        'number': node['number'],
+        'title': node.get('title') or '',
+        'body': node.get('body') or '',
+        'state': 'open',
+        'user': {'login': author.get('login', '')},
+        'author_association': node.get('authorAssociation'),
+        'mergeable': MERGEABLE_STATES.get(node.get('mergeable')),
+        'head': {'sha': node.get('headRefOid')},
+        'base': {'ref': node.get('baseRefName')},
+        'updated_at': node.get('updatedAt'),
+        'labels': [{'name': label['name']} for label in (node.get('labels') or {}).get('nodes') or []],
+    }
+
+
+def iter_open_prs_graphql(org, repo, branch, until=None, client=None):
+    """GraphQL variant of iter_open_prs.
+
+    Each page of 100 PRs also carries mergeability, head SHA and author
+    association, so no per-PR detail or membership request is needed.
+    """
+    owner, name = split_repo(org, repo)
+    variables = {'owner': owner, 'name': name, 'base': branch, 'cursor': None}
+    while True:
+        data = graphql(OPEN_PRS_QUERY, variables, client)
+        pull_requests = (data.get('repository') or {}).get('pullRequests') or {}
+        for node in pull_requests.get('nodes') or []:
+            pr = _rest_shaped_pr(node)
+            yield pr
+            if until is not None and until(pr):
+                return
+        page_info = pull_requests.get('pageInfo') or {}
+        if not page_info.get('hasNextPage'):
+            return
+        variables['cursor'] = page_info['endCursor']
+
+
+def branch_exists_by_repo(org, repos, branch, client=None):
+    """Check that ``branch`` exists in every repo without cloning anything.
+
+    Uses one aliased GraphQL query per batch of repositories and returns
+    ``{repo: bool}``. Missing repositories count as missing branches.
+    """
+    repos = list(repos)
+    exists = {}
+    for start in range(0, len(repos), BRANCH_CHECK_BATCH_SIZE):
+        batch = repos[start:start + BRANCH_CHECK_BATCH_SIZE]
+        params = ['$ref: String!']
+        fields = []
+        variables = {'ref': f'refs/heads/{branch}'}
+        for index, repo in enumerate(batch):
+            owner, name = split_repo(org, repo)
+            params.append(f'$owner{index}: String!, $name{index}: String!')
+            fields.append(f'r{index}: repository(owner: $owner{index}, name: $name{index}) {{ ref(qualifiedName: $ref) {{ name }} }}')
+            variables[f'owner{index}'] = owner
+            variables[f'name{index}'] = name
+        query = f"query({', '.join(params)}) {{ {' '.join(fields)} }}"
+        data = graphql(query, variables, client, ignore_not_found=True)
+        for index, repo in enumerate(batch):
+            exists[repo] = bool((data.get(f'r{index}') or {}).get('ref'))
+    return exists
+
+
+# Repository qualifiers per search query; GitHub caps search queries at 256 characters
+SEARCH_REPOS_PER_QUERY = 5
+
+# https://github.com/<owner>/<name>/pull/<number>, as found in JIRA remote links
+PR_URL_PATTERN = re.compile(r'https://github\.com/([^/\s]+)/([^/\s]+)/pull/(\d+)')
+
+
+def parse_pr_url(url):
+    """Return (owner, name, number) for a GitHub PR URL, or None."""
+    match = PR_URL_PATTERN.match(url or '')
+    if not match:
+        return None
+    return match.group(1), match.group(2), int(match.group(3))
+
+
+def search_open_prs(text, org, repos, branch, client=None):
+    """Return {(owner, name, number)} for open PRs against ``branch`` in ``repos`` that mention ``text``."""
+    client = client or get_client()
+    repos = [repo_path(org, repo) for repo in repos]
+    found = set()
+    for start in range(0, len(repos), SEARCH_REPOS_PER_QUERY):
+        qualifiers = ' '.join(f'repo:{repo}' for repo in repos[start:start + SEARCH_REPOS_PER_QUERY])
+        params = {'q': f'"{text}" is:pr is:open base:{branch} {qualifiers}', 'per_page': PER_PAGE}
+        for page in iter_pages(f'{client.github_api_url}/search/issues', params, client):
+            for item in page.get('items', []):
+                owner, name = item['repository_url'].rsplit('/', 2)[-2:]
+                found.add((owner, name, item['number']))
+    return found
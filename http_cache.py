@@ -0,0 +1,99 @@
+import json
+import os
+import sqlite3
+import threading
+
+# Where conditional-request validators and bodies are stored
+DEFAULT_CACHE_PATH = os.path.join('.cache', 'http.sqlite')
+
+# Response headers replayed on a 304; Link keeps pagination working
+REPLAYED_HEADERS = ('Content-Type', 'Link', 'ETag', 'Last-Modified')
+
+
+def format_bytes(count):
+    for unit in ('B', 'KiB', 'MiB'):
+        if count < 1024:
+            return f'{count:.0f} {unit}' if unit == 'B' else f'{count:.1f} {unit}'
+        count /= 1024
+    return f'{count:.1f} GiB'
+
+
+class ConditionalCache:
+    """On-disk (SQLite) store of GET responses keyed by full URL.
+
+    ``ApiClient`` sends the stored ETag / Last-Modified back as
+    ``If-None-Match`` / ``If-Modified-Since``. GitHub answers unchanged
+    resources with a 304 that does not count against the rate limit; the
+    stored body is then served in its place.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH):
+        self.path = path
+        self.revalidated = 0
+        self.saved_bytes = 0
+        self.stored = 0
+        self._lock = threading.Lock()
+        if path != ':memory:' and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS responses ('
+            ' url TEXT PRIMARY KEY,'
+            ' etag TEXT,'
+            ' last_modified TEXT,'
+            ' headers TEXT NOT NULL,'
+            ' body BLOB NOT NULL)'
+        )
+        self._db.commit()
+
+    def conditional_headers(self, url):
+        """Return the validators to send for ``url`` (empty if nothing is cached)."""
+        with self._lock:
+            row = self._db.execute(
+                'SELECT etag, last_modified FROM responses WHERE url = ?', (url,)
+            ).fetchone()
+        headers = {}
+        if row and row[0]:
+            headers['If-None-Match'] = row[0]
+        if row and row[1]:
+            headers['If-Modified-Since'] = row[1]
+        return headers
+
+    def store(self, url, response):
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if not etag and not last_modified:
+            return
+        headers = {name: response.headers[name] for name in REPLAYED_HEADERS if name in response.headers}
+        with self._lock:
+            self._db.execute(
+                'INSERT OR REPLACE INTO responses (url, etag, last_modified, headers, body) VALUES (?, ?, ?, ?, ?)',
+                (url, etag, last_modified, json.dumps(headers), response.content),
+            )
+            self._db.commit()
+            self.stored += 1
+
+    def replay(self, url, response):
+        """Turn a 304 ``response`` into the cached 200. Return False if nothing is cached."""
+        with self._lock:
+            row = self._db.execute('SELECT headers, body FROM responses WHERE url = ?', (url,)).fetchone()
+            if row is None:
+                return False
+            self.revalidated += 1
+            self.saved_bytes += len(row[1])
+        response.status_code = 200
+        response.headers.update(json.loads(row[0]))
+        response._content = bytes(row[1])
+        response.from_cache = True
+        return True
+
+    def stats(self):
+        return {'revalidated': self.revalidated, 'saved_bytes': self.saved_bytes, 'stored': self.stored}
+
+    def print_stats(self):
+        print(f"HTTP cache: {self.revalidated} request(s) answered with 304, "
+              f"{format_bytes(self.saved_bytes)} not re-downloaded.")
+
+    def close(self):
+        with self._lock:
+            self._db.close()
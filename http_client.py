@@ -0,0 +1,256 @@
+import atexit
+import os
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from http_cache import DEFAULT_CACHE_PATH as DEFAULT_HTTP_CACHE_PATH, ConditionalCache
+from metrics import DEFAULT_SUMMARY_PATH as DEFAULT_METRICS_PATH, ApiMetrics
+from rate_limit import READ_RATE, WRITE_RATE, RateLimiter
+from retry import RUN_BUDGET_SECONDS, RetryEngine
+
+# GitHub API base URL
+GITHUB_API_URL = 'https://api.github.com'
+
+# Default JIRA server URL (repos.json may override it)
+JIRA_SERVER = 'https://issues.redhat.com'
+
+# (connect, read) timeout in seconds applied to every request unless overridden
+DEFAULT_TIMEOUT = (5, 30)
+
+# Connection pool sizing per host. POOL_MAXSIZE bounds the number of kept-alive
+# sockets per host, so it should be at least the number of sweep workers.
+POOL_CONNECTIONS = 4
+POOL_MAXSIZE = 32
+
+# How often a rate-limited request is re-sent after waiting out Retry-After / reset
+MAX_RATE_LIMIT_RETRIES = 3
+
+
+def _host(url):
+    return urlsplit(url).netloc.lower()
+
+
+def _cache_key(url, params=None):
+    return requests.Request('GET', url, params=params).prepare().url
+
+
+class ApiClient:
+    """Pooled, keep-alive HTTP sessions shared by every GitHub and JIRA call.
+
+    One ``requests.Session`` is kept per host so TCP/TLS connections to
+    api.github.com and the JIRA server are reused across calls. Auth headers
+    and timeouts are applied by default; per-call ``headers`` still override
+    them. A token provider can supply short-lived GitHub tokens per request
+    (app.py uses this for GitHub App installation tokens). With a
+    ``ConditionalCache``, GitHub GETs are sent as conditional requests and
+    304s are answered from the cache. With a ``RateLimiter``, every request
+    is paced per host and rate-limited responses are retried once allowed.
+    With a ``RetryEngine``, transient failures are retried under its
+    deadlines and a host that keeps failing is cut off by its breaker.
+    With ``ApiMetrics``, every call and every send is counted per endpoint
+    class.
+    """
+
+    def __init__(self, github_token=None, jira_token=None, jira_server=JIRA_SERVER,
+                 github_api_url=GITHUB_API_URL, timeout=DEFAULT_TIMEOUT,
+                 pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE, cache=None,
+                 limiter=None, retry=None, metrics=None):
+        self.timeout = timeout
+        self.cache = cache
+        self.limiter = limiter
+        self.retry = retry
+        self.metrics = metrics
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self._lock = threading.Lock()
+        self._sessions = {}
+        self._github_token_provider = None
+
+        self.github = self._make_session({'Accept': 'application/vnd.github.v3+json'})
+        self.jira = self._make_session({'Accept': 'application/json'})
+        self.github_api_url = None
+        self.jira_server = None
+        self.set_github_api_url(github_api_url)
+        self.set_jira_server(jira_server)
+        self.set_github_token(github_token)
+        self.set_jira_token(jira_token)
+
+    def _make_session(self, headers=None):
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.pool_connections,
+                              pool_maxsize=self.pool_maxsize)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        if headers:
+            session.headers.update(headers)
+        return session
+
+    def set_github_api_url(self, url):
+        with self._lock:
+            if self.github_api_url:
+                self._sessions.pop(_host(self.github_api_url), None)
+            self.github_api_url = url.rstrip('/')
+            self._sessions[_host(self.github_api_url)] = self.github
+
+    def set_jira_server(self, url):
+        with self._lock:
+            if self.jira_server:
+                self._sessions.pop(_host(self.jira_server), None)
+            self.jira_server = url.rstrip('/')
+            self._sessions[_host(self.jira_server)] = self.jira
+
+    def set_github_token(self, token):
+        if token:
+            self.github.headers['Authorization'] = f'token {token}'
+        else:
+            self.github.headers.pop('Authorization', None)
+
+    def set_github_token_provider(self, provider):
+        """Ask ``provider()`` for the GitHub token on every request (e.g. a refreshing App token)."""
+        self._github_token_provider = provider
+
+    def set_jira_token(self, token):
+        if token:
+            self.jira.headers['Authorization'] = f'Bearer {token}'
+        else:
+            self.jira.headers.pop('Authorization', None)
+
+    def session_for(self, url):
+        """Return the pooled session for the host of ``url``, creating one if needed."""
+        host = _host(url)
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                session = self._make_session()
+                self._sessions[host] = session
+            return session
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        if self.metrics is not None:
+            self.metrics.count_request(method, url)
+        session = self.session_for(url)
+        headers = dict(kwargs.get('headers') or {})
+        # An explicit Authorization header (e.g. the app JWT itself) wins
+        if session is self.github and self._github_token_provider is not None and 'Authorization' not in headers:
+            headers['Authorization'] = f'token {self._github_token_provider()}'
+
+        cache_key = None
+        if method == 'GET' and session is self.github and self.cache is not None and 'If-None-Match' not in headers:
+            cache_key = _cache_key(url, kwargs.get('params'))
+            conditional = self.cache.conditional_headers(cache_key)
+            headers.update(conditional)
+        if headers:
+            kwargs['headers'] = headers
+
+        response = self._send(session, method, url, kwargs)
+        if cache_key is None:
+            return response
+        if response.status_code == 304 and not self.cache.replay(cache_key, response):
+            # The entry vanished between sending and replaying; ask again unconditionally
+            for name in conditional:
+                headers.pop(name)
+            response = self._send(session, method, url, kwargs)
+        if response.status_code == 200:
+            self.cache.store(cache_key, response)
+        return response
+
+    def _send(self, session, method, url, kwargs):
+        if self.retry is None:
+            return self._send_paced(session, method, url, kwargs)
+        # Pacing waits count against the same per-call deadline as the retries
+        deadline = time.monotonic() + self.retry.call_deadline
+        return self.retry.call(
+            method, url,
+            lambda timeout: self._send_paced(session, method, url, {**kwargs, 'timeout': timeout}, deadline),
+            kwargs.get('timeout'),
+        )
+
+    def _send_paced(self, session, method, url, kwargs, deadline=None):
+        if self.limiter is None:
+            return self._transmit(session, method, url, kwargs)
+        for attempt in range(MAX_RATE_LIMIT_RETRIES + 1):
+            self.limiter.wait(method, url, deadline)
+            response = self._transmit(session, method, url, kwargs)
+            if not self.limiter.update(url, response) or attempt == MAX_RATE_LIMIT_RETRIES:
+                return response
+
+    def _transmit(self, session, method, url, kwargs):
+        if self.metrics is None:
+            return session.request(method, url, **kwargs)
+        start = time.perf_counter()
+        try:
+            response = session.request(method, url, **kwargs)
+        except requests.exceptions.RequestException:
+            self.metrics.observe(method, url, None, time.perf_counter() - start)
+            raise
+        body = response.request.body if response.request is not None else None
+        self.metrics.observe(method, url, response, time.perf_counter() - start, len(body or b''))
+        return response
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def put(self, url, **kwargs):
+        return self.request('PUT', url, **kwargs)
+
+    def print_stats(self):
+        if self.cache is not None:
+            self.cache.print_stats()
+        if self.limiter is not None:
+            self.limiter.print_stats()
+        if self.retry is not None:
+            self.retry.print_stats()
+        if self.metrics is not None:
+            self.metrics.print_stats()
+
+    def close(self):
+        with self._lock:
+            for session in set(self._sessions.values()):
+                session.close()
+            self._sessions.clear()
+        if self.cache is not None:
+            self.cache.close()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Return the process-wide ApiClient, built from the environment on first use.
+
+    HTTP_CACHE_PATH sets where conditional-request data is kept; set it empty
+    to disable the cache. HTTP_RETRY_BUDGET caps the seconds a run spends
+    waiting between retries; set it empty for no cap. GITHUB_API_URL points
+    the client at GitHub Enterprise or a stand-in, and HTTP_READ_RATE /
+    HTTP_WRITE_RATE change the pacing (requests per second per host).
+    Per-endpoint metrics are written when the process exits: a JSON
+    summary to API_METRICS_PATH (empty disables it) and, if set, a
+    Prometheus textfile to API_METRICS_PROM_PATH.
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            cache_path = os.getenv('HTTP_CACHE_PATH', DEFAULT_HTTP_CACHE_PATH)
+            _client = ApiClient(
+                github_token=os.getenv('GITHUB_TOKEN'),
+                jira_token=os.getenv('JIRA_API_TOKEN'),
+                github_api_url=os.getenv('GITHUB_API_URL') or GITHUB_API_URL,
+                cache=ConditionalCache(cache_path) if cache_path else None,
+                limiter=RateLimiter(read_rate=float(os.getenv('HTTP_READ_RATE') or READ_RATE),
+                                    write_rate=float(os.getenv('HTTP_WRITE_RATE') or WRITE_RATE)),
+                retry=RetryEngine(run_budget=float(os.getenv('HTTP_RETRY_BUDGET', RUN_BUDGET_SECONDS) or 'inf')),
+                metrics=ApiMetrics(),
+            )
+            # At exit, so runs that stop early with sys.exit() are reported too
+            atexit.register(_client.metrics.write, os.getenv('API_METRICS_PATH', DEFAULT_METRICS_PATH),
+                            os.getenv('API_METRICS_PROM_PATH'))
+        return _client
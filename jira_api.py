@@ -0,0 +1,115 @@
+from datetime import datetime, timedelta
+
+import requests
+
+from http_client import get_client
+
+RED = '\033[91m'
+RESET = '\033[0m'
+
+# Only the fields the merge decision needs; the full issue payload is much larger.
+# 'updated' is the watermark the issue cache uses to tell whether an entry is stale.
+JIRA_FIELDS = ('priority', 'status', 'fixVersions', 'labels', 'updated')
+
+# Number of issue keys per "key in (...)" search
+JQL_BATCH_SIZE = 100
+
+# JIRA timestamps look like 2024-09-30T12:34:56.000+0000
+JIRA_TIMESTAMP_FORMAT = '%Y-%m-%dT%H:%M:%S.%f%z'
+
+# JQL "updated >=" comparisons run in the JIRA user's timezone with minute
+# precision, so the watermark is moved back by this margin to stay safe.
+WATERMARK_MARGIN = timedelta(days=1)
+
+
+def _batches(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def jql_since(updated_values):
+    """Turn the oldest of several 'updated' values into a JQL date, or None if unknown."""
+    try:
+        oldest = min(datetime.strptime(value, JIRA_TIMESTAMP_FORMAT) for value in updated_values)
+    except (TypeError, ValueError):
+        return None
+    return (oldest - WATERMARK_MARGIN).strftime('%Y/%m/%d %H:%M')
+
+
+def _search_batch(client, batch, fields, extra_jql=None):
+    """Run one ``key in (...)`` search. Return {key: issue}, or None if the search failed."""
+    jql = f"key in ({', '.join(batch)})"
+    if extra_jql:
+        jql = f'{jql} AND {extra_jql}'
+    params = {
+        'jql': jql,
+        'fields': ','.join(fields),
+        'maxResults': len(batch),
+        # Report unknown keys as warnings instead of failing the whole batch
+        'validateQuery': 'warn',
+    }
+    try:
+        response = client.get(f'{client.jira_server}/rest/api/2/search', params=params)
+        response.raise_for_status()
+    except requests.exceptions.RequestException as err:
+        print(f"{RED}JIRA search failed for {len(batch)} issue(s): {err}. Falling back to single lookups.{RESET}")
+        return None
+    return {issue['key']: issue for issue in response.json().get('issues', [])}
+
+
+def resolve_jira_issues(jira_ids, client=None, fields=JIRA_FIELDS, batch_size=JQL_BATCH_SIZE):
+    """Resolve many JIRA IDs with a few ``search?jql=key in (...)`` calls.
+
+    Returns a dict keyed by JIRA ID with the issue (``{'key': ..., 'fields': {...}}``)
+    as value. IDs that are not returned (unknown, moved or in a failed batch)
+    are left out so callers can fall back to a single-issue lookup.
+    """
+    client = client or get_client()
+    jira_ids = sorted({jira_id for jira_id in jira_ids if jira_id})
+    issues = {}
+    for batch in _batches(jira_ids, batch_size):
+        issues.update(_search_batch(client, batch, fields) or {})
+    return issues
+
+
+def find_updated_issues(jira_ids, since, client=None, fields=JIRA_FIELDS, batch_size=JQL_BATCH_SIZE):
+    """Return ``(changed, unchanged)`` for issues updated on or after ``since``.
+
+    ``since`` is a JQL date string (``yyyy/MM/dd HH:mm``). ``changed`` maps
+    JIRA ID to the fresh issue; ``unchanged`` is the set of IDs whose search
+    succeeded but did not return them. IDs in failed batches are in neither.
+    """
+    client = client or get_client()
+    jira_ids = sorted({jira_id for jira_id in jira_ids if jira_id})
+    changed, unchanged = {}, set()
+    for batch in _batches(jira_ids, batch_size):
+        found = _search_batch(client, batch, fields, extra_jql=f'updated >= "{since}"')
+        if found is None:
+            continue
+        changed.update(found)
+        unchanged.update(jira_id for jira_id in batch if jira_id not in found)
+    return changed, unchanged
+
+
+def iter_search(jql, client=None, fields=JIRA_FIELDS, page_size=JQL_BATCH_SIZE):
+    """Yield every issue matching ``jql``, paging with startAt/maxResults."""
+    client = client or get_client()
+    start_at = 0
+    while True:
+        params = {'jql': jql, 'fields': ','.join(fields), 'startAt': start_at, 'maxResults': page_size}
+        response = client.get(f'{client.jira_server}/rest/api/2/search', params=params)
+        response.raise_for_status()
+        payload = response.json()
+        issues = payload.get('issues') or []
+        yield from issues
+        start_at += len(issues)
+        if not issues or start_at >= payload.get('total', 0):
+            return
+
+
+def get_remote_link_urls(jira_id, client=None):
+    """Return the URLs of the issue's remote links (where JIRA records linked GitHub PRs)."""
+    client = client or get_client()
+    response = client.get(f'{client.jira_server}/rest/api/2/issue/{jira_id}/remotelink')
+    response.raise_for_status()
+    return [(link.get('object') or {}).get('url') for link in response.json() if (link.get('object') or {}).get('url')]
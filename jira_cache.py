@@ -0,0 +1,169 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from jira_api import JIRA_FIELDS, find_updated_issues, jql_since, resolve_jira_issues
+
+# Where the cache lives and how long an entry is trusted without revalidation
+DEFAULT_CACHE_PATH = os.path.join('.cache', 'jira_issues.sqlite')
+DEFAULT_TTL_SECONDS = 15 * 60
+
+
+def _project(issue):
+    """Keep only the fields the merge decision reads."""
+    fields = issue.get('fields') or {}
+    return {
+        'key': issue.get('key'),
+        'fields': {name: fields.get(name) for name in JIRA_FIELDS},
+    }
+
+
+class JiraIssueCache:
+    """On-disk (SQLite) cache of JIRA issues keyed by JIRA ID.
+
+    Each entry holds the priority/status projection of an issue, the time it
+    was fetched and the issue's ``updated`` timestamp. Entries younger than
+    ``ttl`` seconds are served as-is. Older entries are revalidated in bulk by
+    asking JIRA only for issues updated since their watermark; unchanged ones
+    are kept, changed ones are replaced (counted as evictions).
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl=DEFAULT_TTL_SECONDS):
+        self.path = path
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        if path != ':memory:' and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS issues ('
+            ' jira_id TEXT PRIMARY KEY,'
+            ' data TEXT NOT NULL,'
+            ' updated TEXT,'
+            ' fetched_at REAL NOT NULL)'
+        )
+        self._db.commit()
+
+    def _row(self, jira_id):
+        return self._db.execute(
+            'SELECT data, updated, fetched_at FROM issues WHERE jira_id = ?', (jira_id,)
+        ).fetchone()
+
+    def _is_fresh(self, fetched_at, now=None):
+        return (now or time.time()) - fetched_at < self.ttl
+
+    def get(self, jira_id):
+        """Return the cached issue if it is still fresh, otherwise None."""
+        with self._lock:
+            row = self._row(jira_id)
+            if row and self._is_fresh(row[2]):
+                self.hits += 1
+                return json.loads(row[0])
+            if row:
+                self._db.execute('DELETE FROM issues WHERE jira_id = ?', (jira_id,))
+                self._db.commit()
+                self.evictions += 1
+            self.misses += 1
+            return None
+
+    def put(self, jira_id, issue):
+        issue = _project(issue)
+        with self._lock:
+            self._db.execute(
+                'INSERT OR REPLACE INTO issues (jira_id, data, updated, fetched_at) VALUES (?, ?, ?, ?)',
+                (jira_id, json.dumps(issue), issue['fields'].get('updated'), time.time()),
+            )
+            self._db.commit()
+        return issue
+
+    def invalidate(self, jira_id):
+        """Drop ``jira_id`` so the next lookup fetches it from JIRA again."""
+        with self._lock:
+            if self._db.execute('DELETE FROM issues WHERE jira_id = ?', (jira_id,)).rowcount:
+                self.evictions += 1
+            self._db.commit()
+
+    def _touch(self, jira_ids):
+        with self._lock:
+            self._db.executemany(
+                'UPDATE issues SET fetched_at = ? WHERE jira_id = ?',
+                [(time.time(), jira_id) for jira_id in jira_ids],
+            )
+            self._db.commit()
+
+    def resolve(self, jira_ids, client=None):
+        """Bulk-resolve JIRA IDs, serving fresh entries from disk.
+
+        Stale entries are revalidated against their ``updated`` watermark and
+        missing ones are fetched with batched JQL searches. Returns a dict
+        keyed by JIRA ID; IDs JIRA did not return are left out.
+        """
+        jira_ids = {jira_id for jira_id in jira_ids if jira_id}
+        result, stale = {}, {}
+        now = time.time()
+        with self._lock:
+            for jira_id in jira_ids:
+                row = self._row(jira_id)
+                if row and self._is_fresh(row[2], now):
+                    self.hits += 1
+                    result[jira_id] = json.loads(row[0])
+                elif row:
+                    stale[jira_id] = row
+                else:
+                    self.misses += 1
+
+        missing = {jira_id for jira_id in jira_ids if jira_id not in result and jira_id not in stale}
+
+        since = jql_since(row[1] for row in stale.values()) if stale else None
+        if since:
+            changed, unchanged = find_updated_issues(stale, since, client=client)
+            self._touch(unchanged)
+            with self._lock:
+                self.hits += len(unchanged)
+                self.evictions += len(changed)
+                self.misses += len(stale) - len(unchanged)
+            result.update({jira_id: json.loads(stale[jira_id][0]) for jira_id in unchanged})
+            for jira_id, issue in changed.items():
+                if jira_id in stale:
+                    result[jira_id] = self.put(jira_id, issue)
+            missing.update(jira_id for jira_id in stale if jira_id not in result)
+        elif stale:
+            with self._lock:
+                self.evictions += len(stale)
+                self.misses += len(stale)
+            missing.update(stale)
+
+        for jira_id, issue in resolve_jira_issues(missing, client=client).items():
+            result[jira_id] = self.put(jira_id, issue)
+        return result
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions}
+
+    def print_stats(self):
+        print(f"JIRA cache: {self.hits} hit(s), {self.misses} miss(es), {self.evictions} eviction(s).")
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_jira_cache():
+    """Return the process-wide cache, configured from JIRA_CACHE_PATH / JIRA_CACHE_TTL."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = JiraIssueCache(
+                path=os.getenv('JIRA_CACHE_PATH', DEFAULT_CACHE_PATH),
+                ttl=float(os.getenv('JIRA_CACHE_TTL', DEFAULT_TTL_SECONDS)),
+            )
+        return _cache
@@ -0,0 +1,97 @@
+import re
+import threading
+
+# Only this much of a PR body is scanned; keys sit near the top, pasted logs below
+MAX_BODY_CHARS = 16 * 1024
+
+# Used until project keys are configured (e.g. from repos.json's jira_project)
+GENERIC_KEY_PATTERN = r'[A-Z][A-Z0-9]+'
+
+
+def _compile(project_keys):
+    if project_keys:
+        keys = '|'.join(re.escape(key) for key in sorted(set(project_keys), key=len, reverse=True))
+        prefix = f'(?:{keys})'
+    else:
+        prefix = GENERIC_KEY_PATTERN
+    # No lookbehind: a leading literal lets re jump straight to candidate positions,
+    # which is an order of magnitude faster on long bodies. The start is checked in _find.
+    return re.compile(rf'{prefix}-[0-9]+(?![0-9])')
+
+
+class JiraIdExtractor:
+    """Finds JIRA keys in PR titles and bodies.
+
+    The pattern is compiled once and, when project keys are given, only
+    matches those projects, so ``UTF-8`` or ``SHA-256`` are not mistaken for
+    issues. Keys are returned title first, then body, without duplicates;
+    only the first ``max_body_chars`` of a body are scanned.
+    """
+
+    def __init__(self, project_keys=None, max_body_chars=MAX_BODY_CHARS):
+        self.project_keys = tuple(project_keys or ())
+        self.max_body_chars = max_body_chars
+        self._pattern = _compile(self.project_keys)
+
+    def _iter_keys(self, text, limit=None):
+        # endpos caps the scan without copying the body
+        end = min(limit or len(text), len(text))
+        for match in self._pattern.finditer(text, 0, end):
+            start = match.start()
+            # Skip keys glued to a longer word, e.g. 'XRHOAIENG-1'
+            if start and text[start - 1].isalnum():
+                continue
+            # endpos hides what follows, so a key cut off by the cap would pass as a shorter one
+            if match.end() == end < len(text) and text[end].isdigit():
+                continue
+            yield match.group()
+
+    def _texts(self, pr):
+        yield str(pr.get('title') or ''), None
+        body = pr.get('body')
+        if body:
+            yield str(body), self.max_body_chars
+
+    def extract_all(self, pr):
+        """Return every JIRA key referenced by ``pr``, in priority order."""
+        keys = []
+        for text, limit in self._texts(pr):
+            keys.extend(self._iter_keys(text, limit))
+        return list(dict.fromkeys(keys))
+
+    def extract(self, pr):
+        """Return the highest-priority JIRA key referenced by ``pr``, or None."""
+        for text, limit in self._texts(pr):
+            for key in self._iter_keys(text, limit):
+                return key
+        return None
+
+    def extract_many(self, prs):
+        """Return one list of keys per PR, in the order the PRs were given."""
+        extract_all = self.extract_all
+        return [extract_all(pr) for pr in prs]
+
+
+_extractor = JiraIdExtractor()
+_extractor_lock = threading.Lock()
+
+
+def get_extractor():
+    return _extractor
+
+
+def configure_project_keys(project_keys):
+    """Restrict extraction to ``project_keys`` (a key, a comma-separated string or a list)."""
+    global _extractor
+    if isinstance(project_keys, str):
+        project_keys = [key.strip() for key in project_keys.split(',')]
+    with _extractor_lock:
+        _extractor = JiraIdExtractor([key for key in project_keys or () if key], _extractor.max_body_chars)
+
+
+def extract_jira_id(pr):
+    return _extractor.extract(pr)
+
+
+def extract_jira_ids(prs):
+    return _extractor.extract_many(prs)
@@ -0,0 +1,284 @@
+import atexit
+import fcntl
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+
+import requests
+from urllib3.exceptions import NewConnectionError
+
+from http_client import get_client
+from retry import CircuitOpenError, backoff
+
+GREEN = '\033[92m'
+RED = '\033[91m'
+RESET = '\033[0m'
+
+# Where pending comments are journaled and how many threads post them
+DEFAULT_JOURNAL_PATH = os.path.join('.cache', 'jira_outbox.jsonl')
+DEFAULT_WORKERS = 2
+
+# Attempts per comment within one run (jittered, exponentially growing pauses
+# between them); what is still pending afterwards stays in the journal for the next run
+MAX_ATTEMPTS = 5
+BACKOFF_BASE_SECONDS = 1.0
+MAX_BACKOFF_SECONDS = 30
+
+# How long a run waits at exit for the outbox to drain
+DEFAULT_FLUSH_TIMEOUT = 60
+
+# A comment claimed by another process is left to it for this long, so two
+# runs sharing the journal do not both post it
+CLAIM_TTL_SECONDS = 15 * 60
+
+
+def _may_have_arrived(err):
+    """Whether a request that failed with ``err`` may still have reached the server."""
+    if isinstance(err, requests.exceptions.ConnectTimeout):
+        return False
+    if isinstance(err, requests.exceptions.ConnectionError):
+        reason = err.args[0] if err.args else None
+        return not isinstance(getattr(reason, 'reason', reason), NewConnectionError)
+    return isinstance(err, requests.exceptions.Timeout)
+
+
+class JiraCommentOutbox:
+    """Durable background queue for the comments posted to JIRA after a merge.
+
+    ``enqueue`` appends the comment, with the JIRA server it is meant for, to
+    an append-only JSON-lines journal and returns at once, so merges never
+    wait for JIRA. Worker threads post the comments with retries and journal
+    each one as done. Whatever is still pending when the process stops is
+    picked up again by a later run against the same server.
+
+    The workers start with the first ``enqueue`` or ``flush``, after the
+    script has pointed the client at its JIRA server. Several processes may
+    share the journal: every write holds an exclusive lock on it, a process
+    claims the comments it resumes, and ``flush`` compacts the journal from
+    what is on disk rather than from its own memory. A POST that may have
+    reached JIRA without an answer is not sent again, so comments are not
+    duplicated.
+    """
+
+    def __init__(self, path=DEFAULT_JOURNAL_PATH, client=None, workers=DEFAULT_WORKERS,
+                 max_attempts=MAX_ATTEMPTS, claim_ttl=CLAIM_TTL_SECONDS):
+        self.path = path
+        self.client = client or get_client()
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.claim_ttl = claim_ttl
+        self.owner = uuid.uuid4().hex
+        self.posted = 0
+        self.failed = 0
+        self.unconfirmed = 0
+        self.resumed = 0
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._pending = {}   # Comments this process has queued or claimed
+        self._threads = []
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    def _journal_lock(self):
+        """Open and exclusively lock the journal's lock file; closing it releases the lock."""
+        file = open(f'{self.path}.lock', 'a')
+        fcntl.flock(file, fcntl.LOCK_EX)
+        return file
+
+    def _read(self):
+        """Return {id: add record} for the comments the journal still has pending, with their latest claim."""
+        pending = {}
+        try:
+            with open(self.path, 'r') as file:
+                lines = file.readlines()
+        except OSError:
+            return pending
+        for line in lines:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # A torn last line from a crash mid-write
+            if record.get('op') == 'add':
+                pending[record['id']] = record
+            elif record.get('op') == 'claim' and record.get('id') in pending:
+                pending[record['id']] = {**pending[record['id']], 'owner': record['owner'], 'claimed_at': record['at']}
+            elif record.get('op') == 'done':
+                pending.pop(record.get('id'), None)
+        return pending
+
+    def _write(self, records):
+        # Caller holds the journal lock
+        with open(self.path, 'a') as file:
+            for record in records:
+                file.write(json.dumps(record) + '\n')
+            file.flush()
+            os.fsync(file.fileno())
+
+    def _append(self, *records):
+        # Caller holds self._lock; the file lock keeps other processes' writes and compactions out
+        with self._journal_lock():
+            self._write(records)
+
+    def compact(self):
+        """Rewrite the journal without finished comments, keeping this process's claims.
+
+        Long-running processes call this periodically so the journal does not
+        grow until exit.
+        """
+        self._compact(release_claims=False)
+
+    def _compact(self, release_claims=True):
+        with self._lock, self._journal_lock():
+            if release_claims:
+                # Comments this process gave up on are released, so the next run need not wait out the claim
+                self._write([{'op': 'claim', 'id': record_id, 'owner': None, 'at': 0} for record_id in self._pending])
+            pending = self._read()
+            tmp_path = f'{self.path}.{self.owner}.tmp'
+            with open(tmp_path, 'w') as file:
+                for record in pending.values():
+                    file.write(json.dumps(record) + '\n')
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(tmp_path, self.path)
+
+    def start(self):
+        """Start the workers and claim the comments other runs left behind for this JIRA server."""
+        server = self.client.jira_server
+        with self._lock:
+            if self._threads:
+                return self
+            for _ in range(self.workers):
+                thread = threading.Thread(target=self._work, daemon=True)
+                thread.start()
+                self._threads.append(thread)
+            now = time.time()
+            with self._journal_lock():
+                # Comments without a server predate it being journaled; they were meant for the configured one
+                resumable = [record for record in self._read().values()
+                             if record.get('server', server) == server
+                             and now - record.get('claimed_at', 0) >= self.claim_ttl]
+                self._write([{'op': 'claim', 'id': record['id'], 'owner': self.owner, 'at': now}
+                             for record in resumable])
+            for record in resumable:
+                record = {**record, 'server': record.get('server', server)}
+                self._pending[record['id']] = record
+                self._queue.put(record)
+            self.resumed = len(resumable)
+        if self.resumed:
+            print(f"Resuming {self.resumed} pending JIRA comment(s) from a previous run.")
+        return self
+
+    def enqueue(self, jira_id, body):
+        self.start()
+        now = time.time()
+        record = {'op': 'add', 'id': uuid.uuid4().hex, 'server': self.client.jira_server, 'jira_id': jira_id,
+                  'body': body, 'queued_at': now, 'owner': self.owner, 'claimed_at': now}
+        with self._lock:
+            self._append(record)
+            self._pending[record['id']] = record
+        self._queue.put(record)
+
+    def _post(self, record):
+        url = f"{record['server']}/rest/api/2/issue/{record['jira_id']}/comment"
+        response = self.client.post(url, json={'body': record['body']})
+        response.raise_for_status()
+
+    def _deliver(self, record):
+        jira_id = record['jira_id']
+        for attempt in range(self.max_attempts):
+            try:
+                self._post(record)
+                print(f"{GREEN}Comment added to JIRA issue {jira_id}.{RESET}")
+                return 'done'
+            except CircuitOpenError as err:
+                # JIRA is down; further attempts would only fail fast, so keep it for the next run
+                print(f"{RED}Not commenting on JIRA issue {jira_id} for now: {err}{RESET}")
+                break
+            except requests.exceptions.HTTPError as err:
+                if err.response is not None and err.response.status_code in (400, 403, 404):
+                    # Retrying will not help; drop it rather than resend it forever
+                    print(f"{RED}Dropping comment for JIRA issue {jira_id}: {err}{RESET}")
+                    return 'failed'
+                print(f"{RED}Failed to add comment to JIRA issue {jira_id}: {err}{RESET}")
+            except requests.exceptions.RequestException as err:
+                if _may_have_arrived(err):
+                    # The comment may have been added; posting it again could duplicate it
+                    print(f"{RED}No answer from JIRA while commenting on issue {jira_id}; not posting it again: {err}{RESET}")
+                    return 'unconfirmed'
+                print(f"{RED}Unexpected error while commenting on JIRA issue {jira_id}: {err}{RESET}")
+            time.sleep(backoff(attempt, BACKOFF_BASE_SECONDS, MAX_BACKOFF_SECONDS))
+        else:
+            print(f"{RED}Failed to add comment to JIRA issue {jira_id} after {self.max_attempts} attempts; "
+                  f"it stays queued for the next run.{RESET}")
+        return None
+
+    def _work(self):
+        while True:
+            record = self._queue.get()
+            try:
+                try:
+                    status = self._deliver(record)
+                except Exception as err:  # One bad record must not stop the worker
+                    print(f"{RED}Dropping comment for JIRA issue {record.get('jira_id')}: {err}{RESET}")
+                    status = 'failed'
+                if status:
+                    with self._lock:
+                        self._append({'op': 'done', 'id': record['id'], 'status': status})
+                        self._pending.pop(record['id'], None)
+                        if status == 'done':
+                            self.posted += 1
+                        elif status == 'unconfirmed':
+                            self.unconfirmed += 1
+                        else:
+                            self.failed += 1
+            except Exception as err:
+                print(f"{RED}Could not journal the comment for JIRA issue {record.get('jira_id')}: {err}{RESET}")
+            finally:
+                self._queue.task_done()
+
+    def flush(self, timeout=DEFAULT_FLUSH_TIMEOUT):
+        """Wait up to ``timeout`` seconds for queued comments, then compact the journal."""
+        self.start()
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.05)
+        self._compact()
+        with self._lock:
+            return len(self._pending)
+
+    def print_stats(self):
+        with self._lock:
+            pending = len(self._pending)
+        message = (f"JIRA outbox: {self.posted} comment(s) posted, {self.unconfirmed} unconfirmed, "
+                   f"{self.failed} dropped, {pending} pending.")
+        print(f"{RED}{message}{RESET}" if pending else message)
+
+
+_outbox = None
+_outbox_lock = threading.Lock()
+
+
+def _flush_at_exit(outbox):
+    # Runs that stop early (sys.exit) still deliver what they queued
+    if outbox._threads:
+        outbox.flush()
+
+
+def get_jira_outbox():
+    """Return the process-wide outbox (JIRA_OUTBOX_PATH / JIRA_OUTBOX_WORKERS).
+
+    Its workers start with the first comment or flush, and it is flushed at
+    interpreter exit if they did.
+    """
+    global _outbox
+    with _outbox_lock:
+        if _outbox is None:
+            _outbox = JiraCommentOutbox(
+                path=os.getenv('JIRA_OUTBOX_PATH', DEFAULT_JOURNAL_PATH),
+                workers=int(os.getenv('JIRA_OUTBOX_WORKERS', DEFAULT_WORKERS)),
+            )
+            atexit.register(_flush_at_exit, _outbox)
+        return _outbox
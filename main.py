@@ -131,13 +131,19 @@
 
 
 import os
-import json
 import requests
-import re
 import subprocess
 import argparse
 import sys
-import time
+
+from config import load_config
+from github_api import branch_exists_by_repo, iter_open_prs, repo_path, split_repo
+from http_client import get_client
+from jira_cache import get_jira_cache
+from jira_ids import configure_project_keys, extract_jira_id
+from jira_outbox import get_jira_outbox
+from mergeability import poll_mergeable
+from mirror_cache import get_mirror_cache
 
 # ANSI escape codes for color
 GREEN = '\033[92m'
@@ -148,99 +154,65 @@ RESET = '\033[0m'
 JIRA_API_TOKEN = os.getenv('JIRA_API_TOKEN')
 GITHUB_TOKEN = os.getenv('GITHUB_TOKEN')
 
+# Pooled keep-alive client shared by every GitHub and JIRA call
+client = get_client()
+
+# On-disk JIRA issue cache shared across runs
+jira_cache = get_jira_cache()
+
+# Durable queue for the comments posted to JIRA after a merge
+jira_outbox = get_jira_outbox()
+
 # Hard-coded JIRA server URL
 JIRA_SERVER = 'https://issues.redhat.com'
 
-# GitHub API base URL
-GITHUB_API_URL = 'https://api.github.com'
-
-def load_config():
-    try:
-        with open('repos.json', 'r') as file:
-            config = json.load(file)
-        return config
-    except FileNotFoundError:
-        print(f"{RED}Error: 'repos.json' file not found.{RESET}")
-        raise
-    except json.JSONDecodeError:
-        print(f"{RED}Error: 'repos.json' file is not a valid JSON.{RESET}")
-        raise
+# GitHub API base URL (GITHUB_API_URL in the environment overrides it)
+GITHUB_API_URL = client.github_api_url
 
 def fetch_open_prs(org, repo, branch):
-    headers = {'Authorization': f'token {GITHUB_TOKEN}'}
-    url = f'{GITHUB_API_URL}/repos/{org}/{repo}/pulls?state=open&base={branch}'
-    response = requests.get(url, headers=headers)
-    response.raise_for_status()
-    open_prs = response.json()
-    return open_prs
+    # Follow pagination so busy repos don't stop at GitHub's default 30 results
+    return list(iter_open_prs(org, repo, branch, client=client))
 
 def get_jira_id_from_pr(pr):
-    title = pr.get('title', '')
-    body = pr.get('body', '')
+    # First key in the title, else in the (capped) body; only the configured JIRA project matches
+    return extract_jira_id(pr)
 
-    jira_id_pattern = r'[A-Z]+-\d+'
-    
-    jira_id_match = re.search(jira_id_pattern, title)
-    if jira_id_match:
-        jira_id = jira_id_match.group(0)
-        return jira_id
-
-    jira_id_match = re.search(jira_id_pattern, body)
-    if jira_id_match:
-        jira_id = jira_id_match.group(0)
-        return jira_id
-
-    return None
+def get_jira_issue_details(jira_id):
+    cached = jira_cache.get(jira_id)
+    if cached is not None:
+        return cached
 
-def get_jira_issue_details(jira_id, max_retries=3):
-    headers = {
-        'Authorization': f'Bearer {JIRA_API_TOKEN}'
-    }
     url = f'{JIRA_SERVER}/rest/api/2/issue/{jira_id}'
 
-    for attempt in range(max_retries):
-        try:
-            response = requests.get(url, headers=headers)
-            response.raise_for_status()
-            jira_details = response.json()
-            return jira_details
-        except requests.exceptions.HTTPError as err:
-            if response.status_code == 403:
-                print(f"{RED}HTTP error 403: Forbidden for JIRA ID {jira_id}. Skipping.{RESET}")
-                return None
-            elif response.status_code == 404:
-                print(f"{RED}JIRA issue {jira_id} not found. Skipping.{RESET}")
-                return None
-            else:
-                print(f"{RED}HTTP error occurred: {err} for JIRA ID {jira_id}. Retrying ({attempt + 1}/{max_retries})...{RESET}")
-                time.sleep(2 ** attempt)  # Exponential backoff
-        except Exception as err:
-            print(f"{RED}Unexpected error: {err} for JIRA ID {jira_id}. Retrying ({attempt + 1}/{max_retries})...{RESET}")
-            time.sleep(2 ** attempt)  # Exponential backoff
-
-    print(f"{RED}Failed to retrieve JIRA details for ID {jira_id} after {max_retries} attempts.{RESET}")
+    # Transient failures are retried by the client's retry engine, which also
+    # stops calling JIRA altogether once it is clearly down
+    try:
+        response = client.get(url)
+        response.raise_for_status()
+        return jira_cache.put(jira_id, response.json())
+    except requests.exceptions.HTTPError as err:
+        if response.status_code == 403:
+            print(f"{RED}HTTP error 403: Forbidden for JIRA ID {jira_id}. Skipping.{RESET}")
+        elif response.status_code == 404:
+            print(f"{RED}JIRA issue {jira_id} not found. Skipping.{RESET}")
+        else:
+            print(f"{RED}Failed to retrieve JIRA details for ID {jira_id}: {err}{RESET}")
+    except (requests.exceptions.RequestException, ValueError) as err:
+        print(f"{RED}Failed to retrieve JIRA details for ID {jira_id}: {err}{RESET}")
     return None
 
 def check_pr_mergeable(org, repo, pr_number):
-    url = f'{GITHUB_API_URL}/repos/{org}/{repo}/pulls/{pr_number}'
-    headers = {'Authorization': f'token {GITHUB_TOKEN}'}
-    response = requests.get(url, headers=headers)
-    response.raise_for_status()
-    pr_details = response.json()
-    return pr_details.get('mergeable', False)
+    # GitHub reports null while it is still computing mergeability; poll until it decides
+    return poll_mergeable(org, repo, [pr_number], client=client)[pr_number]
 
 def merge_pr(org, repo, pr_number):
-    url = f'{GITHUB_API_URL}/repos/{org}/{repo}/pulls/{pr_number}/merge'
-    headers = {
-        'Authorization': f'token {GITHUB_TOKEN}',
-        'Accept': 'application/vnd.github.v3+json'
-    }
+    url = f'{GITHUB_API_URL}/repos/{repo_path(org, repo)}/pulls/{pr_number}/merge'
     data = {
         'commit_title': f'Merge PR #{pr_number}',
         'commit_message': 'Merged automatically because the linked JIRA issue has Blocker priority.'
     }
 
-    response = requests.put(url, headers=headers, json=data)
+    response = client.put(url, json=data)
     
     if response.status_code == 200:
         print(f"{GREEN}PR #{pr_number} in repo {repo} was successfully merged.{RESET}")
@@ -248,51 +220,39 @@ def merge_pr(org, repo, pr_number):
         # After merging, add a comment to the JIRA issue
         jira_id = get_jira_id_from_pr(pr)  # Obtain the JIRA ID from the PR
         if jira_id:
-            pr_link = f"https://github.com/{org}/{repo}/pull/{pr_number}"  # Construct the PR link (Update the format)
+            pr_link = f"https://github.com/{repo_path(org, repo)}/pull/{pr_number}"  # Construct the PR link (Update the format)
             comment_on_jira_issue(jira_id, "The associated pull request has been merged.", pr_link)
     else:
         print(f"{RED}Failed to merge PR #{pr_number} in repo {repo}. Response: {response.status_code} - {response.json()}{RESET}")
 
 
 
-def comment_on_jira_issue(jira_id, comment, pr_link, max_retries=3):
-    headers = {
-        'Authorization': f'Bearer {JIRA_API_TOKEN}',
-        'Content-Type': 'application/json'
-    }
-    url = f'{JIRA_SERVER}/rest/api/2/issue/{jira_id}/comment'
+def comment_on_jira_issue(jira_id, comment, pr_link):
     full_comment = f"{comment}\n\n[View Pull Request]({pr_link})"  # Add the PR link to the comment
-    data = {
-        'body': full_comment
-    }
-
-    for attempt in range(max_retries):
-        try:
-            response = requests.post(url, headers=headers, json=data)
-            response.raise_for_status()
-            print(f"{GREEN}Comment added to JIRA issue {jira_id}.{RESET}")
-            return
-        except requests.exceptions.HTTPError as err:
-            print(f"{RED}Failed to add comment to JIRA issue {jira_id}: {err}{RESET}")
-            time.sleep(2 ** attempt)  # Exponential backoff
-        except Exception as err:
-            print(f"{RED}Unexpected error while commenting on JIRA issue {jira_id}: {err}{RESET}")
-            time.sleep(2 ** attempt)  # Exponential backoff
-
-    print(f"{RED}Failed to add comment to JIRA issue {jira_id} after {max_retries} attempts.{RESET}")
+    # Journaled and posted in the background, so merges never wait on JIRA
+    jira_outbox.enqueue(jira_id, full_comment)
 
 
 
 def checkout_branch(org, repo, branch):
+    """Check out ``branch`` as a worktree of the cached mirror and return its path."""
     try:
-        subprocess.run(['git', 'clone', f'https://github.com/{org}/{repo}.git'], check=True)
-        os.chdir(repo)
-        subprocess.run(['git', 'checkout', branch], check=True)
+        # Mirrors persist across runs, so this is an incremental fetch rather than a full clone
+        return get_mirror_cache().checkout(*split_repo(org, repo), branch)
     except subprocess.CalledProcessError as e:
         print(f"{RED}Error: Command '{e.cmd}' returned non-zero exit status {e.returncode}.{RESET}")
         print(f"{RED}Error: The branch '{branch}' does not exist in the repository '{repo}'.{RESET}")
         sys.exit(1)  # Exit with non-zero status to indicate failure
 
+def validate_repo_branches(org, repos, branch):
+    # One GraphQL query confirms the branch exists everywhere, with no clone and no chdir
+    exists = branch_exists_by_repo(org, repos, branch, client=client)
+    missing = [repo for repo in repos if not exists.get(repo)]
+    for repo in missing:
+        print(f"{RED}Error: The branch '{branch}' does not exist in the repository '{repo}'.{RESET}")
+    if missing:
+        sys.exit(1)  # Exit with non-zero status to indicate failure
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Process GitHub repositories and JIRA issues.')
     parser.add_argument('--branch', required=True, help='Branch name to check out and process')
@@ -300,12 +260,16 @@ if __name__ == "__main__":
 
     branch_name = args.branch
     config = load_config()
-    org = config['org']
+    configure_project_keys(config.jira_project)
+    org = config.org
+    JIRA_SERVER = config.jira_server
+    client.set_jira_server(JIRA_SERVER)
     all_prs_found = False
 
-    for component in config['components']:
-        for repo in component['rhds_repos']:
-            checkout_branch(org, repo, branch_name)
+    validate_repo_branches(org, config.repos, branch_name)
+
+    for component in config.components:
+        for repo in component.repos:
             open_prs = fetch_open_prs(org, repo, branch_name)
 
             if not open_prs:
@@ -319,18 +283,21 @@ if __name__ == "__main__":
                 jira_id = get_jira_id_from_pr(pr)
                 if jira_id:
                     jira_details = get_jira_issue_details(jira_id)
-                    if jira_details and jira_details.get('fields', {}).get('priority', {}).get('name', '') == 'Blocker':
-                        print(f"{GREEN}Found PR #{pr['number']} with 'Blocker' priority in repo: {repo}. Proceeding to merge...{RESET}")
+                    if jira_details and not config.pr_problem(pr) and not config.issue_problem(jira_details):
+                        priority = jira_details['fields']['priority']['name']
+                        print(f"{GREEN}Found PR #{pr['number']} with '{priority}' priority in repo: {repo}. Proceeding to merge...{RESET}")
                         any_blocker_pr_found = True
                         if check_pr_mergeable(org, repo, pr['number']):
                             merge_pr(org, repo, pr['number'])
 
             if not any_blocker_pr_found:
-                print(f"{RED}No PRs with 'Blocker' priority found in repo: {repo} on branch: {branch_name}.{RESET}")
+                print(f"{RED}No PRs with '{'/'.join(config.priority_names)}' priority found in repo: {repo} on branch: {branch_name}.{RESET}")
                 sys.exit(1)  # Exit with non-zero status if no blocker PRs found
 
-            os.chdir('..')  # Go back to the previous directory
-
+    jira_outbox.flush()
+    jira_cache.print_stats()
+    jira_outbox.print_stats()
+    client.print_stats()
     print(f"{GREEN}Workflow completed successfully.{RESET}")
     sys.exit(0)  # Exit with zero status to indicate success
 
@@ -0,0 +1,121 @@
+import sys
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from sweep import captured_output
+
+RED = '\033[91m'
+RESET = '\033[0m'
+
+# Number of (repo, base branch) lanes merged at the same time
+DEFAULT_WORKERS = 8
+
+# How often a PR that turned unmergeable behind a sibling's merge is retried
+MAX_REQUEUES = 2
+
+# Outcomes reported by the merge callable
+MERGED = 'merged'
+STALE = 'stale'              # The head moved since the PR was evaluated
+UNMERGEABLE = 'unmergeable'  # Conflicts or an outdated base, usually after a sibling merged
+FAILED = 'failed'
+
+
+class MergeExecutor:
+    """Runs merges concurrently across (repo, base branch) lanes, one at a time within a lane.
+
+    Merging two PRs into the same base at once makes GitHub recompute
+    mergeability under the second one, so each lane is drained in order by a
+    single thread while different lanes proceed in parallel. A PR whose merge
+    comes back ``UNMERGEABLE`` goes to the back of its lane; before it is
+    tried again ``recheck(item)`` must confirm it is mergeable. With a single
+    worker everything runs inline in ``submit``.
+
+    Lane threads print into per-merge buffers instead of stdout, so a report
+    stays in order: ``take_output`` hands a lane's output to the caller to
+    print in its place, and ``shutdown`` prints whatever was not taken.
+    """
+
+    def __init__(self, merge, recheck, workers=DEFAULT_WORKERS, max_requeues=MAX_REQUEUES):
+        self.merge = merge
+        self.recheck = recheck
+        self.workers = workers
+        self.max_requeues = max_requeues
+        self.results = []    # (key, item, outcome) in completion order
+        self._output = []    # (key, printed text) of pooled merges, in completion order
+        self._lanes = {}     # key -> deque of (item, requeues)
+        self._active = set()
+        self._idle = threading.Condition()
+        self._pool = ThreadPoolExecutor(max_workers=workers) if workers > 1 else None
+
+    def submit(self, key, item):
+        with self._idle:
+            self._lanes.setdefault(key, deque()).append((item, 0))
+            if key in self._active:
+                return
+            self._active.add(key)
+        if self._pool is None:
+            self._drain(key)
+        else:
+            self._pool.submit(self._drain, key)
+
+    def _next(self, key):
+        with self._idle:
+            lane = self._lanes[key]
+            if lane:
+                return lane.popleft()
+            self._active.discard(key)
+            self._idle.notify_all()
+            return None
+
+    def _run(self, item, requeues):
+        try:
+            if requeues and not self.recheck(item):
+                return UNMERGEABLE
+            return self.merge(item)
+        except Exception as err:
+            print(f"{RED}Unexpected error while merging: {err}{RESET}")
+            return FAILED
+
+    def _drain(self, key):
+        while True:
+            entry = self._next(key)
+            if entry is None:
+                return
+            item, requeues = entry
+            if self._pool is None:
+                outcome = self._run(item, requeues)
+            else:
+                with captured_output() as buffer:
+                    outcome = self._run(item, requeues)
+            with self._idle:
+                if self._pool is not None:
+                    self._output.append((key, buffer.getvalue()))
+                if outcome == UNMERGEABLE and requeues < self.max_requeues:
+                    # Retry after the rest of the lane, once GitHub has caught up with its merges
+                    self._lanes[key].append((item, requeues + 1))
+                else:
+                    self.results.append((key, item, outcome))
+
+    def wait(self):
+        """Block until every lane is drained and return the results."""
+        with self._idle:
+            self._idle.wait_for(lambda: not self._active)
+            return list(self.results)
+
+    def take_output(self, keys):
+        """Wait for the ``keys`` lanes to drain, then return (and forget) what their merges printed."""
+        keys = set(keys)
+        with self._idle:
+            self._idle.wait_for(lambda: not self._active & keys)
+            taken = [text for key, text in self._output if key in keys]
+            self._output = [(key, text) for key, text in self._output if key not in keys]
+        return ''.join(taken)
+
+    def shutdown(self):
+        self.wait()
+        with self._idle:
+            output, self._output = self._output, []
+        sys.stdout.write(''.join(text for _, text in output))
+        if self._pool is not None:
+            self._pool.shutdown()
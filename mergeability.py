@@ -0,0 +1,69 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from github_api import repo_path
+from http_client import get_client
+
+RED = '\033[91m'
+RESET = '\033[0m'
+
+# GitHub usually computes mergeability within a few seconds; give up after this
+DEFAULT_DEADLINE_SECONDS = 60
+
+# Backoff between polling rounds: 1s, 2s, 4s, ... capped at MAX_POLL_DELAY
+INITIAL_POLL_DELAY = 1.0
+MAX_POLL_DELAY = 8.0
+
+# PRs fetched concurrently per round
+POLL_WORKERS = 8
+
+
+def _fetch_mergeable(org, repo, pr_number, client):
+    url = f'{client.github_api_url}/repos/{repo_path(org, repo)}/pulls/{pr_number}'
+    try:
+        response = client.get(url)
+        response.raise_for_status()
+    except requests.exceptions.RequestException as err:
+        print(f"{RED}Could not fetch mergeability of PR #{pr_number} in {repo}: {err}{RESET}")
+        return None
+    pr = response.json()
+    # Closed and merged PRs keep mergeable: null for good, and there is nothing to merge
+    if pr.get('state') != 'open' or pr.get('merged'):
+        return False
+    return pr.get('mergeable')
+
+
+def poll_mergeable(org, repo, pr_numbers, client=None, deadline=DEFAULT_DEADLINE_SECONDS,
+                   workers=POLL_WORKERS):
+    """Resolve GitHub's ``mergeable`` flag for several PRs at once.
+
+    GitHub answers ``null`` while it computes mergeability in the background,
+    and the first GET of a PR is what starts that computation. All PRs are
+    therefore fetched in one concurrent round, then only the still-unknown
+    ones are polled again with exponential backoff until they resolve or
+    ``deadline`` seconds have passed.
+
+    Returns ``{pr_number: True | False | None}``; None means still unknown.
+    PRs that are no longer open count as not mergeable.
+    """
+    client = client or get_client()
+    pending = list(dict.fromkeys(pr_numbers))
+    results = dict.fromkeys(pending)
+    give_up_at = time.monotonic() + deadline
+    delay = INITIAL_POLL_DELAY
+
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(pending) or 1))) as executor:
+        while pending:
+            states = executor.map(lambda number: _fetch_mergeable(org, repo, number, client), pending)
+            for number, mergeable in zip(list(pending), states):
+                results[number] = mergeable
+            pending = [number for number in pending if results[number] is None]
+
+            remaining = give_up_at - time.monotonic()
+            if not pending or remaining <= 0:
+                break
+            time.sleep(min(delay, remaining))
+            delay = min(delay * 2, MAX_POLL_DELAY)
+    return results
@@ -0,0 +1,208 @@
+import json
+import os
+import re
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+
+from http_cache import format_bytes
+
+# Where the per-run summary is written; API_METRICS_PATH overrides it (empty disables it)
+DEFAULT_SUMMARY_PATH = os.path.join('.cache', 'api_metrics.json')
+
+# Upper bounds (seconds) of the latency histogram buckets; +Inf is implied
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Request path -> endpoint class, first match wins. Matching the end of the
+# path also covers GitHub Enterprise's /api/v3 prefix.
+ENDPOINT_CLASSES = [
+    (re.compile(r'/repos/[^/]+/[^/]+/pulls/\d+/merge$'), 'merge'),
+    (re.compile(r'/repos/[^/]+/[^/]+/pulls/\d+$'), 'pr_detail'),
+    (re.compile(r'/repos/[^/]+/[^/]+/pulls$'), 'list_prs'),
+    (re.compile(r'/orgs/[^/]+/members/[^/]+$'), 'membership'),
+    (re.compile(r'/orgs/[^/]+/members$'), 'member_list'),
+    (re.compile(r'/graphql$'), 'graphql'),
+    (re.compile(r'/search/issues$'), 'github_search'),
+    (re.compile(r'/rest/api/2/search$'), 'jira_search'),
+    (re.compile(r'/rest/api/2/issue/[^/]+/comment$'), 'jira_comment'),
+    (re.compile(r'/rest/api/2/issue/[^/]+/remotelink$'), 'jira_remote_links'),
+    (re.compile(r'/rest/api/2/issue/[^/]+$'), 'jira_issue'),
+]
+
+
+def endpoint_class(url):
+    path = urlsplit(url).path.rstrip('/')
+    return next((name for pattern, name in ENDPOINT_CLASSES if pattern.search(path)), 'other')
+
+
+class EndpointStats:
+    """Counters and a latency histogram for one endpoint class."""
+
+    __slots__ = ('requests', 'sends', 'errors', 'bytes_in', 'bytes_out', 'statuses',
+                 'buckets', 'latency_sum', 'latency_max')
+
+    def __init__(self):
+        self.requests = 0       # Calls made by the scripts
+        self.sends = 0          # Requests on the wire, including retries
+        self.errors = 0         # Sends that got no response at all
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.statuses = {}
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.latency_sum = 0.0
+        self.latency_max = 0.0
+
+    @property
+    def retries(self):
+        return max(0, self.sends - self.requests)
+
+    def percentile(self, fraction):
+        """Upper bound of the bucket holding the ``fraction`` quantile (None past the last bound)."""
+        target = fraction * self.sends
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS, self.buckets):
+            seen += count
+            if seen >= target:
+                return bound
+        return None
+
+    def as_dict(self):
+        cumulative, seen = {}, 0
+        for bound, count in zip((*LATENCY_BUCKETS, '+Inf'), self.buckets):
+            seen += count
+            cumulative[str(bound)] = seen
+        return {
+            'requests': self.requests,
+            'retries': self.retries,
+            'errors': self.errors,
+            'bytes_in': self.bytes_in,
+            'bytes_out': self.bytes_out,
+            'statuses': dict(sorted(self.statuses.items())),
+            'latency': {
+                'count': self.sends,
+                'sum': round(self.latency_sum, 6),
+                'max': round(self.latency_max, 6),
+                'p50': self.percentile(0.5),
+                'p95': self.percentile(0.95),
+                'buckets': cumulative,
+            },
+        }
+
+
+class ApiMetrics:
+    """Per-endpoint-class metrics of every call an ApiClient makes.
+
+    ``count_request`` is called once per call a script makes and
+    ``observe`` once per request actually sent, so re-sends by the retry
+    engine, the rate limiter or a vanished cache entry show up as retries.
+    Latency is the time on the wire, without pacing waits.
+    """
+
+    def __init__(self, script=None):
+        self.script = script or os.path.basename(sys.argv[0] or 'python')
+        self.started = time.time()
+        self.endpoints = {}
+        self._lock = threading.Lock()
+
+    def _stats(self, url):
+        name = endpoint_class(url)
+        stats = self.endpoints.get(name)
+        if stats is None:
+            stats = self.endpoints[name] = EndpointStats()
+        return stats
+
+    def count_request(self, method, url):
+        with self._lock:
+            self._stats(url).requests += 1
+
+    def observe(self, method, url, response, seconds, sent_bytes=0):
+        """Record one send; ``response`` is None when it raised instead."""
+        bucket = next((index for index, bound in enumerate(LATENCY_BUCKETS) if seconds <= bound), len(LATENCY_BUCKETS))
+        with self._lock:
+            stats = self._stats(url)
+            stats.sends += 1
+            stats.bytes_out += sent_bytes
+            stats.buckets[bucket] += 1
+            stats.latency_sum += seconds
+            stats.latency_max = max(stats.latency_max, seconds)
+            if response is None:
+                stats.errors += 1
+                status = 'error'
+            else:
+                stats.bytes_in += len(response.content or b'')
+                status = str(response.status_code)
+            stats.statuses[status] = stats.statuses.get(status, 0) + 1
+
+    def summary(self):
+        with self._lock:
+            endpoints = {name: stats.as_dict() for name, stats in sorted(self.endpoints.items())}
+        return {
+            'script': self.script,
+            'started_at': datetime.fromtimestamp(self.started, timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+            'seconds': round(time.time() - self.started, 3),
+            'requests': sum(endpoint['requests'] for endpoint in endpoints.values()),
+            'endpoints': endpoints,
+        }
+
+    def prometheus(self):
+        """Render the metrics in the Prometheus text exposition format."""
+        summary = self.summary()
+        script = summary['script']
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f'# HELP automerge_api_{name} {help_text}')
+            lines.append(f'# TYPE automerge_api_{name} {kind}')
+            for suffix, labels, value in samples:
+                rendered = ','.join(f'{key}="{label}"' for key, label in {'script': script, **labels}.items())
+                lines.append(f'automerge_api_{name}{suffix}{{{rendered}}} {value}')
+
+        endpoints = summary['endpoints'].items()
+        metric('requests_total', 'counter', 'Calls made, per endpoint class.',
+               [('', {'endpoint': name}, data['requests']) for name, data in endpoints])
+        metric('retries_total', 'counter', 'Extra sends caused by retries and re-sends.',
+               [('', {'endpoint': name}, data['retries']) for name, data in endpoints])
+        metric('responses_total', 'counter', 'Sends by response status (error: no response).',
+               [('', {'endpoint': name, 'status': status}, count)
+                for name, data in endpoints for status, count in data['statuses'].items()])
+        metric('response_bytes_total', 'counter', 'Response body bytes received.',
+               [('', {'endpoint': name}, data['bytes_in']) for name, data in endpoints])
+        metric('request_bytes_total', 'counter', 'Request body bytes sent.',
+               [('', {'endpoint': name}, data['bytes_out']) for name, data in endpoints])
+        samples = []
+        for name, data in endpoints:
+            latency = data['latency']
+            samples.extend(('_bucket', {'endpoint': name, 'le': bound}, count) for bound, count in latency['buckets'].items())
+            samples.append(('_sum', {'endpoint': name}, latency['sum']))
+            samples.append(('_count', {'endpoint': name}, latency['count']))
+        metric('latency_seconds', 'histogram', 'Time on the wire per send.', samples)
+        metric('run_seconds', 'gauge', 'Duration of the run so far.', [('', {}, summary['seconds'])])
+        return '\n'.join(lines) + '\n'
+
+    def write(self, summary_path=DEFAULT_SUMMARY_PATH, prometheus_path=None):
+        """Write the JSON summary and, if asked, a Prometheus textfile; both atomically."""
+        for path, render in ((summary_path, lambda: json.dumps(self.summary(), indent=2) + '\n'),
+                             (prometheus_path, self.prometheus)):
+            if not path:
+                continue
+            if os.path.dirname(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f'{path}.tmp'
+            with open(tmp_path, 'w') as file:
+                file.write(render())
+            os.replace(tmp_path, path)
+
+    def print_stats(self):
+        with self._lock:
+            endpoints = sorted(self.endpoints.items())
+            if not endpoints:
+                return
+            print("API calls per endpoint:")
+            for name, stats in endpoints:
+                average = stats.latency_sum / stats.sends if stats.sends else 0.0
+                statuses = ', '.join(f'{status}: {count}' for status, count in sorted(stats.statuses.items()))
+                print(f"  {name:18} {stats.requests:5} call(s), {stats.retries} retried, "
+                      f"{format_bytes(stats.bytes_in)} in, avg {average * 1000:.0f} ms, "
+                      f"max {stats.latency_max * 1000:.0f} ms ({statuses})")
@@ -0,0 +1,151 @@
+import json
+import os
+import shutil
+import subprocess
+import threading
+import time
+
+# Where mirrors and worktrees live, and how much disk they may use in total
+DEFAULT_CACHE_DIR = os.path.join('.cache', 'mirrors')
+DEFAULT_MAX_BYTES = 10 * 1024 ** 3
+
+# Only branches are mirrored; GitHub's refs/pull/* would add thousands of refs
+FETCH_REFSPEC = '+refs/heads/*:refs/heads/*'
+
+
+def _git(*args, cwd=None):
+    subprocess.run(['git', *args], cwd=cwd, check=True)
+
+
+def _dir_size(path):
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for filename in filenames:
+            try:
+                total += os.lstat(os.path.join(dirpath, filename)).st_size
+            except OSError:
+                pass
+    return total
+
+
+class MirrorCache:
+    """Persistent bare, blobless mirrors with per-branch worktrees.
+
+    Each repository is cloned once as a bare ``--filter=blob:none`` mirror and
+    afterwards only updated with an incremental ``git fetch``. Branch
+    checkouts are detached ``git worktree``s of that mirror, so a repeated
+    run costs one fetch per repo instead of one full clone. When the cache
+    grows beyond ``max_bytes`` the least recently used repositories (mirror
+    and worktrees) are removed, except the ones this process has checked
+    out, whose worktrees other threads may still be using.
+    """
+
+    def __init__(self, root=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.root = os.path.abspath(root)
+        self.max_bytes = max_bytes
+        self.index_path = os.path.join(self.root, 'index.json')
+        self._lock = threading.Lock()
+        self._repo_locks = {}
+        self._in_use = set()   # Repos checked out by this process; never evicted by it
+
+    def _repo_lock(self, key):
+        with self._lock:
+            return self._repo_locks.setdefault(key, threading.Lock())
+
+    def _mirror_path(self, owner, name):
+        return os.path.join(self.root, 'repos', owner, f'{name}.git')
+
+    def _worktrees_path(self, owner, name):
+        return os.path.join(self.root, 'worktrees', owner, name)
+
+    def _read_index(self):
+        try:
+            with open(self.index_path, 'r') as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_index(self, index):
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = f'{self.index_path}.tmp'
+        with open(tmp_path, 'w') as file:
+            json.dump(index, file, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.index_path)
+
+    def _touch(self, key):
+        with self._lock:
+            index = self._read_index()
+            index[key] = time.time()
+            self._write_index(index)
+
+    def update_mirror(self, owner, name, url=None):
+        """Create the mirror on first use, otherwise fetch what changed. Return its path."""
+        url = url or f'https://github.com/{owner}/{name}.git'
+        path = self._mirror_path(owner, name)
+        with self._repo_lock(f'{owner}/{name}'):
+            if os.path.isdir(path):
+                _git('fetch', '--prune', 'origin', cwd=path)
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                _git('clone', '--bare', '--filter=blob:none', url, path)
+                _git('config', 'remote.origin.fetch', FETCH_REFSPEC, cwd=path)
+        self._touch(f'{owner}/{name}')
+        return path
+
+    def checkout(self, owner, name, branch, url=None):
+        """Materialize ``branch`` as a worktree of the mirror and return its path."""
+        with self._lock:
+            self._in_use.add(f'{owner}/{name}')
+        mirror = self.update_mirror(owner, name, url)
+        worktree = os.path.join(self._worktrees_path(owner, name), branch.replace('/', '__'))
+        with self._repo_lock(f'{owner}/{name}'):
+            _git('worktree', 'prune', cwd=mirror)
+            if os.path.isdir(worktree):
+                _git('checkout', '--detach', '--force', f'refs/heads/{branch}', cwd=worktree)
+            else:
+                os.makedirs(os.path.dirname(worktree), exist_ok=True)
+                _git('worktree', 'add', '--detach', '--force', worktree, f'refs/heads/{branch}', cwd=mirror)
+        self.evict()
+        return worktree
+
+    def evict(self, keep=()):
+        """Drop least recently used repositories until the cache fits in max_bytes.
+
+        Repositories in ``keep`` and every repository checked out by this
+        process are left alone.
+        """
+        with self._lock:
+            keep = set(keep) | self._in_use
+            index = self._read_index()
+            sizes = {}
+            for key in index:
+                owner, name = key.split('/', 1)
+                sizes[key] = _dir_size(self._mirror_path(owner, name)) + _dir_size(self._worktrees_path(owner, name))
+            total = sum(sizes.values())
+            for key in sorted(index, key=index.get):
+                if total <= self.max_bytes:
+                    break
+                if key in keep:
+                    continue
+                owner, name = key.split('/', 1)
+                shutil.rmtree(self._worktrees_path(owner, name), ignore_errors=True)
+                shutil.rmtree(self._mirror_path(owner, name), ignore_errors=True)
+                total -= sizes[key]
+                del index[key]
+            self._write_index(index)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_mirror_cache():
+    """Return the shared MirrorCache, configured from MIRROR_CACHE_DIR / MIRROR_CACHE_MAX_BYTES."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = MirrorCache(
+                root=os.getenv('MIRROR_CACHE_DIR', DEFAULT_CACHE_DIR),
+                max_bytes=int(os.getenv('MIRROR_CACHE_MAX_BYTES', DEFAULT_MAX_BYTES)),
+            )
+        return _cache
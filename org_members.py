@@ -0,0 +1,124 @@
+import json
+import os
+import threading
+import time
+
+import requests
+
+from github_api import PER_PAGE, iter_pages
+from http_client import get_client
+
+RED = '\033[91m'
+RESET = '\033[0m'
+
+# Where membership snapshots are kept and how long one is trusted
+DEFAULT_SNAPSHOT_DIR = os.path.join('.cache', 'org_members')
+DEFAULT_TTL_SECONDS = 60 * 60
+
+
+class OrgMembership:
+    """Set of an organization's member logins, reloaded once it is ``ttl`` seconds old.
+
+    The full paginated ``/orgs/{org}/members`` list is loaded into a set (or
+    read from a fresh on-disk snapshot), so checking a PR author is an O(1)
+    lookup. Logins missing from the set fall back to the per-user endpoint
+    once; the answer is remembered for ``ttl`` seconds too, so a
+    long-running process notices members joining or leaving.
+
+    With ``load_members=False`` the full list is never fetched; only a fresh
+    snapshot is used. Single-PR runs use this so they cost at most one call.
+    """
+
+    def __init__(self, org, client=None, snapshot_path=None, ttl=DEFAULT_TTL_SECONDS, load_members=True):
+        self.org = org
+        self.client = client or get_client()
+        self.snapshot_path = snapshot_path
+        self.ttl = ttl
+        self.load_members = load_members
+        self._members = None
+        self._loaded_at = 0.0
+        self._checked = {}   # login -> (is_member, checked_at)
+        self._lock = threading.Lock()
+
+    def _read_snapshot(self):
+        if not self.snapshot_path:
+            return None
+        try:
+            with open(self.snapshot_path, 'r') as file:
+                snapshot = json.load(file)
+        except (OSError, ValueError):
+            return None
+        if time.time() - snapshot.get('fetched_at', 0) >= self.ttl:
+            return None
+        return set(snapshot.get('members', []))
+
+    def _write_snapshot(self, members):
+        if not self.snapshot_path:
+            return
+        os.makedirs(os.path.dirname(self.snapshot_path) or '.', exist_ok=True)
+        tmp_path = f'{self.snapshot_path}.tmp'
+        with open(tmp_path, 'w') as file:
+            json.dump({'org': self.org, 'fetched_at': time.time(), 'members': sorted(members)}, file)
+        os.replace(tmp_path, self.snapshot_path)
+
+    def _fetch_members(self):
+        url = f'{self.client.github_api_url}/orgs/{self.org}/members'
+        members = set()
+        for page in iter_pages(url, {'per_page': PER_PAGE}, self.client):
+            members.update(member['login'].lower() for member in page)
+        return members
+
+    def _ensure_loaded(self):
+        if self._members is not None and time.monotonic() - self._loaded_at < self.ttl:
+            return
+        self._checked.clear()
+        members = self._read_snapshot()
+        if members is None and self.load_members:
+            try:
+                members = self._fetch_members()
+                self._write_snapshot(members)
+            except (requests.exceptions.RequestException, OSError) as err:
+                print(f"{RED}Could not load members of '{self.org}': {err}. Checking authors one by one.{RESET}")
+        self._members = members or set()
+        self._loaded_at = time.monotonic()
+
+    def _check_user(self, username):
+        url = f'{self.client.github_api_url}/orgs/{self.org}/members/{username}'
+        response = self.client.get(url)
+        return response.status_code == 204  # 204 No Content means the user is a member
+
+    def is_member(self, username):
+        login = username.lower()
+        with self._lock:
+            self._ensure_loaded()
+            if login in self._members:
+                return True
+            checked = self._checked.get(login)
+            if checked and time.monotonic() - checked[1] < self.ttl:
+                return checked[0]
+        is_member = self._check_user(username)
+        with self._lock:
+            self._checked[login] = (is_member, time.monotonic())
+            if is_member:
+                self._members.add(login)
+        return is_member
+
+
+_memberships = {}
+_memberships_lock = threading.Lock()
+
+
+def get_org_membership(org, load_members=True):
+    """Return the shared OrgMembership for ``org``, snapshotting under ORG_MEMBERS_CACHE_DIR."""
+    with _memberships_lock:
+        membership = _memberships.get(org)
+        if membership is None:
+            snapshot_dir = os.getenv('ORG_MEMBERS_CACHE_DIR', DEFAULT_SNAPSHOT_DIR)
+            membership = OrgMembership(
+                org,
+                snapshot_path=os.path.join(snapshot_dir, f'{org}.json'),
+                ttl=float(os.getenv('ORG_MEMBERS_TTL', DEFAULT_TTL_SECONDS)),
+                load_members=load_members,
+            )
+            _memberships[org] = membership
+        return membership
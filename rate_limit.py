@@ -0,0 +1,226 @@
+import threading
+import time
+from datetime import datetime
+from urllib.parse import urlsplit
+
+import requests
+
+# Steady request rate (per second) and burst size per host. GitHub counts
+# mutating calls against a much lower secondary limit and asks for at least a
+# second between them, so writes go through their own, stricter bucket.
+READ_RATE = 10.0
+READ_BURST = 20
+WRITE_RATE = 1.0
+WRITE_BURST = 1
+
+# Once less than this fraction of the quota is left, spread the rest of it
+# evenly over the time remaining until the window resets.
+SLOWDOWN_FRACTION = 0.1
+
+# Used when a 403/429 carries neither Retry-After nor a reset time
+DEFAULT_BACKOFF_SECONDS = 60
+
+# Longest a request waits for its turn when the caller sets no deadline
+MAX_WAIT_SECONDS = 60
+
+MUTATING_METHODS = {'POST', 'PUT', 'PATCH', 'DELETE'}
+
+
+def _resource(url):
+    """Name the GitHub quota a URL is counted against (see X-RateLimit-Resource)."""
+    path = urlsplit(url).path
+    if path.endswith('/graphql'):
+        return 'graphql'
+    if '/search/' in path:
+        return 'search'
+    return 'core'
+
+
+class RateLimitWaitError(requests.exceptions.RequestException):
+    """Raised instead of waiting past the caller's deadline for a rate-limited host."""
+
+
+def _is_mutating(method, url):
+    # GraphQL queries are POSTs but only read data
+    return method.upper() in MUTATING_METHODS and _resource(url) != 'graphql'
+
+
+class TokenBucket:
+    """Classic token bucket; ``reserve`` returns how long the caller must wait."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # Going negative queues callers behind each other instead of letting them race
+            self._tokens -= 1
+            return 0 if self._tokens >= 0 else -self._tokens / self.rate
+
+
+class Quota:
+    """Last known X-RateLimit-* state of one host/resource pair."""
+
+    def __init__(self):
+        self.limit = None
+        self.remaining = None
+        self.reset = None
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def update(self, headers):
+        try:
+            limit = int(headers['X-RateLimit-Limit'])
+            remaining = int(headers['X-RateLimit-Remaining'])
+            reset = float(headers['X-RateLimit-Reset'])
+        except (KeyError, ValueError):
+            return
+        with self._lock:
+            self.limit, self.remaining, self.reset = limit, remaining, reset
+
+    def delay(self, now):
+        """Seconds to wait before the next call so the remaining quota lasts until reset."""
+        with self._lock:
+            return self._delay(now)
+
+    def _delay(self, now):
+        if self.remaining is None or self.reset is None or not self.limit:
+            return 0
+        until_reset = max(0.0, self.reset - now)
+        if self.remaining <= 0:
+            return until_reset
+        if self.remaining < self.limit * SLOWDOWN_FRACTION:
+            return until_reset / self.remaining
+        return 0
+
+    def reserve(self, now, max_wait=None):
+        """Claim the next send slot and return how long to wait for it.
+
+        While the quota runs low, slots are handed out ``delay`` seconds
+        apart, so concurrent callers take turns instead of all sending on
+        the same stale ``remaining``. If the wait would exceed ``max_wait``
+        nothing is claimed and the wait is returned as is.
+        """
+        with self._lock:
+            spacing = self._delay(now)
+            if not spacing:
+                return 0
+            if self.remaining <= 0:
+                return spacing  # Nothing left before the reset; the first reply after it refreshes the quota
+            slot = max(now, self._next_slot)
+            if max_wait is not None and slot - now > max_wait:
+                return slot - now
+            self._next_slot = slot + spacing
+            return slot - now
+
+
+class RateLimiter:
+    """Per-host request scheduler shared by every thread of a run.
+
+    Each host gets a read and a write token bucket. Responses feed back
+    ``X-RateLimit-Remaining`` / ``X-RateLimit-Reset``, so calls slow down as
+    the quota runs low, and ``Retry-After`` (or an exhausted quota) on a
+    403/429 blocks the host until it may be called again. Low-quota pacing
+    is reserved like the buckets, so concurrent callers take turns. A call
+    that would have to wait past its deadline raises RateLimitWaitError
+    instead of sleeping.
+    """
+
+    def __init__(self, read_rate=READ_RATE, read_burst=READ_BURST,
+                 write_rate=WRITE_RATE, write_burst=WRITE_BURST):
+        self.read_rate = read_rate
+        self.read_burst = read_burst
+        self.write_rate = write_rate
+        self.write_burst = write_burst
+        self.throttled = 0
+        self.throttled_seconds = 0.0
+        self._buckets = {}
+        self._quotas = {}
+        self._blocked_until = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, host, mutating):
+        key = (host, mutating)
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                if mutating:
+                    bucket = TokenBucket(self.write_rate, self.write_burst)
+                else:
+                    bucket = TokenBucket(self.read_rate, self.read_burst)
+                self._buckets[key] = bucket
+            return bucket
+
+    def _quota(self, host, resource):
+        with self._lock:
+            return self._quotas.setdefault((host, resource), Quota())
+
+    def wait(self, method, url, deadline=None):
+        """Block until a request to ``url`` may be sent.
+
+        ``deadline`` is a ``time.monotonic()`` value the call must be sent
+        by (MAX_WAIT_SECONDS from now if unset); waiting longer raises
+        RateLimitWaitError.
+        """
+        host = urlsplit(url).netloc.lower()
+        now = time.time()
+        max_wait = MAX_WAIT_SECONDS if deadline is None else max(0.0, deadline - time.monotonic())
+        with self._lock:
+            delay = max(0.0, self._blocked_until.get(host, 0) - now)
+        if delay <= max_wait:
+            delay = max(delay, self._quota(host, _resource(url)).reserve(now, max_wait))
+        if delay > max_wait:
+            raise RateLimitWaitError(f'{host} is rate limited for another {delay:.0f}s; not waiting that long')
+        if _is_mutating(method, url):
+            # Writes also take a read token so they count towards the overall pace
+            delay = max(delay, self._bucket(host, True).reserve())
+        delay = max(delay, self._bucket(host, False).reserve())
+        if delay > 0:
+            with self._lock:
+                self.throttled += 1
+                self.throttled_seconds += delay
+            time.sleep(delay)
+
+    def update(self, url, response):
+        """Record the quota headers of ``response``. Return True if it was rate limited."""
+        host = urlsplit(url).netloc.lower()
+        headers = response.headers
+        resource = headers.get('X-RateLimit-Resource') or _resource(url)
+        quota = self._quota(host, resource)
+        quota.update(headers)
+
+        if response.status_code not in (403, 429):
+            return False
+        retry_after = headers.get('Retry-After')
+        if retry_after is not None:
+            try:
+                blocked_until = time.time() + float(retry_after)
+            except ValueError:
+                return False
+        elif quota.remaining == 0 and quota.reset:
+            blocked_until = quota.reset
+        elif response.status_code == 429:
+            blocked_until = time.time() + DEFAULT_BACKOFF_SECONDS
+        else:
+            return False  # A plain 403 is a permission problem, not a rate limit
+        with self._lock:
+            self._blocked_until[host] = max(self._blocked_until.get(host, 0), blocked_until)
+        return True
+
+    def quotas(self):
+        with self._lock:
+            return {key: quota for key, quota in self._quotas.items() if quota.limit is not None}
+
+    def print_stats(self):
+        for (host, resource), quota in sorted(self.quotas().items()):
+            reset = datetime.fromtimestamp(quota.reset).strftime('%H:%M:%S') if quota.reset else 'unknown'
+            print(f"Rate limit {host} ({resource}): {quota.remaining}/{quota.limit} remaining, resets at {reset}.")
+        if self.throttled:
+            print(f"Rate limit: throttled {self.throttled} request(s) for {self.throttled_seconds:.1f}s in total.")
@@ -1,12 +1,14 @@
 import os
 import argparse
-import json
 import requests
-import re
-import subprocess
 import sys
-import time
-import yaml
+
+from config import load_config, load_releases
+from github_api import repo_path
+from http_client import get_client
+from jira_ids import configure_project_keys, extract_jira_id
+from merge_executor import FAILED, MERGED, STALE, UNMERGEABLE
+from mergeability import poll_mergeable
 
 GREEN = '\033[92m'
 RED = '\033[91m'
@@ -16,41 +18,20 @@ RESET = '\033[0m'
 JIRA_API_TOKEN = os.getenv('JIRA_API_TOKEN')
 GITHUB_TOKEN = os.getenv('GITHUB_TOKEN')
 
+# Pooled keep-alive client shared by every GitHub and JIRA call
+client = get_client()
+
 # Hard-coded JIRA server URL
 JIRA_SERVER = 'https://issues.redhat.com'
 
-# GitHub API base URL
-GITHUB_API_URL = 'https://api.github.com'
+# GitHub API base URL (GITHUB_API_URL in the environment overrides it)
+GITHUB_API_URL = client.github_api_url
 
 def parse_arguments():
     parser = argparse.ArgumentParser(description="Process a specific PR based on PR ID.")
     parser.add_argument('--pr-id', required=True, type=int, help="The ID of the PR to process.")
     return parser.parse_args()
 
-def load_releases():
-    try:
-        with open('releases.yaml', 'r') as file:
-            release_config = yaml.safe_load(file)
-        return release_config.get('releases', [])
-    except FileNotFoundError:
-        print(f"{RED}Error: 'releases.yaml' file not found.{RESET}")
-        raise
-    except yaml.YAMLError:
-        print(f"{RED}Error: 'releases.yaml' file is not valid YAML.{RESET}")
-        raise
-
-def load_config():
-    try:
-        with open('repos.json', 'r') as file:
-            config = json.load(file)
-        return config
-    except FileNotFoundError:
-        print(f"{RED}Error: 'repos.json' file not found in the GitHub Actions repository.{RESET}")
-        raise
-    except json.JSONDecodeError:
-        print(f"{RED}Error: 'repos.json' file is not valid JSON.{RESET}")
-        raise
-
 def validate_branch(branch, allowed_releases):
     if branch not in allowed_releases:
         print(f"{RED}Branch '{branch}' is not in the list of allowed releases. Exiting.{RESET}")
@@ -59,49 +40,48 @@ def validate_branch(branch, allowed_releases):
         print(f"{GREEN}Branch '{branch}' is valid and allowed to proceed.{RESET}")
 
 def get_jira_id_from_pr(pr):
-    title = pr.get('title', '')
-    body = pr.get('body', '')
+    # First key in the title, else in the (capped) body; only the configured JIRA project matches
+    return extract_jira_id(pr)
 
-    jira_id_pattern = r'[A-Z]+-\d+'
-    jira_id_match = re.search(jira_id_pattern, title) or re.search(jira_id_pattern, body)
-    return jira_id_match.group(0) if jira_id_match else None
-
-def get_jira_issue_details(jira_id, max_retries=3):
-    headers = {'Authorization': f'Bearer {JIRA_API_TOKEN}'}
+def get_jira_issue_details(jira_id):
     url = f'{JIRA_SERVER}/rest/api/2/issue/{jira_id}'
 
-    for attempt in range(max_retries):
-        try:
-            response = requests.get(url, headers=headers)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.HTTPError as err:
-            if response.status_code in {403, 404}:
-                print(f"{RED}Error {response.status_code}: {jira_id} - {err}{RESET}")
-                return None
-            print(f"{RED}HTTP error: {err}. Retrying ({attempt + 1}/{max_retries})...{RESET}")
-            time.sleep(2 ** attempt)
+    # Transient failures are retried by the client's retry engine
+    try:
+        response = client.get(url)
+        response.raise_for_status()
+        return response.json()
+    except requests.exceptions.HTTPError as err:
+        print(f"{RED}Error {response.status_code}: {jira_id} - {err}{RESET}")
+    except requests.exceptions.RequestException as err:
+        print(f"{RED}Error: {jira_id} - {err}{RESET}")
     return None
 
 def check_pr_mergeable(org, repo, pr_number):
-    url = f'{GITHUB_API_URL}/repos/{org}/{repo}/pulls/{pr_number}'
-    headers = {'Authorization': f'token {GITHUB_TOKEN}'}
-    response = requests.get(url, headers=headers)
-    response.raise_for_status()
-    return response.json().get('mergeable', False)
-
-def merge_pr(org, repo, pr_number):
-    url = f'{GITHUB_API_URL}/repos/{org}/{repo}/pulls/{pr_number}/merge'
-    headers = {'Authorization': f'token {GITHUB_TOKEN}'}
+    # GitHub reports null while it is still computing mergeability; poll until it decides
+    return poll_mergeable(org, repo, [pr_number], client=client)[pr_number]
+
+def merge_pr(org, repo, pr):
+    """Merge ``pr`` at the head it was evaluated at; return one of the merge_executor outcomes."""
+    pr_number = pr['number']
+    url = f'{GITHUB_API_URL}/repos/{repo_path(org, repo)}/pulls/{pr_number}/merge'
     data = {
         'commit_title': f'Merge PR #{pr_number}',
         'commit_message': 'Auto-merged due to Blocker priority JIRA issue.'
     }
-    response = requests.put(url, headers=headers, json=data)
+    # Pinning the evaluated head makes GitHub refuse the merge if new commits were pushed since
+    head_sha = (pr.get('head') or {}).get('sha')
+    if head_sha:
+        data['sha'] = head_sha
+    response = client.put(url, json=data)
     if response.status_code == 200:
         print(f"{GREEN}PR #{pr_number} merged successfully.{RESET}")
-    else:
-        print(f"{RED}Failed to merge PR #{pr_number}. Response: {response.status_code} - {response.json()}{RESET}")
+        return MERGED
+    if response.status_code == 409:
+        print(f"{RED}PR #{pr_number} changed since it was evaluated. Leaving it for the next run.{RESET}")
+        return STALE
+    print(f"{RED}Failed to merge PR #{pr_number}. Response: {response.status_code} - {response.json()}{RESET}")
+    return UNMERGEABLE if response.status_code == 405 else FAILED
 
 def check_authors(org, pr):
     pr_author = pr['user']['login']
@@ -117,8 +97,11 @@ if __name__ == "__main__":
 
     # Load configuration from repos.json
     config = load_config()
-    org = config['org']
-    repo = config['repos'][0]['name']  
+    configure_project_keys(config.jira_project)
+    org = config.org
+    JIRA_SERVER = config.jira_server
+    client.set_jira_server(JIRA_SERVER)
+    repo = config.repos[0]
 
     branch_name = os.getenv('GITHUB_REF').split('/')[-1]
     allowed_releases = load_releases()
@@ -130,12 +113,13 @@ if __name__ == "__main__":
         jira_id = get_jira_id_from_pr(pr_details)
         if jira_id:
             jira_details = get_jira_issue_details(jira_id)
-            if jira_details and jira_details.get('fields', {}).get('priority', {}).get('name') == 'Blocker':
+            problem = config.issue_problem(jira_details) if jira_details else 'could not be fetched'
+            if not problem:
                 if check_pr_mergeable(org, repo, pr_id):
-                    merge_pr(org, repo, pr_id)
+                    merge_pr(org, repo, pr_details)
                 else:
                     print(f"{RED}PR #{pr_id} is not mergeable.{RESET}")
             else:
-                print(f"{RED}Skipping PR #{pr_id}: JIRA {jira_id} not a Blocker.{RESET}")
+                print(f"{RED}Skipping PR #{pr_id}: JIRA {jira_id} {problem}.{RESET}")
         else:
             print(f"{RED}No JIRA ID found in PR #{pr_id}. Skipping.{RESET}")
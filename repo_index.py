@@ -0,0 +1,53 @@
+from github_api import split_repo
+
+
+class RepoEntry:
+    """One repository from repos.json and the component it belongs to."""
+
+    def __init__(self, repo, owner, name, component):
+        self.repo = repo              # As written in repos.json ('name' or 'owner/name')
+        self.owner = owner
+        self.name = name
+        self.component = component    # The config.Component it is listed under
+
+    @property
+    def full_name(self):
+        return f'{self.owner}/{self.name}'
+
+
+class RepoIndex:
+    """Index of the repos.json repositories, built once per run.
+
+    ``lookup`` accepts a repo the way a workflow input or a PR URL spells it:
+    the repos.json form, ``owner/name`` or a bare name, in any case. Bare
+    names only resolve when a single owner has a repo by that name.
+    """
+
+    def __init__(self, config):
+        self.org = config.org
+        self.entries = []
+        self._by_key = {}
+        by_name = {}
+        for component in config.components:
+            for repo in component.repos:
+                owner, name = split_repo(self.org, repo)
+                entry = RepoEntry(repo, owner, name, component)
+                self.entries.append(entry)
+                self._by_key.setdefault(entry.full_name.lower(), entry)
+                by_name.setdefault(name.lower(), set()).add(entry.full_name.lower())
+        for name, full_names in by_name.items():
+            if len(full_names) == 1:
+                self._by_key.setdefault(name, self._by_key[next(iter(full_names))])
+
+    def lookup(self, repo):
+        """Return the RepoEntry for ``repo``, or None if it is not configured."""
+        return self._by_key.get(repo.strip().strip('/').lower())
+
+    def __contains__(self, repo):
+        return self.lookup(repo) is not None
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def __len__(self):
+        return len(self.entries)
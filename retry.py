@@ -0,0 +1,194 @@
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+
+# Attempts per request and the jittered exponential backoff between them
+MAX_ATTEMPTS = 3
+BASE_DELAY = 0.5
+MAX_DELAY = 8.0
+
+# A request and its retries give up after this long
+CALL_DEADLINE_SECONDS = 30.0
+
+# Seconds a whole run may spend waiting between retries; once spent, failing
+# requests are not retried any more (None means unlimited)
+RUN_BUDGET_SECONDS = 120.0
+
+# Responses worth another try. 429s are the rate limiter's business.
+RETRY_STATUSES = {500, 502, 503, 504}
+
+# Consecutive failures that open a host's circuit, and how long it stays open
+# before a single probe request is let through
+BREAKER_THRESHOLD = 5
+BREAKER_RESET_SECONDS = 30.0
+
+MUTATING_METHODS = {'POST', 'PUT', 'PATCH', 'DELETE'}
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Raised instead of calling a host whose circuit is open."""
+
+
+def backoff(attempt, base=BASE_DELAY, cap=MAX_DELAY):
+    """Full-jitter exponential backoff: uniform in [0, min(cap, base * 2**attempt)]."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+def _retry_after(response):
+    try:
+        return max(0.0, float(response.headers['Retry-After']))
+    except (KeyError, ValueError):
+        return None
+
+
+class CircuitBreaker:
+    """Per-host breaker: opens after ``threshold`` consecutive failures.
+
+    While open, calls fail immediately. After ``reset_seconds`` one probe is
+    let through; its success closes the circuit, its failure re-opens it.
+    """
+
+    def __init__(self, threshold=BREAKER_THRESHOLD, reset_seconds=BREAKER_RESET_SECONDS):
+        self.threshold = threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened = 0
+        self._open_until = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self._open_until is None:
+                return True
+            if time.monotonic() < self._open_until or self._probing:
+                return False
+            self._probing = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self._open_until = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._probing or self.failures >= self.threshold:
+                if self._open_until is None:
+                    self.opened += 1
+                self._open_until = time.monotonic() + self.reset_seconds
+                self._probing = False
+
+    def release(self):
+        """Give up a probe that ended without a verdict so the next call may probe."""
+        with self._lock:
+            self._probing = False
+
+
+class RetryEngine:
+    """Shared retry policy for every request the ApiClient sends.
+
+    Connection errors, timeouts and 5xx responses are retried with
+    jittered exponential backoff, waiting for ``Retry-After`` when the
+    server sends one. Each call has its own deadline (read timeouts are
+    trimmed to it) and all retries of a run draw from one waiting budget.
+    Mutating requests are only re-sent when the request never reached the
+    server, so merges and comments are not duplicated. A per-host circuit
+    breaker makes calls to a host that keeps failing fail fast.
+    """
+
+    def __init__(self, max_attempts=MAX_ATTEMPTS, call_deadline=CALL_DEADLINE_SECONDS,
+                 run_budget=RUN_BUDGET_SECONDS, breaker_threshold=BREAKER_THRESHOLD,
+                 breaker_reset=BREAKER_RESET_SECONDS):
+        self.max_attempts = max_attempts
+        self.call_deadline = call_deadline
+        self.run_budget = run_budget
+        self.breaker_threshold = breaker_threshold
+        self.breaker_reset = breaker_reset
+        self.retries = 0
+        self.waited = 0.0
+        self.rejected = 0
+        self._breakers = {}
+        self._lock = threading.Lock()
+
+    def breaker(self, host):
+        with self._lock:
+            breaker = self._breakers.get(host)
+            if breaker is None:
+                breaker = self._breakers[host] = CircuitBreaker(self.breaker_threshold, self.breaker_reset)
+            return breaker
+
+    def _reserve(self, delay):
+        """Take ``delay`` from the run budget; return False if it is spent."""
+        with self._lock:
+            if self.run_budget is not None and self.waited + delay > self.run_budget:
+                return False
+            self.retries += 1
+            self.waited += delay
+            return True
+
+    def call(self, method, url, send, timeout=None):
+        """Return ``send(timeout)``'s response, retrying it as the policy allows."""
+        host = urlsplit(url).netloc.lower()
+        breaker = self.breaker(host)
+        mutating = method.upper() in MUTATING_METHODS and not urlsplit(url).path.endswith('/graphql')
+        deadline = time.monotonic() + self.call_deadline
+        for attempt in range(self.max_attempts):
+            if not breaker.allow():
+                with self._lock:
+                    self.rejected += 1
+                raise CircuitOpenError(f'{host} is failing; not calling it for now')
+            remaining = deadline - time.monotonic()
+            response = error = None
+            try:
+                response = send(self._trim(timeout, remaining))
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as err:
+                breaker.record_failure()
+                error = err
+                # Only a failed connect is known not to have reached the server
+                retryable = not mutating or isinstance(err, requests.exceptions.ConnectTimeout)
+                delay = backoff(attempt)
+            except requests.exceptions.RequestException:
+                breaker.record_success()  # The host is reachable; the request itself is at fault
+                raise
+            except BaseException:
+                breaker.release()  # Not the host's fault, but a probe must not stay claimed forever
+                raise
+            else:
+                if response.status_code not in RETRY_STATUSES:
+                    breaker.record_success()
+                    return response
+                breaker.record_failure()
+                retry_after = _retry_after(response)
+                retryable = not mutating or (response.status_code == 503 and retry_after is not None)
+                delay = retry_after if retry_after is not None else backoff(attempt)
+
+            last = attempt == self.max_attempts - 1
+            if last or not retryable or delay >= deadline - time.monotonic() or not self._reserve(delay):
+                if error is not None:
+                    raise error
+                return response
+            time.sleep(delay)
+
+    @staticmethod
+    def _trim(timeout, remaining):
+        remaining = max(remaining, 0.1)
+        if timeout is None:
+            return remaining
+        if isinstance(timeout, tuple):
+            connect, read = timeout
+            return (min(connect, remaining), min(read, remaining))
+        return min(timeout, remaining)
+
+    def print_stats(self):
+        if self.retries:
+            print(f"Retries: {self.retries} request(s) retried after {self.waited:.1f}s of backoff in total.")
+        with self._lock:
+            opened = sorted(host for host, breaker in self._breakers.items() if breaker.opened)
+        if opened:
+            print(f"Circuit breaker opened for {', '.join(opened)}; {self.rejected} call(s) failed fast.")
@@ -0,0 +1,406 @@
+import hashlib
+import hmac
+import json
+import math
+import random
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import requests
+
+
+def _now():
+    return datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+# GitHub's own caps on page sizes
+MAX_PER_PAGE = 100
+MAX_JIRA_RESULTS = 100
+
+
+class StandInState:
+    """Everything the stand-in serves, plus a log of what was called.
+
+    The behaviour attributes make it act like a busy production server:
+    ``latency`` (plus up to ``jitter``) seconds per request, a share of
+    ``error_rate`` requests answered with a 503, a GitHub quota of
+    ``rate_limit`` requests per ``rate_limit_window`` seconds reported in
+    X-RateLimit-* headers (403 once spent), and page sizes capped at
+    ``max_per_page`` / ``max_jira_results``.
+    """
+
+    def __init__(self, seed=0):
+        self.latency = 0.0
+        self.jitter = 0.0
+        self.error_rate = 0.0
+        self.rate_limit = None
+        self.rate_limit_window = 3600
+        self.max_per_page = MAX_PER_PAGE
+        self.max_jira_results = MAX_JIRA_RESULTS
+        self.random = random.Random(seed)
+        self.quota = {}       # GitHub resource -> (window end, requests used)
+        self.repos = {}       # (owner, name) -> set of branch names
+        self.prs = {}         # (owner, name) -> {number: pr}
+        self.members = {}     # org -> set of logins
+        self.issues = {}      # key -> issue
+        self.remote_links = {}  # key -> [url]
+        self.merges = []      # (owner, name, number, request body)
+        self.comments = []    # (key, comment body)
+        self.requests = []    # (method, path)
+        self.lock = threading.Lock()
+
+    def add_repo(self, owner, name, branches=()):
+        with self.lock:
+            self.repos.setdefault((owner, name), set()).update(branches)
+
+    def add_pr(self, owner, name, number, title, body='', author='dev', base='rhoai-2.13',
+               mergeable=True, author_association='MEMBER', labels=()):
+        pr = {
+            'number': number,
+            'state': 'open',
+            'title': title,
+            'body': body,
+            'user': {'login': author},
+            'author_association': author_association,
+            'base': {'ref': base},
+            'head': {'sha': hashlib.sha1(f'{owner}/{name}#{number}'.encode()).hexdigest()},
+            'mergeable': mergeable,
+            'merged': False,
+            'updated_at': _now(),
+            'labels': [{'name': label} for label in labels],
+            'html_url': f'https://github.com/{owner}/{name}/pull/{number}',
+        }
+        with self.lock:
+            self.repos.setdefault((owner, name), set()).add(base)
+            self.prs.setdefault((owner, name), {})[number] = pr
+        return pr
+
+    def add_member(self, org, login):
+        with self.lock:
+            self.members.setdefault(org, set()).add(login)
+
+    def add_issue(self, key, priority='Major', status='New', labels=(), components=(), resolution=None):
+        issue = {
+            'key': key,
+            'fields': {
+                'project': {'key': key.rsplit('-', 1)[0]},
+                'priority': {'name': priority},
+                'status': {'name': status},
+                'resolution': {'name': resolution} if resolution else None,
+                'components': [{'name': component} for component in components],
+                'labels': list(labels),
+                'fixVersions': [],
+                'updated': datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.000+0000'),
+            },
+        }
+        with self.lock:
+            self.issues[key] = issue
+        return issue
+
+    def add_remote_link(self, key, url):
+        with self.lock:
+            self.remote_links.setdefault(key, []).append(url)
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    _rate_limit_headers = {}
+
+    @property
+    def state(self):
+        return self.server.state
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, payload=None, headers=None):
+        body = b'' if payload is None else json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in {**self._rate_limit_headers, **(headers or {})}.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _discard_body(self):
+        # An unread body would be taken for the next request on this keep-alive connection
+        self.rfile.read(int(self.headers.get('Content-Length') or 0))
+
+    def _read_json(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        return json.loads(self.rfile.read(length) or b'{}')
+
+    def _take_quota(self, path):
+        """Count a GitHub request against its quota; return the X-RateLimit-* headers."""
+        state = self.state
+        resource = 'graphql' if path == '/graphql' else 'search' if path.startswith('/search/') else 'core'
+        now = time.time()
+        with state.lock:
+            window_end, used = state.quota.get(resource, (0, 0))
+            if now >= window_end:
+                # GitHub resets on whole epoch seconds
+                window_end, used = math.ceil(now + state.rate_limit_window), 0
+            used += 1
+            state.quota[resource] = (window_end, used)
+        return {
+            'X-RateLimit-Limit': str(state.rate_limit),
+            'X-RateLimit-Remaining': str(max(0, state.rate_limit - used)),
+            'X-RateLimit-Reset': str(window_end),
+            'X-RateLimit-Used': str(min(used, state.rate_limit)),
+            'X-RateLimit-Resource': resource,
+        }, used > state.rate_limit
+
+    def _route(self, method):
+        parts = urlsplit(self.path)
+        query = {name: values[0] for name, values in parse_qs(parts.query).items()}
+        state = self.state
+        with state.lock:
+            state.requests.append((method, self.path))
+            delay = state.latency + (state.random.uniform(0, state.jitter) if state.jitter else 0)
+            failing = state.error_rate and state.random.random() < state.error_rate
+        self._rate_limit_headers = {}
+        if delay:
+            time.sleep(delay)
+        if state.rate_limit is not None and not parts.path.startswith('/rest/'):
+            self._rate_limit_headers, exhausted = self._take_quota(parts.path)
+            if exhausted:
+                self._discard_body()
+                return self._send(403, {'message': 'API rate limit exceeded'})
+        if failing:
+            self._discard_body()
+            return self._send(503, {'message': 'Service Unavailable'})
+        for pattern, handler_method, handler in self.ROUTES:
+            match = re.fullmatch(pattern, parts.path)
+            if match and handler_method == method:
+                return handler(self, query, *match.groups())
+        return self._send(404, {'message': 'Not Found'})
+
+    def do_GET(self):
+        self._route('GET')
+
+    def do_PUT(self):
+        self._route('PUT')
+
+    def do_POST(self):
+        self._route('POST')
+
+    # GitHub
+
+    def list_pulls(self, query, owner, name):
+        with self.state.lock:
+            prs = [pr for pr in self.state.prs.get((owner, name), {}).values()
+                   if pr['state'] == query.get('state', 'open')
+                   and ('base' not in query or pr['base']['ref'] == query['base'])]
+        key = 'updated_at' if query.get('sort') == 'updated' else 'number'
+        prs.sort(key=lambda pr: pr[key], reverse=query.get('direction', 'asc' if key == 'number' else 'desc') == 'desc')
+        per_page = min(int(query.get('per_page', 30)), self.state.max_per_page)
+        page = int(query.get('page', 1))
+        headers = {}
+        if page * per_page < len(prs):
+            next_query = '&'.join(f'{k}={v}' for k, v in {**query, 'page': page + 1}.items())
+            headers['Link'] = f'<{self.server.url}/repos/{owner}/{name}/pulls?{next_query}>; rel="next"'
+        self._send(200, prs[(page - 1) * per_page:page * per_page], headers)
+
+    def get_pull(self, query, owner, name, number):
+        pr = self.state.prs.get((owner, name), {}).get(int(number))
+        if pr is None:
+            return self._send(404, {'message': 'Not Found'})
+        self._send(200, pr)
+
+    def merge_pull(self, query, owner, name, number):
+        body = self._read_json()
+        with self.state.lock:
+            pr = self.state.prs.get((owner, name), {}).get(int(number))
+            if pr is None:
+                return self._send(404, {'message': 'Not Found'})
+            if pr['state'] != 'open' or pr['mergeable'] is False:
+                return self._send(405, {'message': 'Pull Request is not mergeable'})
+            if body.get('sha') and body['sha'] != pr['head']['sha']:
+                return self._send(409, {'message': 'Head branch was modified. Review and try the merge again.'})
+            pr.update(state='closed', merged=True, updated_at=_now())
+            self.state.merges.append((owner, name, int(number), body))
+        self._send(200, {'merged': True, 'message': 'Pull Request successfully merged'})
+
+    def search_github_issues(self, query):
+        q = query.get('q', '')
+        text = (re.findall(r'"([^"]+)"', q) or [''])[0]
+        repos = set(re.findall(r'repo:(\S+)', q))
+        base = (re.findall(r'base:(\S+)', q) or [None])[0]
+        items = []
+        with self.state.lock:
+            for (owner, name), prs in self.state.prs.items():
+                if repos and f'{owner}/{name}' not in repos:
+                    continue
+                for pr in prs.values():
+                    if 'is:open' in q and pr['state'] != 'open':
+                        continue
+                    if base and pr['base']['ref'] != base:
+                        continue
+                    if text in pr['title'] or text in (pr['body'] or ''):
+                        items.append({'number': pr['number'], 'pull_request': {},
+                                      'repository_url': f'{self.server.url}/repos/{owner}/{name}'})
+        self._send(200, {'total_count': len(items), 'items': items})
+
+    def list_members(self, query, org):
+        members = sorted(self.state.members.get(org, ()))
+        self._send(200, [{'login': login} for login in members])
+
+    def check_member(self, query, org, login):
+        self._send(204 if login in self.state.members.get(org, ()) else 404)
+
+    def graphql(self, query):
+        request = self._read_json()
+        text, variables = request.get('query', ''), request.get('variables') or {}
+        if 'pullRequests(' in text:
+            return self._send(200, {'data': {'repository': self._graphql_pulls(variables)}})
+        # Aliased branch-existence lookups: rN: repository(owner: $ownerN, name: $nameN) { ref(...) }
+        data, errors = {}, []
+        branch = variables.get('ref', '').removeprefix('refs/heads/')
+        for index in re.findall(r'r(\d+): repository', text):
+            owner, name = variables[f'owner{index}'], variables[f'name{index}']
+            branches = self.state.repos.get((owner, name))
+            if branches is None:
+                data[f'r{index}'] = None
+                errors.append({'type': 'NOT_FOUND', 'message': f"Could not resolve to a Repository with the name '{owner}/{name}'."})
+            else:
+                data[f'r{index}'] = {'ref': {'name': branch} if branch in branches else None}
+        self._send(200, {'data': data, **({'errors': errors} if errors else {})})
+
+    def _graphql_pulls(self, variables):
+        key = (variables['owner'], variables['name'])
+        if key not in self.state.repos:
+            return None
+        with self.state.lock:
+            prs = sorted((pr for pr in self.state.prs.get(key, {}).values()
+                          if pr['state'] == 'open' and pr['base']['ref'] == variables['base']),
+                         key=lambda pr: pr['number'])
+        start = int(variables.get('cursor') or 0)
+        end = start + self.state.max_per_page
+        nodes = [{
+            'number': pr['number'],
+            'title': pr['title'],
+            'body': pr['body'],
+            'mergeable': {True: 'MERGEABLE', False: 'CONFLICTING'}.get(pr['mergeable'], 'UNKNOWN'),
+            'headRefOid': pr['head']['sha'],
+            'baseRefName': pr['base']['ref'],
+            'authorAssociation': pr['author_association'],
+            'updatedAt': pr['updated_at'],
+            'author': {'login': pr['user']['login']},
+            'labels': {'nodes': pr['labels']},
+        } for pr in prs[start:end]]
+        return {'pullRequests': {'pageInfo': {'hasNextPage': end < len(prs), 'endCursor': str(end)}, 'nodes': nodes}}
+
+    # JIRA
+
+    def get_issue(self, query, key):
+        issue = self.state.issues.get(key)
+        if issue is None:
+            return self._send(404, {'errorMessages': ['Issue Does Not Exist']})
+        self._send(200, issue)
+
+    def _matches(self, issue, clause):
+        fields = issue['fields']
+        match = re.fullmatch(r'(\w+) (=|in|>=) (.+)', clause.strip())
+        if not match:
+            return True
+        name, operator, value = match.groups()
+        value = value.strip('"')
+        if name == 'key' and operator == 'in':
+            return issue['key'] in re.findall(r'[A-Z][A-Z0-9]+-\d+', value)
+        if name == 'updated':
+            return True  # Every issue counts as recently updated
+        if name == 'resolution':
+            return fields.get('resolution') is None if value == 'Unresolved' else (fields.get('resolution') or {}).get('name') == value
+        if name == 'project':
+            return fields['project']['key'] == value
+        if name == 'priority':
+            return (fields.get('priority') or {}).get('name') == value
+        if name == 'component':
+            return value in [component['name'] for component in fields.get('components', [])]
+        if name == 'labels':
+            return value in fields.get('labels', [])
+        return True
+
+    def search_issues(self, query):
+        clauses = query.get('jql', '').split(' AND ')
+        with self.state.lock:
+            issues = [issue for issue in self.state.issues.values()
+                      if all(self._matches(issue, clause) for clause in clauses)]
+        start_at = int(query.get('startAt', 0))
+        max_results = min(int(query.get('maxResults', 50)), self.state.max_jira_results)
+        self._send(200, {'startAt': start_at, 'total': len(issues), 'issues': issues[start_at:start_at + max_results]})
+
+    def get_remote_links(self, query, key):
+        if key not in self.state.issues:
+            return self._send(404, {'errorMessages': ['Issue Does Not Exist']})
+        links = self.state.remote_links.get(key, [])
+        self._send(200, [{'id': index, 'object': {'url': url}} for index, url in enumerate(links, 1)])
+
+    def add_comment(self, query, key):
+        body = self._read_json()
+        if key not in self.state.issues:
+            return self._send(404, {'errorMessages': ['Issue Does Not Exist']})
+        with self.state.lock:
+            self.state.comments.append((key, body.get('body')))
+        self._send(201, {'body': body.get('body')})
+
+    ROUTES = [
+        (r'/repos/([^/]+)/([^/]+)/pulls', 'GET', list_pulls),
+        (r'/repos/([^/]+)/([^/]+)/pulls/(\d+)', 'GET', get_pull),
+        (r'/repos/([^/]+)/([^/]+)/pulls/(\d+)/merge', 'PUT', merge_pull),
+        (r'/search/issues', 'GET', search_github_issues),
+        (r'/graphql', 'POST', graphql),
+        (r'/orgs/([^/]+)/members', 'GET', list_members),
+        (r'/orgs/([^/]+)/members/([^/]+)', 'GET', check_member),
+        (r'/rest/api/2/issue/([^/]+)', 'GET', get_issue),
+        (r'/rest/api/2/search', 'GET', search_issues),
+        (r'/rest/api/2/issue/([^/]+)/comment', 'POST', add_comment),
+        (r'/rest/api/2/issue/([^/]+)/remotelink', 'GET', get_remote_links),
+    ]
+
+
+class StandInServer(ThreadingHTTPServer):
+    """Local stand-in for the GitHub and JIRA REST endpoints the automerger uses.
+
+    PRs, org members and JIRA issues live in memory (``state``), so scripts
+    and the webhook daemon can be run end to end without network or tokens.
+    ``url`` serves both the GitHub and the JIRA paths::
+
+        stand_in = StandInServer().start()
+        stand_in.state.add_issue('RHOAIENG-1', priority='Blocker', labels=('eng', 'groomed'))
+        stand_in.state.add_pr('rhoai-rhtap', 'odh-dashboard', 1, 'RHOAIENG-1 fix', labels=('rhoai-2.13',))
+        client.set_github_api_url(stand_in.url)
+        client.set_jira_server(stand_in.url)
+    """
+
+    daemon_threads = True
+
+    def __init__(self, host='127.0.0.1', port=0, state=None):
+        super().__init__((host, port), StandInHandler)
+        self.state = state or StandInState()
+        self.url = f'http://{host}:{self.server_address[1]}'
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def send_webhook(url, payload, github_event=None, secret=None):
+    """POST a webhook delivery to ``url`` the way GitHub (or JIRA) would."""
+    body = json.dumps(payload).encode()
+    headers = {'Content-Type': 'application/json'}
+    if github_event:
+        headers['X-GitHub-Event'] = github_event
+    if secret:
+        digest = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+        headers['X-Hub-Signature-256'] = f'sha256={digest}'
+    return requests.post(url, data=body, headers=headers, timeout=10)
@@ -0,0 +1,103 @@
+import io
+import sys
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+# Default number of worker threads for a concurrent sweep
+DEFAULT_WORKERS = 8
+
+
+class _ThreadLocalStdout:
+    """sys.stdout proxy that sends writes to a per-thread buffer when one is active."""
+
+    def __init__(self, stream):
+        self._stream = stream
+        self._local = threading.local()
+
+    def write(self, text):
+        buffer = getattr(self._local, 'buffer', None)
+        if buffer is not None:
+            return buffer.write(text)
+        return self._stream.write(text)
+
+    def flush(self):
+        if getattr(self._local, 'buffer', None) is None:
+            self._stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+
+_install_lock = threading.Lock()
+
+
+def _stdout_proxy():
+    with _install_lock:
+        if not isinstance(sys.stdout, _ThreadLocalStdout):
+            sys.stdout = _ThreadLocalStdout(sys.stdout)
+        return sys.stdout
+
+
+@contextmanager
+def captured_output():
+    """Buffer everything the current thread prints until the block exits."""
+    proxy = _stdout_proxy()
+    previous = getattr(proxy._local, 'buffer', None)
+    buffer = io.StringIO()
+    proxy._local.buffer = buffer
+    try:
+        yield buffer
+    finally:
+        proxy._local.buffer = previous
+
+
+def _call_captured(func, item):
+    with captured_output() as buffer:
+        try:
+            return func(item), buffer.getvalue(), None
+        except BaseException as err:
+            return None, buffer.getvalue(), err
+
+
+def iter_ordered(func, items, workers=DEFAULT_WORKERS):
+    """Call func(item) for every item on up to `workers` threads.
+
+    Yields ``(item, result)`` pairs in input order. Whatever each call printed
+    is replayed just before its pair is yielded, so the output reads exactly
+    like a sequential run and the caller can act on each result (e.g. merge)
+    in order. ``items`` may be a lazy iterator (such as a paginated listing);
+    work is submitted as items arrive. With a single worker everything runs
+    inline.
+    """
+    if workers <= 1:
+        for item in items:
+            yield item, func(item)
+        return
+
+    def finish(item, future):
+        result, output, err = future.result()
+        sys.stdout.write(output)
+        if err is not None:
+            raise err
+        return item, result
+
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        try:
+            for item in items:
+                pending.append((item, pool.submit(_call_captured, func, item)))
+                # Hand back finished results at the head without waiting on the input
+                while pending and pending[0][1].done():
+                    yield finish(*pending.popleft())
+            while pending:
+                yield finish(*pending.popleft())
+        finally:
+            for _, future in pending:
+                future.cancel()
+
+
+def run_ordered(func, items, workers=DEFAULT_WORKERS):
+    """Like iter_ordered, but return the results as a list."""
+    return [result for _, result in iter_ordered(func, items, workers)]
@@ -0,0 +1,76 @@
+import json
+import os
+import threading
+
+# Where incremental sweeps keep their watermarks
+DEFAULT_STATE_PATH = os.path.join('.cache', 'sweep_state.json')
+
+
+class SweepState:
+    """Per repo/base-branch watermarks for incremental sweeps.
+
+    For every ``repo@branch`` the state keeps the newest PR ``updated_at``
+    seen (the listing watermark) and, per evaluated PR, the ``updated_at``
+    and JIRA ``updated`` values it was evaluated against. A PR only needs
+    another look when either side moved. PRs that passed the checks but were
+    not merged are marked ``retry`` so they are fetched again next run.
+    """
+
+    def __init__(self, path=DEFAULT_STATE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        try:
+            with open(path, 'r') as file:
+                self._state = json.load(file)
+        except (OSError, ValueError):
+            self._state = {}
+
+    def _entry(self, repo, branch):
+        return self._state.setdefault(f'{repo}@{branch}', {'watermark': None, 'prs': {}})
+
+    def watermark(self, repo, branch):
+        with self._lock:
+            return self._entry(repo, branch)['watermark']
+
+    def advance(self, repo, branch, updated_at):
+        with self._lock:
+            entry = self._entry(repo, branch)
+            if entry['watermark'] is None or updated_at > entry['watermark']:
+                entry['watermark'] = updated_at
+
+    def is_changed(self, repo, branch, pr):
+        with self._lock:
+            record = self._entry(repo, branch)['prs'].get(str(pr['number']))
+        return record is None or record.get('retry') or record.get('updated_at') != pr.get('updated_at')
+
+    def retry_numbers(self, repo, branch):
+        with self._lock:
+            return [int(number) for number, record in self._entry(repo, branch)['prs'].items() if record.get('retry')]
+
+    def jira_watermarks(self, repo, branch):
+        """Return {pr_number: (jira_id, jira_updated)} for PRs settled against a JIRA issue."""
+        with self._lock:
+            return {int(number): (record['jira_id'], record['jira_updated'])
+                    for number, record in self._entry(repo, branch)['prs'].items()
+                    if record.get('jira_id') and record.get('jira_updated') and not record.get('retry')}
+
+    def record(self, repo, branch, pr, jira_id=None, jira_updated=None, retry=False):
+        with self._lock:
+            self._entry(repo, branch)['prs'][str(pr['number'])] = {
+                'updated_at': pr.get('updated_at'),
+                'jira_id': jira_id,
+                'jira_updated': jira_updated,
+                'retry': retry,
+            }
+
+    def forget(self, repo, branch, number):
+        with self._lock:
+            self._entry(repo, branch)['prs'].pop(str(number), None)
+
+    def save(self):
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            tmp_path = f'{self.path}.tmp'
+            with open(tmp_path, 'w') as file:
+                json.dump(self._state, file, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.path)
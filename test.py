@@ -1,12 +1,23 @@
 import os
-import json
 import requests
-import re
 import subprocess
 import argparse
 import sys
-import time
-import yaml
+
+from blocker_index import BlockerIndex
+from config import load_config, load_releases
+from github_api import branch_exists_by_repo, iter_open_prs, iter_open_prs_graphql, repo_path, split_repo
+from http_client import get_client
+from jira_api import find_updated_issues, jql_since
+from jira_cache import get_jira_cache
+from jira_ids import configure_project_keys, extract_jira_id, extract_jira_ids
+from jira_outbox import get_jira_outbox
+from merge_executor import FAILED, MERGED, STALE, UNMERGEABLE, MergeExecutor
+from mergeability import poll_mergeable
+from mirror_cache import get_mirror_cache
+from org_members import get_org_membership
+from sweep import DEFAULT_WORKERS, iter_ordered, run_ordered
+from sweep_state import DEFAULT_STATE_PATH, SweepState
 
 # ANSI escape codes for color
 GREEN = '\033[92m'
@@ -17,35 +28,26 @@ RESET = '\033[0m'
 JIRA_API_TOKEN = os.getenv('JIRA_API_TOKEN')
 GITHUB_TOKEN = os.getenv('GITHUB_TOKEN')
 
+# Pooled keep-alive client shared by every GitHub and JIRA call
+client = get_client()
+
+# On-disk JIRA issue cache shared across runs
+jira_cache = get_jira_cache()
+
+# Durable queue for the comments posted to JIRA after a merge
+jira_outbox = get_jira_outbox()
+
 # Hard-coded JIRA server URL
 JIRA_SERVER = 'https://issues.redhat.com'
 
-# GitHub API base URL
-GITHUB_API_URL = 'https://api.github.com'
+# GitHub API base URL (GITHUB_API_URL in the environment overrides it)
+GITHUB_API_URL = client.github_api_url
 
-def load_config():
-    try:
-        with open('repos.json', 'r') as file:
-            config = json.load(file)
-        return config
-    except FileNotFoundError:
-        print(f"{RED}Error: 'repos.json' file not found.{RESET}")
-        raise
-    except json.JSONDecodeError:
-        print(f"{RED}Error: 'repos.json' file is not a valid JSON.{RESET}")
-        raise
-
-def load_releases():
-    try:
-        with open('releases.yaml', 'r') as file:
-            release_config = yaml.safe_load(file)
-        return release_config.get('releases', [])
-    except FileNotFoundError:
-        print(f"{RED}Error: 'releases.yaml' file not found.{RESET}")
-        raise
-    except yaml.YAMLError:
-        print(f"{RED}Error: 'releases.yaml' file is not a valid YAML.{RESET}")
-        raise
+# PR author associations that already prove org membership
+ORG_MEMBER_ASSOCIATIONS = {'MEMBER', 'OWNER'}
+
+# JIRA issues resolved in bulk before the per-PR checks run
+prefetched_jira_issues = {}
 
 def validate_branch(branch, allowed_releases):
     if branch not in allowed_releases:
@@ -54,87 +56,69 @@ def validate_branch(branch, allowed_releases):
     else:
         print(f"{GREEN}Branch '{branch}' is valid and allowed to proceed.{RESET}")
 
-def fetch_open_prs(org, repo, branch):
-    headers = {'Authorization': f'token {GITHUB_TOKEN}'}
-    url = f'{GITHUB_API_URL}/repos/{org}/{repo}/pulls?state=open&base={branch}'
-    response = requests.get(url, headers=headers)
-    response.raise_for_status()
-    open_prs = response.json()
-    return open_prs
+def fetch_open_prs(org, repo, branch, until=None, use_graphql=False):
+    # Lazily pages through every open PR (100 per page) instead of stopping at the first 30
+    if use_graphql:
+        return iter_open_prs_graphql(org, repo, branch, until=until, client=client)
+    return iter_open_prs(org, repo, branch, until=until, client=client)
 
 def get_jira_id_from_pr(pr):
-    title = pr.get('title', '')
-    body = pr.get('body', '')
+    # First key in the title, else in the (capped) body; only the configured JIRA project matches
+    return extract_jira_id(pr)
 
-    # Ensure title and body are strings
-    title = str(title)
-    body = str(body)
+def prefetch_jira_issues(jira_ids):
+    # Resolve a whole sweep's JIRA IDs from the cache plus a few JQL searches instead of one GET per PR
+    prefetched_jira_issues.update(jira_cache.resolve(jira_ids, client=client))
 
-    jira_id_pattern = r'[A-Z]+-\d+'
-    
-   # Check the title for a JIRA ID
-    jira_id_match = re.search(jira_id_pattern, title)
-    if jira_id_match:
-        return jira_id_match.group(0)  # Return the found JIRA ID
-
-    # Check the body for a JIRA ID
-    jira_id_match = re.search(jira_id_pattern, body)
-    if jira_id_match:
-        return jira_id_match.group(0)  # Return the found JIRA ID
-
-    # Return a message if no JIRA ID was found
-    #return "No JIRA ID found in PR"
-    return None
+def get_jira_issue_details(jira_id):
+    if jira_id in prefetched_jira_issues:
+        return prefetched_jira_issues[jira_id]
+    cached = jira_cache.get(jira_id)
+    if cached is not None:
+        return cached
 
-def get_jira_issue_details(jira_id, max_retries=3):
-    headers = {
-        'Authorization': f'Bearer {JIRA_API_TOKEN}'
-    }
     url = f'{JIRA_SERVER}/rest/api/2/issue/{jira_id}'
 
-    for attempt in range(max_retries):
-        try:
-            response = requests.get(url, headers=headers)
-            response.raise_for_status()
-            jira_details = response.json()
-            return jira_details
-        except requests.exceptions.HTTPError as err:
-            if response.status_code == 403:
-                print(f"{RED}HTTP error 403: Forbidden for JIRA ID {jira_id}. Skipping.{RESET}")
-                return None
-            elif response.status_code == 404:
-                print(f"{RED}JIRA issue {jira_id} not found. Skipping.{RESET}")
-                return None
-            else:
-                print(f"{RED}HTTP error occurred: {err} for JIRA ID {jira_id}. Retrying ({attempt + 1}/{max_retries})...{RESET}")
-                time.sleep(2 ** attempt)  # Exponential backoff
-        except Exception as err:
-            print(f"{RED}Unexpected error: {err} for JIRA ID {jira_id}. Retrying ({attempt + 1}/{max_retries})...{RESET}")
-            time.sleep(2 ** attempt)  # Exponential backoff
-
-    print(f"{RED}Failed to retrieve JIRA details for ID {jira_id} after {max_retries} attempts.{RESET}")
+    # Transient failures are retried by the client's retry engine, which also
+    # stops calling JIRA altogether once it is clearly down
+    try:
+        response = client.get(url)
+        response.raise_for_status()
+        return jira_cache.put(jira_id, response.json())
+    except requests.exceptions.HTTPError as err:
+        if response.status_code == 403:
+            print(f"{RED}HTTP error 403: Forbidden for JIRA ID {jira_id}. Skipping.{RESET}")
+        elif response.status_code == 404:
+            print(f"{RED}JIRA issue {jira_id} not found. Skipping.{RESET}")
+        else:
+            print(f"{RED}Failed to retrieve JIRA details for ID {jira_id}: {err}{RESET}")
+    except (requests.exceptions.RequestException, ValueError) as err:
+        print(f"{RED}Failed to retrieve JIRA details for ID {jira_id}: {err}{RESET}")
     return None
 
-def check_pr_mergeable(org, repo, pr_number):
-    url = f'{GITHUB_API_URL}/repos/{org}/{repo}/pulls/{pr_number}'
-    headers = {'Authorization': f'token {GITHUB_TOKEN}'}
-    response = requests.get(url, headers=headers)
-    response.raise_for_status()
-    pr_details = response.json()
-    return pr_details.get('mergeable', False)
-
-def merge_pr(org, repo, pr_number):
-    url = f'{GITHUB_API_URL}/repos/{org}/{repo}/pulls/{pr_number}/merge'
-    headers = {
-        'Authorization': f'token {GITHUB_TOKEN}',
-        'Accept': 'application/vnd.github.v3+json'
-    }
+def resolve_mergeable(org, repo, prs):
+    """Return {pr_number: True | False | None} for the PRs about to be merged."""
+    # GraphQL listings already carry the mergeable state; GitHub computes the rest in the
+    # background, so all unknown ones are triggered together and polled until they resolve
+    unknown = [pr['number'] for pr in prs if pr.get('mergeable') is None]
+    polled = poll_mergeable(org, repo, unknown, client=client) if unknown else {}
+    return {pr['number']: pr['mergeable'] if pr.get('mergeable') is not None else polled.get(pr['number'])
+            for pr in prs}
+
+def merge_pr(org, repo, pr):
+    """Merge ``pr`` and return one of the merge_executor outcomes."""
+    pr_number = pr['number']
+    url = f'{GITHUB_API_URL}/repos/{repo_path(org, repo)}/pulls/{pr_number}/merge'
     data = {
         'commit_title': f'Merge PR #{pr_number}',
         'commit_message': 'Merged automatically because the linked JIRA issue has Blocker priority.'
     }
+    # Pinning the evaluated head makes GitHub refuse the merge if new commits were pushed since
+    head_sha = (pr.get('head') or {}).get('sha')
+    if head_sha:
+        data['sha'] = head_sha
 
-    response = requests.put(url, headers=headers, json=data)
+    response = client.put(url, json=data)
     
     if response.status_code == 200:
         print(f"{GREEN}PR #{pr_number} in repo {repo} was successfully merged.{RESET}")
@@ -142,58 +126,59 @@ def merge_pr(org, repo, pr_number):
         # After merging, add a comment to the JIRA issue
         jira_id = get_jira_id_from_pr(pr)  # Obtain the JIRA ID from the PR
         if jira_id:
-            pr_link = f"https://github.com/{org}/{repo}/pull/{pr_number}"  # Construct the PR link
+            pr_link = f"https://github.com/{repo_path(org, repo)}/pull/{pr_number}"  # Construct the PR link
             comment_on_jira_issue(jira_id, "The associated pull request has been merged.", pr_link)
-    else:
-        print(f"{RED}Failed to merge PR #{pr_number} in repo {repo}. Response: {response.status_code} - {response.json()}{RESET}")
-
-def comment_on_jira_issue(jira_id, comment, pr_link, max_retries=3):
-    headers = {
-        'Authorization': f'Bearer {JIRA_API_TOKEN}',
-        'Content-Type': 'application/json'
-    }
-    url = f'{JIRA_SERVER}/rest/api/2/issue/{jira_id}/comment'
+        return MERGED
+    if response.status_code == 409:
+        print(f"{RED}PR #{pr_number} in repo {repo} changed since it was evaluated. Leaving it for the next sweep.{RESET}")
+        return STALE
+    print(f"{RED}Failed to merge PR #{pr_number} in repo {repo}. Response: {response.status_code} - {response.json()}{RESET}")
+    return UNMERGEABLE if response.status_code == 405 else FAILED
+
+def new_merge_executor(workers=1):
+    """Executor merging one PR at a time per (repo, base branch), lanes in parallel."""
+    def recheck(item):
+        org, repo, pr = item
+        return poll_mergeable(org, repo, [pr['number']], client=client)[pr['number']]
+    return MergeExecutor(lambda item: merge_pr(*item), recheck, workers)
+
+def comment_on_jira_issue(jira_id, comment, pr_link):
     full_comment = f"{comment}\n\n[View Pull Request]({pr_link})"  # Add the PR link to the comment
-    data = {
-        'body': full_comment
-    }
-
-    for attempt in range(max_retries):
-        try:
-            response = requests.post(url, headers=headers, json=data)
-            response.raise_for_status()
-            print(f"{GREEN}Comment added to JIRA issue {jira_id}.{RESET}")
-            return
-        except requests.exceptions.HTTPError as err:
-            print(f"{RED}Failed to add comment to JIRA issue {jira_id}: {err}{RESET}")
-            time.sleep(2 ** attempt)  # Exponential backoff
-        except Exception as err:
-            print(f"{RED}Unexpected error while commenting on JIRA issue {jira_id}: {err}{RESET}")
-            time.sleep(2 ** attempt)  # Exponential backoff
-
-    print(f"{RED}Failed to add comment to JIRA issue {jira_id} after {max_retries} attempts.{RESET}")
+    # Journaled and posted in the background, so merges never wait on JIRA
+    jira_outbox.enqueue(jira_id, full_comment)
 
 def checkout_branch(org, repo, branch):
+    """Check out ``branch`` as a worktree of the cached mirror and return its path."""
     try:
-        subprocess.run(['git', 'clone', f'https://github.com/{org}/{repo}.git'], check=True)
-        os.chdir(repo)
-        subprocess.run(['git', 'checkout', branch], check=True)
+        # Mirrors persist across runs, so this is an incremental fetch rather than a full clone
+        return get_mirror_cache().checkout(*split_repo(org, repo), branch)
     except subprocess.CalledProcessError as e:
         print(f"{RED}Error: Command '{e.cmd}' returned non-zero exit status {e.returncode}.{RESET}")
         print(f"{RED}Error: The branch '{branch}' does not exist in the repository '{repo}'.{RESET}")
         sys.exit(1)  # Exit with non-zero status to indicate failure
 
+def validate_repo_branches(org, repos, branch):
+    # One GraphQL query confirms the branch exists everywhere, with no clone and no chdir
+    exists = branch_exists_by_repo(org, repos, branch, client=client)
+    missing = [repo for repo in repos if not exists.get(repo)]
+    for repo in missing:
+        print(f"{RED}Error: The branch '{branch}' does not exist in the repository '{repo}'.{RESET}")
+    if missing:
+        sys.exit(1)  # Exit with non-zero status to indicate failure
+
 def is_user_in_org(org, username):
-    headers = {'Authorization': f'token {GITHUB_TOKEN}'}
-    url = f'{GITHUB_API_URL}/orgs/{org}/members/{username}'
-    response = requests.get(url, headers=headers)
-    return response.status_code == 204  # 204 No Content means the user is a member
+    # The org's member list is loaded once per sweep; unknown logins fall back to the per-user endpoint
+    return get_org_membership(org).is_member(username)
 
-def check_authors(org, pr):
+def check_authors(org, repo, pr):
     pr_author = pr['user']['login']  # Original PR author
 
-    # Check if the PR author is a member of the organization
-    if not is_user_in_org(org, pr_author):
+    # Check if the PR author is a member of the organization. GitHub already reports
+    # MEMBER/OWNER on the PR itself, which saves a membership request, but only
+    # relative to the repo's owner, so it proves nothing for repos outside the org.
+    in_org_repo = split_repo(org, repo)[0].lower() == org.lower()
+    member_association = in_org_repo and pr.get('author_association') in ORG_MEMBER_ASSOCIATIONS
+    if not member_association and not is_user_in_org(org, pr_author):
         print(f"{RED}PR author '{pr_author}' is not a member of the '{org}' organization.{RESET}")
         return False  # Skip if the author is not in the organization
 
@@ -202,9 +187,164 @@ def check_authors(org, pr):
     return True
 
 
+def evaluate_pr(org, repo, pr):
+    """Run the author and JIRA checks for a PR. Return True if it should be merged."""
+    if not check_authors(org, repo, pr):
+        print(f"{RED}Skipping PR #{pr['number']} due to author checks.{RESET}")
+        return False
+
+    config = load_config()
+    problem = config.pr_problem(pr)
+    if problem:
+        print(f"{RED}Skipping PR #{pr['number']} as it {problem}.{RESET}")
+        return False
+
+    jira_id = get_jira_id_from_pr(pr)
+    if not jira_id:
+        print(f"{RED}No JIRA ID found in PR #{pr['number']}. Skipping.{RESET}")
+        return False
+
+    jira_details = get_jira_issue_details(jira_id)
+    if not jira_details:
+        print(f"{RED}Skipping PR #{pr['number']} as the JIRA issue {jira_id} could not be fetched.{RESET}")
+        return False
+    problem = config.issue_problem(jira_details)
+    if problem:
+        print(f"{RED}Skipping PR #{pr['number']} as the JIRA issue {jira_id} {problem}.{RESET}")
+        return False
+
+    priority = jira_details['fields']['priority']['name']
+    print(f"{GREEN}Merging PR #{pr['number']} in repo {repo} because JIRA {jira_id} is a {priority} issue.{RESET}")
+    return True
+
+def list_repo_prs(org, repo, branch, use_graphql=False, checkout=False):
+    if checkout:
+        checkout_branch(org, repo, branch)
+    return list(fetch_open_prs(org, repo, branch, use_graphql=use_graphql))
+
+def fetch_pr(org, repo, pr_number):
+    response = client.get(f'{GITHUB_API_URL}/repos/{repo_path(org, repo)}/pulls/{pr_number}')
+    if response.status_code == 404:
+        return None
+    response.raise_for_status()
+    return response.json()
+
+def list_changed_prs(org, repo, branch, sweep_state, checkout=False):
+    """List only the open PRs that changed since the last incremental sweep."""
+    if checkout:
+        checkout_branch(org, repo, branch)
+    watermark = sweep_state.watermark(repo, branch)
+    # Most recently updated first, so paging stops at the previous run's watermark
+    until = (lambda pr: pr['updated_at'] < watermark) if watermark else None
+    prs = []
+    for pr in iter_open_prs(org, repo, branch, until=until, client=client, sort='updated', direction='desc'):
+        sweep_state.advance(repo, branch, pr['updated_at'])
+        if sweep_state.is_changed(repo, branch, pr):
+            prs.append(pr)
+
+    # PRs that passed the checks but were not merged are looked at again even if unchanged
+    listed = {pr['number'] for pr in prs}
+    for pr_number in sweep_state.retry_numbers(repo, branch):
+        if pr_number in listed:
+            continue
+        pr = fetch_pr(org, repo, pr_number)
+        if pr and pr['state'] == 'open' and pr['base']['ref'] == branch:
+            prs.append(pr)
+        else:
+            sweep_state.forget(repo, branch, pr_number)
+    return prs
+
+def add_jira_changed_prs(org, branch, open_prs_by_repo, sweep_state):
+    """Add PRs that are unchanged on GitHub but whose JIRA issue was updated since they were evaluated."""
+    watched = {}
+    for repo, prs in open_prs_by_repo.items():
+        listed = {pr['number'] for pr in prs}
+        for pr_number, (jira_id, jira_updated) in sweep_state.jira_watermarks(repo, branch).items():
+            if pr_number not in listed:
+                watched.setdefault(jira_id, []).append((repo, pr_number, jira_updated))
+
+    since = jql_since(jira_updated for entries in watched.values() for _, _, jira_updated in entries)
+    if not since:
+        return
+    changed, _ = find_updated_issues(watched, since, client=client)
+    for jira_id, issue in changed.items():
+        prefetched_jira_issues[jira_id] = jira_cache.put(jira_id, issue)
+        for repo, pr_number, jira_updated in watched.get(jira_id, ()):
+            if issue['fields'].get('updated') == jira_updated:
+                continue
+            pr = fetch_pr(org, repo, pr_number)
+            if pr and pr['state'] == 'open' and pr['base']['ref'] == branch:
+                open_prs_by_repo[repo].append(pr)
+            else:
+                sweep_state.forget(repo, branch, pr_number)
+
+def list_blocker_prs(org, config, branch):
+    """Return {repo: open PRs} for only the PRs that reference a qualifying JIRA issue."""
+    index = BlockerIndex(org, config, branch, client=client).build()
+    # The JQL results already carry the fields the checks read
+    for jira_id, issue in index.issues.items():
+        prefetched_jira_issues[jira_id] = jira_cache.put(jira_id, issue)
+    print(f"Found {len(index.issues)} open {'/'.join(config.priority_names)} issue(s) "
+          f"referenced by {index.candidate_count()} PR(s).")
+
+    prs_by_repo = {}
+    for repo, pr_numbers in index.prs_by_repo.items():
+        prs = (fetch_pr(org, repo, pr_number) for pr_number in sorted(pr_numbers))
+        prs_by_repo[repo] = [pr for pr in prs if pr and pr['state'] == 'open' and pr['base']['ref'] == branch]
+    return prs_by_repo
+
+def record_evaluation(sweep_state, repo, branch, pr, should_merge):
+    jira_id = get_jira_id_from_pr(pr)
+    jira_details = get_jira_issue_details(jira_id) if jira_id else None
+    jira_updated = (jira_details or {}).get('fields', {}).get('updated')
+    # Merge candidates (and PRs whose JIRA lookup failed) are retried until they settle,
+    # since mergeability can change without the PR itself being updated
+    retry = should_merge or (jira_id is not None and jira_details is None)
+    sweep_state.record(repo, branch, pr, jira_id, jira_updated, retry=retry)
+
+def merge_candidates(org, repo, candidates, executor=None):
+    executor = executor or new_merge_executor()
+    mergeable = resolve_mergeable(org, repo, candidates)
+    for pr in candidates:
+        if mergeable[pr['number']]:
+            executor.submit((repo, pr['base']['ref']), (org, repo, pr))
+        elif mergeable[pr['number']] is None:
+            print(f"{RED}PR #{pr['number']} mergeability is still being computed by GitHub. Leaving it for the next sweep.{RESET}")
+        else:
+            print(f"{RED}PR #{pr['number']} is not mergeable.{RESET}")
+
+def process_repo(org, repo, open_prs, workers=1, sweep_state=None, branch=None, executor=None):
+    if not open_prs:
+        if sweep_state is not None:
+            print(f"No changed PRs for repo: {repo}.")
+        else:
+            print(f"{RED}No open PRs found for repo: {repo}.{RESET}")
+        return
+
+    # PRs are evaluated concurrently; merges go one at a time, in PR order, per base branch
+    evaluated = list(iter_ordered(lambda pr: evaluate_pr(org, repo, pr), open_prs, workers))
+    if sweep_state is not None:
+        for pr, should_merge in evaluated:
+            record_evaluation(sweep_state, repo, branch, pr, should_merge)
+    merge_candidates(org, repo, [pr for pr, should_merge in evaluated if should_merge], executor)
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Process GitHub repositories and JIRA issues.')
     parser.add_argument('--branch', required=True, help='Branch name to check out and process')
+    parser.add_argument('--workers', type=int, default=1,
+                        help=f'Number of repos/PRs to process in parallel (e.g. {DEFAULT_WORKERS}); 1 runs sequentially')
+    parser.add_argument('--checkout', action='store_true',
+                        help='Also clone each repo and check out the branch (only needed for checks on the source)')
+    parser.add_argument('--graphql', action='store_true',
+                        help='Fetch PRs, mergeability and author data with one GraphQL query per repo')
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--incremental', action='store_true',
+                      help='Only evaluate PRs whose PR or JIRA issue changed since the last incremental run '
+                           '(lists PRs over REST, so --graphql does not apply)')
+    mode.add_argument('--jira-first', action='store_true',
+                      help='Start from open JIRA issues with the configured priority and labels (one JQL query per '
+                           'component) and only evaluate the PRs that reference them')
     args = parser.parse_args()
 
     branch_name = args.branch
@@ -215,33 +355,37 @@ if __name__ == "__main__":
 
     # Load main configuration and proceed if branch is valid
     config = load_config()
-    org = config['org']
-    all_prs_found = False
-
-    for component in config['components']:
-        for repo in component['rhds_repos']:
-            checkout_branch(org, repo, branch_name)
-            open_prs = fetch_open_prs(org, repo, branch_name)
-
-            if not open_prs:
-                print(f"{RED}No open PRs found for repo: {repo}.{RESET}")
-                continue
-
-            for pr in open_prs:
-                if not check_authors(org, pr):
-                    print(f"{RED}Skipping PR #{pr['number']} due to author checks.{RESET}")
-                    continue
-
-                jira_id = get_jira_id_from_pr(pr)
-                if jira_id:
-                    jira_details = get_jira_issue_details(jira_id)
-                    if jira_details and jira_details.get('fields', {}).get('priority', {}).get('name') == 'Blocker':
-                        print(f"{GREEN}Merging PR #{pr['number']} in repo {repo} because JIRA {jira_id} is a Blocker issue.{RESET}")
-                        if check_pr_mergeable(org, repo, pr['number']):
-                            merge_pr(org, repo, pr['number'])
-                        else:
-                            print(f"{RED}PR #{pr['number']} is not mergeable.{RESET}")
-                    else:
-                        print(f"{RED}Skipping PR #{pr['number']} as the JIRA issue {jira_id} is not a Blocker.{RESET}")
-                else:
-                    print(f"{RED}No JIRA ID found in PR #{pr['number']}. Skipping.{RESET}")
+    configure_project_keys(config.jira_project)
+    org = config.org
+    JIRA_SERVER = config.jira_server
+    client.set_jira_server(JIRA_SERVER)
+    repos = config.repos
+    validate_repo_branches(org, repos, branch_name)
+
+    # List every repo's open PRs, then resolve all of their JIRA IDs in a handful of searches
+    sweep_state = None
+    if args.incremental:
+        sweep_state = SweepState(os.getenv('SWEEP_STATE_PATH', DEFAULT_STATE_PATH))
+        open_prs_by_repo = dict(zip(repos, run_ordered(lambda repo: list_changed_prs(org, repo, branch_name, sweep_state, args.checkout), repos, args.workers)))
+        add_jira_changed_prs(org, branch_name, open_prs_by_repo, sweep_state)
+    elif args.jira_first:
+        blocker_prs = list_blocker_prs(org, config, branch_name)
+        open_prs_by_repo = {repo: blocker_prs.get(repo, []) for repo in repos}
+    else:
+        open_prs_by_repo = dict(zip(repos, run_ordered(lambda repo: list_repo_prs(org, repo, branch_name, args.graphql, args.checkout), repos, args.workers)))
+    prefetch_jira_issues(keys[0] for keys in extract_jira_ids(pr for prs in open_prs_by_repo.values() for pr in prs) if keys)
+
+    # Repos run in parallel; each repo's output is replayed in config order. Merges run on their
+    # own lanes, so one repo's merges do not hold up the next repo's evaluation; what they print
+    # follows the repo's own output
+    merge_executor = new_merge_executor(args.workers)
+    for repo, _ in iter_ordered(lambda repo: process_repo(org, repo, open_prs_by_repo[repo], args.workers, sweep_state, branch_name, merge_executor), repos, args.workers):
+        sys.stdout.write(merge_executor.take_output([(repo, branch_name)]))
+    merge_executor.shutdown()
+    if sweep_state is not None:
+        sweep_state.save()
+
+    jira_outbox.flush()
+    jira_cache.print_stats()
+    jira_outbox.print_stats()
+    client.print_stats()
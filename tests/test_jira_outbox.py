@@ -0,0 +1,124 @@
+import json
+import os
+import sys
+import time
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from http_client import ApiClient  # noqa: E402
+from jira_outbox import JiraCommentOutbox  # noqa: E402
+from retry import RetryEngine  # noqa: E402
+from stand_in import StandInServer, StandInState  # noqa: E402
+
+
+@pytest.fixture
+def jira(tmp_path):
+    """A JIRA stand-in with two issues, a client pointed at it and a journal path."""
+    state = StandInState()
+    state.add_issue('RHOAIENG-1', priority='Blocker')
+    state.add_issue('RHOAIENG-2', priority='Blocker')
+    server = StandInServer(state=state).start()
+    client = ApiClient(jira_server=server.url, retry=RetryEngine())
+    yield client, state, str(tmp_path / 'jira_outbox.jsonl')
+    server.stop()
+
+
+def journal(path):
+    with open(path) as file:
+        return [json.loads(line) for line in file]
+
+
+def leftover(client, path, jira_id, **fields):
+    """Journal a comment as an earlier run would have left it."""
+    record = {'op': 'add', 'id': f'{jira_id}-left', 'server': client.jira_server, 'jira_id': jira_id,
+              'body': 'The associated pull request has been merged.', 'queued_at': 0, 'owner': 'crashed', 'claimed_at': 0,
+              **fields}
+    with open(path, 'a') as file:
+        file.write(json.dumps(record) + '\n')
+    return record
+
+
+def test_posted_comments_are_compacted_away(jira):
+    client, state, path = jira
+    outbox = JiraCommentOutbox(path, client)
+    outbox.enqueue('RHOAIENG-1', 'merged')
+    outbox.enqueue('RHOAIENG-2', 'merged')
+    assert outbox.flush(timeout=10) == 0
+    assert sorted(key for key, _ in state.comments) == ['RHOAIENG-1', 'RHOAIENG-2']
+    assert outbox.posted == 2
+    assert journal(path) == []
+
+
+def test_comments_that_cannot_be_posted_are_dropped(jira):
+    client, state, path = jira
+    outbox = JiraCommentOutbox(path, client)
+    outbox.enqueue('RHOAIENG-404', 'merged')
+    assert outbox.flush(timeout=10) == 0
+    assert outbox.failed == 1
+    assert state.comments == []
+
+
+def test_comments_left_by_a_crashed_run_are_resumed_once(jira):
+    client, state, path = jira
+    leftover(client, path, 'RHOAIENG-1')
+    with open(path, 'a') as file:
+        file.write('{"op": "done", "id": "torn')  # The crash cut the last write short
+
+    outbox = JiraCommentOutbox(path, client).start()
+    assert outbox.resumed == 1
+    assert outbox.flush(timeout=10) == 0
+    assert state.comments == [('RHOAIENG-1', 'The associated pull request has been merged.')]
+
+    again = JiraCommentOutbox(path, client).start()
+    again.flush(timeout=10)
+    assert again.resumed == 0
+    assert len(state.comments) == 1
+
+
+def test_live_claims_and_other_servers_are_left_alone(jira):
+    client, state, path = jira
+    leftover(client, path, 'RHOAIENG-1', owner='running', claimed_at=time.time())
+    leftover(client, path, 'RHOAIENG-2', server='https://issues.example.com')
+
+    outbox = JiraCommentOutbox(path, client).start()
+    assert outbox.resumed == 0
+    outbox.flush(timeout=10)
+    assert state.comments == []
+    assert sorted(record['jira_id'] for record in journal(path)) == ['RHOAIENG-1', 'RHOAIENG-2']
+    # The other process still holds its claim after this one compacted the journal
+    assert next(record for record in journal(path) if record['jira_id'] == 'RHOAIENG-1')['owner'] == 'running'
+
+
+def test_unanswered_comments_are_not_posted_again(jira):
+    client, state, path = jira
+    client.timeout = (5, 0.2)
+    state.latency = 0.5
+    outbox = JiraCommentOutbox(path, client)
+    outbox.enqueue('RHOAIENG-1', 'merged')
+    outbox.flush(timeout=10)
+    time.sleep(0.5)
+    assert outbox.unconfirmed == 1
+    assert state.comments == [('RHOAIENG-1', 'merged')]
+
+    state.latency = 0
+    again = JiraCommentOutbox(path, client).start()
+    again.flush(timeout=10)
+    assert again.resumed == 0
+    assert len(state.comments) == 1
+
+
+def test_comments_a_run_gives_up_on_are_resumed_by_the_next_run(jira):
+    client, state, path = jira
+    state.error_rate = 1.0
+    outbox = JiraCommentOutbox(path, client, max_attempts=1)
+    outbox.enqueue('RHOAIENG-1', 'merged')
+    assert outbox.flush(timeout=10) == 1  # Still pending; its claim is released for the next run
+
+    state.error_rate = 0
+    again = JiraCommentOutbox(path, client).start()
+    assert again.resumed == 1
+    assert again.flush(timeout=10) == 0
+    assert state.comments == [('RHOAIENG-1', 'merged')]
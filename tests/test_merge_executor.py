@@ -0,0 +1,139 @@
+import os
+import sys
+import threading
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from http_client import ApiClient  # noqa: E402
+from merge_executor import FAILED, MERGED, STALE, UNMERGEABLE, MergeExecutor  # noqa: E402
+from stand_in import StandInServer, StandInState  # noqa: E402
+
+ORG = 'rhoai-rhtap'
+RELEASE = 'rhoai-2.13'
+
+
+@pytest.fixture
+def github():
+    state = StandInState()
+    state.latency = 0.02
+    server = StandInServer(state=state).start()
+    yield ApiClient(github_api_url=server.url), state
+    server.stop()
+
+
+class Merger:
+    """Merges through the stand-in and notes how many merges overlapped within one lane."""
+
+    def __init__(self, client):
+        self.client = client
+        self.running = {}
+        self.overlapped = False
+        self.most_at_once = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, item):
+        repo, pr = item
+        with self._lock:
+            self.running[repo] = self.running.get(repo, 0) + 1
+            self.overlapped |= self.running[repo] > 1
+            self.most_at_once = max(self.most_at_once, sum(self.running.values()))
+        try:
+            url = f"{self.client.github_api_url}/repos/{ORG}/{repo}/pulls/{pr['number']}/merge"
+            print(f"merging {repo}#{pr['number']}")
+            status = self.client.put(url, json={'sha': pr['head']['sha']}).status_code
+        finally:
+            with self._lock:
+                self.running[repo] -= 1
+        return {200: MERGED, 409: STALE, 405: UNMERGEABLE}.get(status, FAILED)
+
+
+def merged(state, repo):
+    return [number for _, name, number, _ in state.merges if name == repo]
+
+
+def test_lanes_merge_in_order_one_at_a_time_and_in_parallel(github):
+    client, state = github
+    merger = Merger(client)
+    executor = MergeExecutor(merger, lambda item: True, workers=4)
+    for repo in ('odh-dashboard', 'notebooks'):
+        for number in (1, 2, 3):
+            executor.submit((repo, RELEASE), (repo, state.add_pr(ORG, repo, number, f'RHOAIENG-{number}: fix')))
+    results = executor.wait()
+    executor.shutdown()
+    assert [outcome for _, _, outcome in results] == [MERGED] * 6
+    assert merged(state, 'odh-dashboard') == merged(state, 'notebooks') == [1, 2, 3]
+    assert not merger.overlapped
+    assert merger.most_at_once == 2
+
+
+def test_unmergeable_pr_is_retried_after_the_rest_of_its_lane(github):
+    client, state = github
+    repo = 'odh-dashboard'
+    prs = [state.add_pr(ORG, repo, number, f'RHOAIENG-{number}: fix') for number in (1, 2, 3)]
+    prs[1]['mergeable'] = False  # GitHub is still recomputing it after #1 merged
+    rechecked = []
+
+    def recheck(item):
+        rechecked.append(item[1]['number'])
+        item[1]['mergeable'] = True
+        return True
+
+    executor = MergeExecutor(Merger(client), recheck, workers=2)
+    for pr in prs:
+        executor.submit((repo, RELEASE), (repo, pr))
+    results = executor.wait()
+    executor.shutdown()
+    assert merged(state, repo) == [1, 3, 2]
+    assert rechecked == [2]
+    assert [(item[1]['number'], outcome) for _, item, outcome in results] == [(1, MERGED), (3, MERGED), (2, MERGED)]
+
+
+def test_requeues_stop_once_the_limit_is_reached(github):
+    client, state = github
+    repo = 'odh-dashboard'
+    pr = state.add_pr(ORG, repo, 1, 'RHOAIENG-1: fix', mergeable=False)
+    rechecked = []
+
+    def recheck(item):
+        rechecked.append(item[1]['number'])
+        return False
+
+    executor = MergeExecutor(Merger(client), recheck, workers=2, max_requeues=2)
+    executor.submit((repo, RELEASE), (repo, pr))
+    results = executor.wait()
+    executor.shutdown()
+    assert [outcome for _, _, outcome in results] == [UNMERGEABLE]
+    assert rechecked == [1, 1]
+    # Rechecks that still say unmergeable do not send the merge again
+    assert sum(1 for method, path in state.requests if method == 'PUT') == 1
+
+
+def test_stale_head_is_not_requeued_and_errors_do_not_stop_the_lane(github):
+    client, state = github
+    repo = 'odh-dashboard'
+    stale = dict(state.add_pr(ORG, repo, 1, 'RHOAIENG-1: fix'), head={'sha': '0' * 40})
+    broken = {'number': 2}
+    fine = state.add_pr(ORG, repo, 3, 'RHOAIENG-3: fix')
+    executor = MergeExecutor(Merger(client), lambda item: True, workers=2)
+    for pr in (stale, broken, fine):
+        executor.submit((repo, RELEASE), (repo, pr))
+    results = executor.wait()
+    executor.shutdown()
+    assert [(item[1]['number'], outcome) for _, item, outcome in results] == [(1, STALE), (2, FAILED), (3, MERGED)]
+
+
+def test_output_is_handed_back_per_lane(github, capsys):
+    client, state = github
+    executor = MergeExecutor(Merger(client), lambda item: True, workers=4)
+    for repo in ('odh-dashboard', 'notebooks'):
+        for number in (1, 2):
+            executor.submit((repo, RELEASE), (repo, state.add_pr(ORG, repo, number, f'RHOAIENG-{number}: fix')))
+    taken = executor.take_output([('notebooks', RELEASE)])
+    assert taken == 'merging notebooks#1\nmerging notebooks#2\n'
+    executor.shutdown()
+    printed = capsys.readouterr().out
+    assert 'merging odh-dashboard#1\nmerging odh-dashboard#2\n' in printed
+    assert 'notebooks' not in printed
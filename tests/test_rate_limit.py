@@ -0,0 +1,116 @@
+import os
+import sys
+import threading
+import time
+
+import pytest
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from http_client import ApiClient  # noqa: E402
+from rate_limit import RateLimiter, RateLimitWaitError  # noqa: E402
+from retry import RetryEngine  # noqa: E402
+from stand_in import StandInServer, StandInState  # noqa: E402
+
+ORG = 'rhoai-rhtap'
+REPO = 'odh-dashboard'
+URL = 'https://api.github.com/repos/rhoai-rhtap/odh-dashboard/pulls/1'
+
+
+@pytest.fixture
+def github():
+    state = StandInState()
+    state.add_pr(ORG, REPO, 1, 'RHOAIENG-1: fix')
+    server = StandInServer(state=state).start()
+    yield server, state
+    server.stop()
+
+
+def limited(status, remaining, reset_in, **headers):
+    response = requests.Response()
+    response.status_code = status
+    response.headers.update({'X-RateLimit-Limit': '100', 'X-RateLimit-Remaining': str(remaining),
+                             'X-RateLimit-Reset': str(time.time() + reset_in), **headers})
+    return response
+
+
+def timed_waits(limiter, method, url, threads):
+    started = time.monotonic()
+    times = []
+
+    def wait():
+        limiter.wait(method, url, time.monotonic() + 10)
+        times.append(time.monotonic() - started)
+
+    workers = [threading.Thread(target=wait) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return sorted(times)
+
+
+def test_retry_after_wins_over_the_reset_time():
+    limiter = RateLimiter(read_rate=1000)
+    # A secondary limit: the hourly quota is fine, but the server asks for a short pause
+    assert limiter.update(URL, limited(403, 50, 3600, **{'Retry-After': '0.2'}))
+    started = time.monotonic()
+    limiter.wait('GET', URL, time.monotonic() + 5)
+    assert 0.15 <= time.monotonic() - started < 1
+
+
+def test_exhausted_quota_blocks_until_reset_but_not_past_the_deadline():
+    limiter = RateLimiter(read_rate=1000)
+    assert limiter.update(URL, limited(403, 0, 3600))
+    started = time.monotonic()
+    with pytest.raises(RateLimitWaitError):
+        limiter.wait('GET', URL, time.monotonic() + 1)
+    assert time.monotonic() - started < 0.5
+
+
+def test_plain_403_is_not_a_rate_limit():
+    limiter = RateLimiter()
+    response = requests.Response()
+    response.status_code = 403
+    assert not limiter.update(URL, response)
+
+
+def test_writes_are_sent_one_at_a_time():
+    limiter = RateLimiter(read_rate=1000, write_rate=10, write_burst=1)
+    times = timed_waits(limiter, 'PUT', f'{URL}/merge', 5)
+    gaps = [later - earlier for earlier, later in zip(times, times[1:])]
+    assert min(gaps) >= 0.08
+
+
+def test_low_quota_is_shared_out_in_turns():
+    limiter = RateLimiter(read_rate=1000)
+    limiter.update(URL, limited(200, 5, 1))
+    times = timed_waits(limiter, 'GET', URL, 4)
+    gaps = [later - earlier for earlier, later in zip(times, times[1:])]
+    assert min(gaps) >= 0.15
+
+
+def test_client_waits_for_the_quota_window_to_reset(github):
+    server, state = github
+    state.rate_limit, state.rate_limit_window = 2, 1
+    client = ApiClient(github_api_url=server.url, limiter=RateLimiter(read_rate=1000), retry=RetryEngine())
+    url = f'{server.url}/repos/{ORG}/{REPO}/pulls/1'
+    started = time.monotonic()
+    assert [client.get(url).status_code for _ in range(3)] == [200, 200, 200]
+    # The spent quota held the third call back until the window reset instead of letting it be refused
+    assert len(state.requests) == 3
+    assert time.monotonic() - started >= 0.5
+
+
+def test_client_raises_rather_than_sleeping_out_a_long_reset(github):
+    server, state = github
+    state.rate_limit, state.rate_limit_window = 1, 3600
+    client = ApiClient(github_api_url=server.url, limiter=RateLimiter(read_rate=1000), retry=RetryEngine())
+    url = f'{server.url}/repos/{ORG}/{REPO}/pulls/1'
+    assert client.get(url).status_code == 200
+    started = time.monotonic()
+    with pytest.raises(RateLimitWaitError):
+        client.get(url)
+    assert time.monotonic() - started < 5
@@ -0,0 +1,125 @@
+import os
+import sys
+import time
+
+import pytest
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import retry  # noqa: E402
+from http_client import ApiClient  # noqa: E402
+from retry import CircuitOpenError, RetryEngine  # noqa: E402
+from stand_in import StandInServer, StandInState  # noqa: E402
+
+ORG = 'rhoai-rhtap'
+REPO = 'odh-dashboard'
+
+
+@pytest.fixture
+def github(monkeypatch):
+    """A GitHub stand-in that fails every request until told otherwise, with backoff cut to a few ms."""
+    monkeypatch.setattr(retry, 'backoff', lambda attempt, *args: 0.01)
+    state = StandInState()
+    state.add_pr(ORG, REPO, 1, 'RHOAIENG-1: fix')
+    state.error_rate = 1.0
+    server = StandInServer(state=state).start()
+    yield server, state
+    server.stop()
+
+
+def new_client(server, **retry_options):
+    return ApiClient(github_api_url=server.url, retry=RetryEngine(**retry_options))
+
+
+def sent(state, method, path):
+    return sum(1 for sent_method, sent_path in state.requests if sent_method == method and sent_path.startswith(path))
+
+
+def test_reads_are_retried(github):
+    server, state = github
+    client = new_client(server)
+    response = client.get(f'{server.url}/repos/{ORG}/{REPO}/pulls/1')
+    assert response.status_code == 503
+    assert sent(state, 'GET', f'/repos/{ORG}/{REPO}/pulls/1') == retry.MAX_ATTEMPTS
+
+
+def test_graphql_queries_are_retried_like_reads(github):
+    server, state = github
+    client = new_client(server)
+    response = client.post(f'{server.url}/graphql', json={'query': '{ viewer { login } }'})
+    assert response.status_code == 503
+    assert sent(state, 'POST', '/graphql') == retry.MAX_ATTEMPTS
+
+
+def test_merges_are_not_resent_after_a_5xx(github):
+    server, state = github
+    client = new_client(server)
+    response = client.put(f'{server.url}/repos/{ORG}/{REPO}/pulls/1/merge', json={})
+    assert response.status_code == 503
+    assert sent(state, 'PUT', f'/repos/{ORG}/{REPO}/pulls/1/merge') == 1
+    assert state.merges == []
+
+
+def test_writes_are_retried_only_when_the_connect_failed(monkeypatch):
+    monkeypatch.setattr(retry, 'backoff', lambda attempt, *args: 0.01)
+    engine = RetryEngine(breaker_threshold=10)
+    for error, expected_attempts in ((requests.exceptions.ConnectTimeout, 2), (requests.exceptions.ReadTimeout, 1)):
+        attempts = []
+
+        def send(timeout):
+            attempts.append(timeout)
+            if len(attempts) == 1:
+                raise error()
+            return requests.Response()
+
+        try:
+            engine.call('PUT', 'https://api.github.com/repos/o/r/pulls/1/merge', send)
+        except requests.exceptions.ReadTimeout:
+            pass
+        assert len(attempts) == expected_attempts
+
+
+def test_open_breaker_fails_fast_then_lets_one_probe_through(github):
+    server, state = github
+    client = new_client(server, breaker_threshold=2, breaker_reset=0.2)
+    url = f'{server.url}/repos/{ORG}/{REPO}/pulls/1'
+    with pytest.raises(CircuitOpenError):
+        client.get(url)
+    assert sent(state, 'GET', f'/repos/{ORG}/{REPO}/pulls/1') == 2
+    with pytest.raises(CircuitOpenError):
+        client.get(url)
+    assert sent(state, 'GET', f'/repos/{ORG}/{REPO}/pulls/1') == 2
+
+    # The probe after the reset fails, so the circuit opens again straight away
+    time.sleep(0.25)
+    with pytest.raises(CircuitOpenError):
+        client.get(url)
+    assert sent(state, 'GET', f'/repos/{ORG}/{REPO}/pulls/1') == 3
+
+    # A successful probe closes it
+    time.sleep(0.25)
+    state.error_rate = 0.0
+    assert client.get(url).status_code == 200
+    assert client.get(url).status_code == 200
+    assert sent(state, 'GET', f'/repos/{ORG}/{REPO}/pulls/1') == 5
+
+
+def test_probe_is_released_when_the_send_raises_unexpectedly():
+    engine = RetryEngine(breaker_threshold=1, breaker_reset=0)
+    url = 'https://api.github.com/repos/o/r/pulls/1'
+
+    def refuse(timeout):
+        raise requests.exceptions.ConnectionError()
+
+    def crash(timeout):
+        raise ValueError('bad response body')
+
+    with pytest.raises(requests.exceptions.ConnectionError):
+        engine.call('GET', url, refuse)
+    with pytest.raises(ValueError):
+        engine.call('GET', url, crash)  # This was the probe
+    response = requests.Response()
+    response.status_code = 200
+    assert engine.call('GET', url, lambda timeout: response) is response
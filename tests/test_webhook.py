@@ -0,0 +1,138 @@
+import importlib
+import json
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from stand_in import StandInServer, StandInState, send_webhook  # noqa: E402
+
+ORG = 'rhoai-rhtap'
+RELEASE = 'rhoai-2.13'
+SECRET = 'webhook-secret'
+JIRA_TOKEN = 'jira-token'
+
+
+@pytest.fixture(scope='module')
+def stand_in(tmp_path_factory):
+    """GitHub and JIRA stand-ins (one shared state) with the webhook module pointed at them."""
+    workdir = tmp_path_factory.mktemp('webhook')
+    state = StandInState()
+    github, jira = StandInServer(state=state).start(), StandInServer(state=state).start()
+    with open(workdir / 'repos.json', 'w') as file:
+        json.dump({'org': ORG, 'jira_server': jira.url, 'jira_project': 'RHOAIENG', 'jira_priority': 'Blocker',
+                   'components': [{'component_name': 'Dashboard', 'rhds_repos': ['odh-dashboard']}]}, file)
+    saved = dict(os.environ)
+    os.environ.update({
+        'GITHUB_API_URL': github.url,
+        'REPOS_CONFIG_PATH': str(workdir / 'repos.json'),
+        'HTTP_CACHE_PATH': '',
+        'JIRA_CACHE_PATH': str(workdir / 'jira_issues.sqlite'),
+        'ORG_MEMBERS_CACHE_DIR': str(workdir / 'org_members'),
+        'JIRA_OUTBOX_PATH': str(workdir / 'jira_outbox.jsonl'),
+        'API_METRICS_PATH': '',
+        'HTTP_READ_RATE': '1000',
+        'HTTP_WRITE_RATE': '1000',
+    })
+    webhook = importlib.import_module('webhook')
+    config = webhook.automerge.load_config()
+    webhook.configure_project_keys(config.jira_project)
+    webhook.automerge.JIRA_SERVER = config.jira_server
+    webhook.automerge.client.set_jira_server(config.jira_server)
+    state.add_member(ORG, 'dev')
+    daemon = webhook.WebhookDaemon(config, [RELEASE], port=0, github_secret=SECRET, jira_token=JIRA_TOKEN).start()
+    yield webhook, daemon, state
+    daemon.stop()
+    github.stop()
+    jira.stop()
+    os.environ.clear()
+    os.environ.update(saved)
+
+
+def pr_event(number, action='opened', **fields):
+    pr = {'number': number, 'state': 'open', 'base': {'ref': RELEASE}, **fields}
+    return {'action': action, 'pull_request': pr,
+            'repository': {'name': 'odh-dashboard', 'full_name': f'{ORG}/odh-dashboard', 'owner': {'login': ORG}}}
+
+
+def deliver_github(daemon, payload, secret=SECRET):
+    response = send_webhook(f'{daemon.url}/github', payload, 'pull_request', secret=secret)
+    daemon.wait_idle()
+    return response.status_code
+
+
+def deliver_jira(daemon, issue, token=JIRA_TOKEN):
+    response = send_webhook(f'{daemon.url}/jira?token={token}', {'webhookEvent': 'jira:issue_updated', 'issue': issue})
+    daemon.wait_idle()
+    return response.status_code
+
+
+def merged_numbers(state):
+    return [number for _, _, number, _ in state.merges]
+
+
+def test_unsigned_deliveries_are_rejected(stand_in):
+    _, daemon, state = stand_in
+    state.add_issue('RHOAIENG-100', priority='Blocker')
+    state.add_pr(ORG, 'odh-dashboard', 100, 'RHOAIENG-100: fix')
+    assert deliver_github(daemon, pr_event(100), secret=None) == 401
+    assert deliver_github(daemon, pr_event(100), secret='wrong') == 401
+    assert deliver_jira(daemon, {'key': 'RHOAIENG-100'}, token='wrong') == 401
+    assert 100 not in merged_numbers(state)
+
+
+def test_pull_request_merges_the_fetched_head(stand_in):
+    _, daemon, state = stand_in
+    state.add_issue('RHOAIENG-101', priority='Blocker')
+    pr = state.add_pr(ORG, 'odh-dashboard', 101, 'RHOAIENG-101: fix')
+    assert deliver_github(daemon, pr_event(101)) == 202
+    merge = next(body for _, _, number, body in state.merges if number == 101)
+    assert merge['sha'] == pr['head']['sha']
+
+
+def test_pull_request_payload_is_only_a_trigger(stand_in):
+    _, daemon, state = stand_in
+    state.add_issue('RHOAIENG-102', priority='Blocker')
+    state.add_pr(ORG, 'odh-dashboard', 102, 'Unrelated change', author='outsider', author_association='CONTRIBUTOR')
+    forged = pr_event(102, title='RHOAIENG-102: fix', user={'login': 'dev'}, author_association='MEMBER',
+                      mergeable=True, head={'sha': 'f' * 40})
+    assert deliver_github(daemon, forged) == 202
+    assert 102 not in merged_numbers(state)
+
+
+def test_jira_update_refetches_the_issue(stand_in):
+    webhook, daemon, state = stand_in
+    issue = state.add_issue('RHOAIENG-103', priority='Major')
+    state.add_pr(ORG, 'odh-dashboard', 103, 'RHOAIENG-103: fix')
+    assert deliver_github(daemon, pr_event(103)) == 202
+    assert 103 not in merged_numbers(state)
+
+    # A delivery claiming a Blocker neither merges nor lands in the shared cache
+    forged = {'key': 'RHOAIENG-103', 'fields': {**issue['fields'], 'priority': {'name': 'Blocker'}}}
+    assert deliver_jira(daemon, forged) == 202
+    assert 103 not in merged_numbers(state)
+    cached = webhook.automerge.jira_cache.get('RHOAIENG-103')
+    assert cached is None or cached['fields']['priority']['name'] == 'Major'
+
+    issue['fields']['priority'] = {'name': 'Blocker'}
+    assert deliver_jira(daemon, {'key': 'RHOAIENG-103'}) == 202
+    assert 103 in merged_numbers(state)
+
+
+def test_refuses_public_listener_without_secrets(stand_in):
+    webhook, _, _ = stand_in
+    config = webhook.automerge.load_config()
+    with pytest.raises(ValueError):
+        webhook.WebhookDaemon(config, [RELEASE], host='0.0.0.0', port=0, github_secret=None, jira_token=None)
+
+
+def test_oversized_deliveries_are_rejected(stand_in, monkeypatch):
+    webhook, daemon, state = stand_in
+    state.add_issue('RHOAIENG-104', priority='Blocker')
+    state.add_pr(ORG, 'odh-dashboard', 104, 'RHOAIENG-104: fix')
+    monkeypatch.setattr(webhook, 'MAX_BODY_BYTES', 64)
+    assert deliver_github(daemon, pr_event(104)) == 413
+    assert 104 not in merged_numbers(state)
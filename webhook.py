@@ -0,0 +1,299 @@
+import argparse
+import hashlib
+import hmac
+import importlib.util
+import ipaddress
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from github_api import repo_path
+from jira_ids import configure_project_keys
+
+
+def _load_sweep():
+    """Load test.py by path; ``import test`` can resolve to the standard library's test package."""
+    name = 'automerge_sweep'
+    if name not in sys.modules:
+        spec = importlib.util.spec_from_file_location(name, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'test.py'))
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module
+        spec.loader.exec_module(module)
+    return sys.modules[name]
+
+
+# The sweep script; its decision and merge functions are reused unchanged
+automerge = _load_sweep()
+
+# ANSI escape codes for color
+GREEN = '\033[92m'
+RED = '\033[91m'
+RESET = '\033[0m'
+
+# Shared secrets for verifying deliveries; both are required unless the daemon only listens on loopback
+GITHUB_WEBHOOK_SECRET = os.getenv('GITHUB_WEBHOOK_SECRET')
+JIRA_WEBHOOK_TOKEN = os.getenv('JIRA_WEBHOOK_TOKEN')
+
+# pull_request actions that can make a PR ready to merge
+PR_ACTIONS = {'opened', 'reopened', 'synchronize', 'edited', 'ready_for_review', 'labeled'}
+
+# JIRA events that may have raised an issue's priority
+JIRA_EVENTS = {'jira:issue_updated'}
+
+# Largest delivery accepted; GitHub caps webhook payloads at 25 MB
+MAX_BODY_BYTES = 25 * 1024 * 1024
+
+# How often the worker compacts the JIRA comment journal, which would otherwise grow until exit
+OUTBOX_COMPACT_SECONDS = 10 * 60
+
+
+def is_loopback(host):
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return host == 'localhost'
+
+
+class WebhookDaemon:
+    """Long-running auto-merger driven by GitHub and JIRA webhooks.
+
+    ``POST /github`` accepts ``pull_request`` events and ``POST /jira``
+    accepts issue-updated events. Deliveries are acknowledged immediately and
+    handled one at a time by a worker thread, which runs the same checks and
+    merge as the sweep (``evaluate_pr`` and ``merge_candidates`` from
+    test.py) with warm caches and pooled connections.
+
+    A delivery only says which PR or issue changed: the PR is fetched again
+    from GitHub and the issue from JIRA before anything is evaluated, and the
+    merge is pinned to the fetched head, so a forged or stale payload can at
+    most cause a re-check. Listening on anything but loopback requires both
+    ``github_secret`` and ``jira_token``.
+
+    The daemon remembers which open PRs reference which JIRA issue, so a
+    JIRA update re-evaluates exactly those PRs. ``seed`` fills that index
+    from the currently open PRs at startup.
+    """
+
+    def __init__(self, config, branches, host='127.0.0.1', port=8080,
+                 github_secret=GITHUB_WEBHOOK_SECRET, jira_token=JIRA_WEBHOOK_TOKEN):
+        if not (github_secret and jira_token) and not is_loopback(host):
+            raise ValueError(f'refusing to listen on {host} without GITHUB_WEBHOOK_SECRET and JIRA_WEBHOOK_TOKEN')
+        self.org = config.org
+        self.repos = {self._full_name(repo): repo for repo in config.repos}
+        self.branches = set(branches)
+        self.github_secret = github_secret
+        self.jira_token = jira_token
+        self.events = queue.Queue()
+        self.prs_by_jira_id = {}
+        self._index_lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), WebhookHandler)
+        self.server.webhook_daemon = self
+        self.url = f'http://{host}:{self.server.server_address[1]}'
+
+    def _full_name(self, repo):
+        return repo_path(self.org, repo).lower()
+
+    def _index(self, repo, pr):
+        key = (repo, pr['number'])
+        jira_id = automerge.get_jira_id_from_pr(pr)
+        with self._index_lock:
+            for indexed in self.prs_by_jira_id.values():
+                indexed.discard(key)
+            if jira_id and pr.get('state', 'open') == 'open':
+                self.prs_by_jira_id.setdefault(jira_id, set()).add(key)
+
+    def seed(self):
+        """Index the open PRs of every configured repo and branch."""
+        for repo in self.repos.values():
+            for branch in sorted(self.branches):
+                for pr in automerge.fetch_open_prs(self.org, repo, branch):
+                    self._index(repo, pr)
+        print(f"{GREEN}Indexed open PRs for {len(self.prs_by_jira_id)} JIRA issue(s).{RESET}")
+
+    def refresh_pr(self, repo, number, evaluate=True):
+        """Fetch PR ``number`` from GitHub, re-index it and, if it is open, evaluate it."""
+        pr = automerge.fetch_pr(self.org, repo, number)
+        if pr is None:
+            return
+        self._index(repo, pr)
+        if evaluate and pr['state'] == 'open':
+            self.process_pr(repo, pr)
+
+    def handle_pull_request(self, payload):
+        repository = payload['repository']['full_name']
+        number = int(payload['pull_request']['number'])
+        repo = self.repos.get(repository.lower())
+        if repo is None:
+            print(f"{RED}Ignoring PR #{number} in {repository}: repo is not configured.{RESET}")
+            return
+        # Other actions only keep the JIRA index current
+        self.refresh_pr(repo, number, evaluate=payload.get('action') in PR_ACTIONS)
+
+    def handle_jira_issue(self, payload):
+        jira_id = str(payload['issue']['key'])
+        # The checks fetch the issue from JIRA again rather than trusting the delivery
+        automerge.prefetched_jira_issues.pop(jira_id, None)
+        automerge.jira_cache.invalidate(jira_id)
+        with self._index_lock:
+            prs = sorted(self.prs_by_jira_id.get(jira_id, ()))
+        if not prs:
+            print(f"No open PRs reference JIRA issue {jira_id}.")
+        for repo, number in prs:
+            self.refresh_pr(repo, number)
+
+    def process_pr(self, repo, pr):
+        if pr['base']['ref'] not in self.branches:
+            print(f"{RED}Skipping PR #{pr['number']} in {repo}: base '{pr['base']['ref']}' is not an allowed release.{RESET}")
+            return
+        if not (pr.get('head') or {}).get('sha'):
+            print(f"{RED}Skipping PR #{pr['number']} in {repo}: GitHub did not report its head commit.{RESET}")
+            return
+        if automerge.evaluate_pr(self.org, repo, pr):
+            automerge.merge_candidates(self.org, repo, [pr])
+
+    def _compact_outbox(self):
+        try:
+            automerge.jira_outbox.compact()
+        except OSError as err:
+            print(f"{RED}Could not compact the JIRA comment journal: {err}{RESET}")
+
+    def _work(self):
+        compacted = time.monotonic()
+        while True:
+            if time.monotonic() - compacted >= OUTBOX_COMPACT_SECONDS:
+                self._compact_outbox()
+                compacted = time.monotonic()
+            try:
+                kind, payload = self.events.get(timeout=OUTBOX_COMPACT_SECONDS)
+            except queue.Empty:
+                continue
+            try:
+                if kind == 'github':
+                    self.handle_pull_request(payload)
+                else:
+                    self.handle_jira_issue(payload)
+            except Exception as err:  # One bad delivery must not stop the daemon
+                print(f"{RED}Failed to handle {kind} event: {err}{RESET}")
+            finally:
+                self.events.task_done()
+
+    def wait_idle(self):
+        """Block until every delivery received so far has been handled."""
+        self.events.join()
+
+    def start(self):
+        threading.Thread(target=self._work, daemon=True).start()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def serve_forever(self):
+        threading.Thread(target=self._work, daemon=True).start()
+        print(f"{GREEN}Listening for webhooks on {self.url} (/github, /jira).{RESET}")
+        self.server.serve_forever()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class WebhookHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status, message):
+        body = message.encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/plain')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if urlsplit(self.path).path == '/healthz':
+            return self._reply(200, 'ok')
+        self._reply(404, 'not found')
+
+    def do_POST(self):
+        parts = urlsplit(self.path)
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+        except ValueError:
+            length = -1
+        if not 0 <= length <= MAX_BODY_BYTES:
+            # The body is left unread, so the connection cannot be reused
+            self.close_connection = True
+            return self._reply(413 if length > MAX_BODY_BYTES else 400, 'bad Content-Length')
+        body = self.rfile.read(length)
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            return self._reply(400, 'invalid JSON')
+
+        daemon = self.server.webhook_daemon
+        if parts.path == '/github':
+            if daemon.github_secret:
+                expected = 'sha256=' + hmac.new(daemon.github_secret.encode(), body, hashlib.sha256).hexdigest()
+                if not hmac.compare_digest(expected, self.headers.get('X-Hub-Signature-256', '')):
+                    return self._reply(401, 'bad signature')
+            if self.headers.get('X-GitHub-Event') != 'pull_request':
+                return self._reply(202, 'ignored')
+            daemon.events.put(('github', payload))
+        elif parts.path == '/jira':
+            token = parse_qs(parts.query).get('token', [''])[0]
+            if daemon.jira_token and not hmac.compare_digest(daemon.jira_token, token):
+                return self._reply(401, 'bad token')
+            if payload.get('webhookEvent') not in JIRA_EVENTS:
+                return self._reply(202, 'ignored')
+            daemon.events.put(('jira', payload))
+        else:
+            return self._reply(404, 'not found')
+        self._reply(202, 'queued')
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Auto-merge Blocker PRs as GitHub and JIRA webhooks arrive.')
+    parser.add_argument('--host', default='127.0.0.1',
+                        help='Address to listen on; anything but loopback needs GITHUB_WEBHOOK_SECRET and JIRA_WEBHOOK_TOKEN')
+    parser.add_argument('--port', type=int, default=8080, help='Port to listen on')
+    parser.add_argument('--branch', action='append',
+                        help='Release branch to act on (repeatable); defaults to every release in releases.yaml')
+    parser.add_argument('--seed', action='store_true',
+                        help='Index currently open PRs at startup so JIRA updates can reach them')
+    args = parser.parse_args()
+
+    allowed_releases = automerge.load_releases()
+    for branch in args.branch or []:
+        automerge.validate_branch(branch, allowed_releases)
+
+    config = automerge.load_config()
+    configure_project_keys(config.jira_project)
+    automerge.JIRA_SERVER = config.jira_server
+    automerge.client.set_jira_server(automerge.JIRA_SERVER)
+    # A daemon run never ends, so a per-run retry budget would eventually switch retries off
+    automerge.client.retry.run_budget = None
+
+    try:
+        daemon = WebhookDaemon(config, args.branch or allowed_releases, host=args.host, port=args.port)
+    except ValueError as err:
+        print(f"{RED}Error: {err}.{RESET}")
+        sys.exit(1)
+    if not (daemon.github_secret and daemon.jira_token):
+        print(f"{RED}Warning: webhook deliveries are not verified; set GITHUB_WEBHOOK_SECRET and JIRA_WEBHOOK_TOKEN.{RESET}")
+    if args.seed:
+        daemon.seed()
+    try:
+        daemon.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        automerge.jira_outbox.flush()
+        automerge.jira_cache.print_stats()
+        automerge.jira_outbox.print_stats()
+        automerge.client.print_stats()